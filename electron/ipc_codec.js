@@ -0,0 +1,243 @@
+// ipc_codec.js
+//
+// Python arka ucu ile stdin/stdout protokolü. Varsayılan olarak satır sonlu JSON
+// kullanılır; arka uç {"type": "ipc_framing", "data": {"mode": "msgpack"}} satırını
+// gönderirse okuyucu uzunluk önekli çerçevelere geçer (4 bayt big-endian uzunluk +
+// MessagePack yükü). Ayrıntılar: python_backend/services/ipc_protocol.py
+
+const FRAMING_JSON = "json"
+const FRAMING_MSGPACK = "msgpack"
+const HANDSHAKE_TYPE = "ipc_framing"
+const ACK_ACTION = "ipc_framing_ack"
+const FRAME_HEADER_BYTES = 4
+const MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+const textDecoder = new TextDecoder("utf-8")
+
+// --- MessagePack çözücü ---
+
+function decodeMsgpack(bytes) {
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength)
+  let offset = 0
+
+  const readString = (length) => {
+    const value = textDecoder.decode(bytes.subarray(offset, offset + length))
+    offset += length
+    return value
+  }
+  const readBinary = (length) => {
+    const value = bytes.slice(offset, offset + length)
+    offset += length
+    return value
+  }
+  const readArray = (length) => {
+    const value = new Array(length)
+    for (let i = 0; i < length; i++) value[i] = read()
+    return value
+  }
+  const readMap = (length) => {
+    const value = {}
+    for (let i = 0; i < length; i++) {
+      const key = read()
+      value[String(key)] = read()
+    }
+    return value
+  }
+  const readExt = (length) => {
+    offset += 1 + length // Uzantı türleri arka uçta kullanılmıyor.
+    return null
+  }
+  const readBigInt = (signed) => {
+    const value = signed ? view.getBigInt64(offset) : view.getBigUint64(offset)
+    offset += 8
+    return Number(value)
+  }
+
+  function read() {
+    if (offset >= bytes.length) throw new RangeError("MessagePack verisi beklenenden kısa")
+    const byte = bytes[offset++]
+    if (byte <= 0x7f) return byte
+    if (byte >= 0xe0) return byte - 0x100
+    if ((byte & 0xf0) === 0x80) return readMap(byte & 0x0f)
+    if ((byte & 0xf0) === 0x90) return readArray(byte & 0x0f)
+    if ((byte & 0xe0) === 0xa0) return readString(byte & 0x1f)
+    let value
+    switch (byte) {
+      case 0xc0: return null
+      case 0xc2: return false
+      case 0xc3: return true
+      case 0xc4: value = view.getUint8(offset); offset += 1; return readBinary(value)
+      case 0xc5: value = view.getUint16(offset); offset += 2; return readBinary(value)
+      case 0xc6: value = view.getUint32(offset); offset += 4; return readBinary(value)
+      case 0xc7: value = view.getUint8(offset); offset += 1; return readExt(value)
+      case 0xc8: value = view.getUint16(offset); offset += 2; return readExt(value)
+      case 0xc9: value = view.getUint32(offset); offset += 4; return readExt(value)
+      case 0xca: value = view.getFloat32(offset); offset += 4; return value
+      case 0xcb: value = view.getFloat64(offset); offset += 8; return value
+      case 0xcc: value = view.getUint8(offset); offset += 1; return value
+      case 0xcd: value = view.getUint16(offset); offset += 2; return value
+      case 0xce: value = view.getUint32(offset); offset += 4; return value
+      case 0xcf: return readBigInt(false)
+      case 0xd0: value = view.getInt8(offset); offset += 1; return value
+      case 0xd1: value = view.getInt16(offset); offset += 2; return value
+      case 0xd2: value = view.getInt32(offset); offset += 4; return value
+      case 0xd3: return readBigInt(true)
+      case 0xd4: return readExt(1)
+      case 0xd5: return readExt(2)
+      case 0xd6: return readExt(4)
+      case 0xd7: return readExt(8)
+      case 0xd8: return readExt(16)
+      case 0xd9: value = view.getUint8(offset); offset += 1; return readString(value)
+      case 0xda: value = view.getUint16(offset); offset += 2; return readString(value)
+      case 0xdb: value = view.getUint32(offset); offset += 4; return readString(value)
+      case 0xdc: value = view.getUint16(offset); offset += 2; return readArray(value)
+      case 0xdd: value = view.getUint32(offset); offset += 4; return readArray(value)
+      case 0xde: value = view.getUint16(offset); offset += 2; return readMap(value)
+      case 0xdf: value = view.getUint32(offset); offset += 4; return readMap(value)
+      default: throw new Error(`Geçersiz MessagePack baytı: 0x${byte.toString(16)}`)
+    }
+  }
+
+  return read()
+}
+
+// --- MessagePack kodlayıcı (komutlar küçük olduğundan basit tutulmuştur) ---
+
+function encodeMsgpack(value) {
+  const chunks = []
+  const header = (bytes) => chunks.push(Buffer.from(bytes))
+  const sized = (length, small, codes) => {
+    if (small !== null && length < small.limit) return header([small.base | length])
+    if (length <= 0xff && codes[0] !== null) return header([codes[0], length])
+    if (length <= 0xffff) return header([codes[1], length >> 8, length & 0xff])
+    const buf = Buffer.alloc(5)
+    buf[0] = codes[2]
+    buf.writeUInt32BE(length, 1)
+    chunks.push(buf)
+  }
+
+  function write(item) {
+    if (item === null || item === undefined) return header([0xc0])
+    if (item === false) return header([0xc2])
+    if (item === true) return header([0xc3])
+    if (typeof item === "number") {
+      if (Number.isInteger(item) && item >= 0 && item <= 0x7f) return header([item])
+      if (Number.isInteger(item) && item < 0 && item >= -32) return header([item + 0x100])
+      if (Number.isInteger(item) && item >= -0x80000000 && item <= 0xffffffff) {
+        const buf = Buffer.alloc(5)
+        if (item < 0) { buf[0] = 0xd2; buf.writeInt32BE(item, 1) } else { buf[0] = 0xce; buf.writeUInt32BE(item, 1) }
+        return chunks.push(buf)
+      }
+      const buf = Buffer.alloc(9)
+      buf[0] = 0xcb
+      buf.writeDoubleBE(item, 1)
+      return chunks.push(buf)
+    }
+    if (typeof item === "bigint") return write(Number(item))
+    if (typeof item === "string") {
+      const encoded = Buffer.from(item, "utf8")
+      sized(encoded.length, { limit: 32, base: 0xa0 }, [0xd9, 0xda, 0xdb])
+      return chunks.push(encoded)
+    }
+    if (item instanceof Uint8Array) {
+      sized(item.length, null, [0xc4, 0xc5, 0xc6])
+      return chunks.push(Buffer.from(item))
+    }
+    if (Array.isArray(item)) {
+      sized(item.length, { limit: 16, base: 0x90 }, [null, 0xdc, 0xdd])
+      for (const element of item) write(element)
+      return
+    }
+    if (item instanceof Date) return write(item.toISOString())
+    if (typeof item === "object") {
+      if (typeof item.toJSON === "function") return write(item.toJSON())
+      const entries = Object.entries(item).filter(([, v]) => v !== undefined && typeof v !== "function")
+      sized(entries.length, { limit: 16, base: 0x80 }, [null, 0xde, 0xdf])
+      for (const [key, element] of entries) { write(key); write(element) }
+      return
+    }
+    return header([0xc0])
+  }
+
+  write(value)
+  return Buffer.concat(chunks)
+}
+
+function encodeFrame(value) {
+  const payload = encodeMsgpack(value)
+  const header = Buffer.alloc(FRAME_HEADER_BYTES)
+  header.writeUInt32BE(payload.length, 0)
+  return Buffer.concat([header, payload])
+}
+
+function encodeCommand(command, framing) {
+  return framing === FRAMING_MSGPACK ? encodeFrame(command) : `${JSON.stringify(command)}\n`
+}
+
+// --- stdout okuyucu ---
+
+// Gelen parçaları biriktirir ve her tam mesaj için onMessage(message) çağırır. Anlaşma satırı
+// okuyucuyu çerçeve moduna geçirir ve onFraming(mode) ile bildirilir; bu satır onMessage'a iletilmez.
+function createMessageReader(onMessage, onFraming, onError) {
+  let mode = FRAMING_JSON
+  let buffer = Buffer.alloc(0)
+
+  function readLine() {
+    const boundary = buffer.indexOf(0x0a)
+    if (boundary === -1) return false
+    const line = buffer.subarray(0, boundary).toString("utf8").trim()
+    buffer = buffer.subarray(boundary + 1)
+    if (!line) return true
+    let message
+    try {
+      message = JSON.parse(line)
+    } catch (error) {
+      onError(error, line)
+      return true
+    }
+    if (message && message.type === HANDSHAKE_TYPE) {
+      mode = message.data && message.data.mode === FRAMING_MSGPACK ? FRAMING_MSGPACK : FRAMING_JSON
+      onFraming(mode)
+      return true
+    }
+    onMessage(message)
+    return true
+  }
+
+  function readFrame() {
+    if (buffer.length < FRAME_HEADER_BYTES) return false
+    const length = buffer.readUInt32BE(0)
+    if (length > MAX_FRAME_BYTES) throw new Error(`IPC çerçevesi çok büyük: ${length} bayt`)
+    if (buffer.length < FRAME_HEADER_BYTES + length) return false
+    const payload = buffer.subarray(FRAME_HEADER_BYTES, FRAME_HEADER_BYTES + length)
+    buffer = buffer.subarray(FRAME_HEADER_BYTES + length)
+    let message
+    try {
+      message = decodeMsgpack(payload)
+    } catch (error) {
+      onError(error, `<${length} baytlık çerçeve>`)
+      return true
+    }
+    onMessage(message)
+    return true
+  }
+
+  return {
+    push(chunk) {
+      buffer = buffer.length ? Buffer.concat([buffer, chunk]) : chunk
+      while (mode === FRAMING_MSGPACK ? readFrame() : readLine()) { }
+    },
+    get mode() { return mode },
+  }
+}
+
+module.exports = {
+  FRAMING_JSON,
+  FRAMING_MSGPACK,
+  ACK_ACTION,
+  decodeMsgpack,
+  encodeMsgpack,
+  encodeFrame,
+  encodeCommand,
+  createMessageReader,
+}
@@ -5,11 +5,12 @@ const { autoUpdater } = require("electron-updater")
 const path = require("path")
 const fs = require("fs")
 const { spawn, exec, execSync, execFileSync } = require("child_process")
-const { StringDecoder } = require('string_decoder');
+const { FRAMING_JSON, FRAMING_MSGPACK, ACK_ACTION, createMessageReader, encodeCommand } = require("./ipc_codec")
 
 let win
 let tray
 let pythonProcess = null
+let pythonFraming = FRAMING_JSON // Python ile anlaşılan komut çerçevelemesi (bkz. ipc_codec.js)
 let handshakeComplete = false // Arayüzün hazır olup olmadığını takip eder
 let pendingRendererMessages = []
 let pendingPythonCommands = []
@@ -102,6 +103,72 @@ function flushPendingPythonCommands() {
   }
 }
 
+function handlePythonMessage(message) {
+  if (message && typeof message === "object" && message.type) {
+    const { type, data, context } = message
+    if (type === 'python_shutdown_complete') {
+      executeFinalShutdown();
+      return;
+    }
+    const channels = {
+      python_services_ready: "services-ready",
+      initial_setup_required: "initial-setup-required",
+      authentication_error: "authentication-error",
+      product_found: "search-product-found",
+      search_complete: "search-complete",
+      search_profile: "search-profile",
+      export_result: "export-result",
+      error: "search-error",
+      settings_loaded: "settings-loaded",
+      settings_saved: "settings-saved",
+      batch_search_progress: "batch-search-progress",
+      batch_search_complete: "batch-search-complete",
+      log_search_term: "log-search-term",
+      parities_updated: "parities-updated",
+      calendar_notes_loaded: "calendar-notes-loaded",
+      calendar_notes_saved: "calendar-notes-saved",
+      show_notification: "show-notification",
+      export_meetings_result: "export-meetings-result",
+      new_settings_available: "new-settings-available",
+      orkim_stock_result: "orkim-stock-result",
+      rate_limits: "rate-limits",
+    }
+    const channel = channels[type]
+
+    if (type === "python_services_ready") {
+      console.log("Python'dan 'python_services_ready' sinyali alındı. Arayüze 'services-ready' gönderiliyor.");
+    }
+
+    if (type === "show_notification" && data) {
+      if (Notification.isSupported()) {
+        const notification = new Notification({
+          title: data.title || "Görüşme Hatırlatması",
+          body: data.body || "",
+          icon: iconPath,
+          actions: [{ type: "button", text: "Tamamlandı Olarak İşaretle" }],
+        })
+        notification.on("action", (event, index) => {
+          if (index === 0) {
+            sendCommandToPython({ action: "mark_meeting_complete", data: { noteDate: data.noteDate, meetingId: data.meetingId } })
+          }
+        })
+        notification.show()
+      }
+    } else if (win && !win.isDestroyed() && channel) {
+      if (type === "product_found" && context) {
+        sendToRenderer(channel, { product: data.product, context: context })
+      } else {
+        sendToRenderer(channel, data)
+      }
+    }
+  }
+}
+
+// Arka uç bu değişkeni görünce MessagePack çerçevelemesini önerir; eski arka uçlar yok sayar ve JSON satırlarıyla devam eder.
+function pythonSpawnOptions() {
+  return { env: { ...process.env, NPC_IPC_FRAMING: FRAMING_MSGPACK } }
+}
+
 function startPythonService() {
   if (pythonProcess) {
     console.log("Python servisi zaten çalışıyor.")
@@ -112,18 +179,18 @@ function startPythonService() {
   if (isDev) {
     const pythonCmd = resolvePythonCommand()
     scriptPath = path.join(__dirname, "..", "python_backend", "main.py")
-    pythonProcess = spawn(pythonCmd, ["-u", scriptPath, userDataPath])
+    pythonProcess = spawn(pythonCmd, ["-u", scriptPath, userDataPath], pythonSpawnOptions())
   } else {
     const bundledExePath = path.join(process.resourcesPath, "bin", "desktop_app.exe")
     const bundledPyPath = path.join(process.resourcesPath, "python_backend", "main.py")
     if (fs.existsSync(bundledExePath)) {
       scriptPath = bundledExePath
-      pythonProcess = spawn(scriptPath, [userDataPath])
+      pythonProcess = spawn(scriptPath, [userDataPath], pythonSpawnOptions())
     } else if (fs.existsSync(bundledPyPath)) {
       scriptPath = bundledPyPath
       const pythonCmd = resolvePythonCommand()
       ensureBundledPythonDeps(pythonCmd)
-      pythonProcess = spawn(pythonCmd, ["-u", scriptPath, userDataPath])
+      pythonProcess = spawn(pythonCmd, ["-u", scriptPath, userDataPath], pythonSpawnOptions())
       console.warn(`[PACKAGED FALLBACK] desktop_app.exe bulunamadı, script modunda başlatılıyor: ${bundledPyPath}`)
     } else {
       const errorMessage = "Python backend dosyası bulunamadı (desktop_app.exe / python_backend/main.py)."
@@ -147,78 +214,30 @@ function startPythonService() {
   pythonProcess.stderr.on("data", (data) => {
     console.error(`[PYTHON HATA]: ${data.toString()}`)
   })
-  const decoder = new StringDecoder('utf8');
-  let buffer = ""
-  pythonProcess.stdout.on("data", (data) => {
-    buffer += decoder.write(data);
-    let boundary = buffer.indexOf("\n")
-    while (boundary !== -1) {
-      const completeJsonString = buffer.substring(0, boundary).trim()
-      buffer = buffer.substring(boundary + 1)
-      if (completeJsonString) {
-        try {
-          const message = JSON.parse(completeJsonString)
-          if (message && typeof message === "object" && message.type) {
-            const { type, data, context } = message
-            if (type === 'python_shutdown_complete') {
-              executeFinalShutdown();
-              continue;
-            }
-            const channels = {
-              python_services_ready: "services-ready",
-              initial_setup_required: "initial-setup-required",
-              authentication_error: "authentication-error",
-              product_found: "search-product-found",
-              search_complete: "search-complete",
-              export_result: "export-result",
-              error: "search-error",
-              settings_loaded: "settings-loaded",
-              settings_saved: "settings-saved",
-              batch_search_progress: "batch-search-progress",
-              batch_search_complete: "batch-search-complete",
-              log_search_term: "log-search-term",
-              parities_updated: "parities-updated",
-              calendar_notes_loaded: "calendar-notes-loaded",
-              calendar_notes_saved: "calendar-notes-saved",
-              show_notification: "show-notification",
-              export_meetings_result: "export-meetings-result",
-              new_settings_available: "new-settings-available",
-              orkim_stock_result: "orkim-stock-result",
-            }
-            const channel = channels[type]
-
-            if (type === "python_services_ready") {
-              console.log("Python'dan 'python_services_ready' sinyali alındı. Arayüze 'services-ready' gönderiliyor.");
-            }
-
-            if (type === "show_notification" && data) {
-              if (Notification.isSupported()) {
-                const notification = new Notification({
-                  title: data.title || "Görüşme Hatırlatması",
-                  body: data.body || "",
-                  icon: iconPath,
-                  actions: [{ type: "button", text: "Tamamlandı Olarak İşaretle" }],
-                })
-                notification.on("action", (event, index) => {
-                  if (index === 0) {
-                    sendCommandToPython({ action: "mark_meeting_complete", data: { noteDate: data.noteDate, meetingId: data.meetingId } })
-                  }
-                })
-                notification.show()
-              }
-            } else if (win && !win.isDestroyed() && channel) {
-              if (type === "product_found" && context) {
-                sendToRenderer(channel, { product: data.product, context: context })
-              } else {
-                sendToRenderer(channel, data)
-              }
-            }
-          }
-        } catch (error) {
-          console.error("Python'dan gelen JSON parse edilemedi:", completeJsonString, error)
-        }
+  pythonFraming = FRAMING_JSON
+  const reader = createMessageReader(
+    (message) => {
+      try {
+        handlePythonMessage(message)
+      } catch (error) {
+        console.error("Python mesajı işlenemedi:", message && message.type, error)
+      }
+    },
+    (mode) => {
+      console.log(`Python IPC çerçevelemesi: ${mode}`)
+      if (mode === FRAMING_MSGPACK && pythonProcess && pythonProcess.stdin && !pythonProcess.stdin.destroyed) {
+        // Onay son JSON satırıdır; sonraki komutlar çerçeve olarak yazılır.
+        pythonProcess.stdin.write(`${JSON.stringify({ action: ACK_ACTION, data: { mode } })}\n`)
+        pythonFraming = mode
       }
-      boundary = buffer.indexOf("\n")
+    },
+    (error, raw) => console.error("Python'dan gelen mesaj çözülemedi:", raw, error),
+  )
+  pythonProcess.stdout.on("data", (data) => {
+    try {
+      reader.push(data)
+    } catch (error) {
+      console.error("Python IPC akışı bozuldu:", error)
     }
   })
   pythonProcess.on("close", (code) => {
@@ -229,6 +248,7 @@ function startPythonService() {
       }
     }
     pythonProcess = null
+    pythonFraming = FRAMING_JSON
   })
   flushPendingPythonCommands()
 }
@@ -263,7 +283,7 @@ function ensureBundledPythonDeps(pythonCmd) {
     { module: "docx", package: "python-docx==1.2.0" },
     { module: "chardet", package: "chardet==5.2.0" },
     { module: "dotenv", package: "python-dotenv>=1.0.0" },
-    { module: "thefuzz", package: "thefuzz==0.22.1" },
+    { module: "rapidfuzz", package: "RapidFuzz==3.14.0" },
     { module: "googletrans", package: "googletrans==4.0.2" },
     { module: "langdetect", package: "langdetect==1.0.9" },
     { module: "requests", package: "requests>=2.31.0" },
@@ -273,6 +293,10 @@ function ensureBundledPythonDeps(pythonCmd) {
     { module: "openai", package: "openai==1.106.1" },
     { module: "playwright", package: "playwright==1.58.0" },
     { module: "sqlalchemy", package: "SQLAlchemy==2.0.43" },
+    { module: "aiohttp", package: "aiohttp>=3.9,<4" },
+    { module: "numpy", package: "numpy>=1.26,<3" },
+    { module: "orjson", package: "orjson>=3.9,<4" },
+    { module: "msgpack", package: "msgpack>=1.0,<2" },
   ]
 
   const missingDeps = getMissingPythonDeps(pythonCmd, runtimeDeps)
@@ -429,8 +453,7 @@ app.on("window-all-closed", () => { if (process.platform !== "darwin") { } })
 
 function sendCommandToPython(command) {
   if (pythonProcess && pythonProcess.stdin && !pythonProcess.stdin.destroyed) {
-    const commandString = JSON.stringify(command)
-    pythonProcess.stdin.write(`${commandString}\n`)
+    pythonProcess.stdin.write(encodeCommand(command, pythonFraming))
   } else {
     if (command?.action !== "shutdown") {
       pendingPythonCommands.push(command)
@@ -468,6 +491,7 @@ ipcMain.on("show-notification", (event, { title, body }) => {
   }
 })
 ipcMain.on("get-orkim-stock", (event, productUrl) => sendCommandToPython({ action: "get_orkim_stock", data: { url: productUrl } }))
+ipcMain.on("get-rate-limits", () => sendCommandToPython({ action: "get_rate_limits" }))
 ipcMain.on('check-for-updates', () => { autoUpdater.checkForUpdates(); });
 
 ipcMain.on('generate-pdf', async (event, { customerName, products }) => {
@@ -33,6 +33,7 @@ contextBridge.exposeInMainWorld("electronAPI", {
   getAppVersion: () => ipcRenderer.invoke("get-app-version"),
   checkForUpdates: () => ipcRenderer.send("check-for-updates"),
   getOrkimStock: (productUrl) => ipcRenderer.send("get-orkim-stock", productUrl),
+  getRateLimits: () => ipcRenderer.send("get-rate-limits"),
 
   // --- Dinleyiciler (Main -> Renderer) ---
   onPythonReady: createListener("services-ready"), // Python'un hazır olduğunu bildirir
@@ -40,6 +41,7 @@ contextBridge.exposeInMainWorld("electronAPI", {
   onInitialSetupRequired: createListener("initial-setup-required"),
   onProductFound: createListener("search-product-found"),
   onSearchComplete: createListener("search-complete"),
+  onSearchProfile: createListener("search-profile"),
   onExportResult: createListener("export-result"),
   onGeneratePdfResult: createListener("generate-pdf-result"),
   onSearchError: createListener("search-error"),
@@ -61,4 +63,5 @@ contextBridge.exposeInMainWorld("electronAPI", {
   onUpdateError: createListener("update-error"),
   onNewSettingsAvailable: createListener("new-settings-available"),
   onOrkimStockResult: createListener("orkim-stock-result"),
+  onRateLimits: createListener("rate-limits"),
 })
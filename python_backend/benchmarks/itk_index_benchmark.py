@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+ITK İndeks Kıyaslaması
+======================
+Sentetik ITK önbellekleri üzerinde eski doğrusal tarama ile ItkSearchIndex
+sorgu sürelerini karşılaştırır.
+
+Kullanım:
+    python -m python_backend.benchmarks.itk_index_benchmark --sizes 1000 5000 20000 50000
+"""
+
+import argparse
+import random
+import statistics
+import string
+import time
+
+from rapidfuzz import fuzz
+
+try:
+    from services.itk_index import ItkSearchIndex
+except ImportError:
+    from python_backend.services.itk_index import ItkSearchIndex
+
+
+_WORDS = [
+    "acid", "chloride", "sodium", "potassium", "acetate", "benzene", "methyl", "ethyl",
+    "hydroxide", "sulfate", "nitrate", "phosphate", "amine", "bromide", "toluene",
+    "propanol", "butyl", "carbonate", "oxide", "glycol", "solution", "anhydrous", "standard",
+]
+
+
+def _random_product(rng: random.Random) -> dict:
+    code = rng.choice(string.ascii_uppercase) + "".join(rng.choices(string.digits, k=rng.randint(4, 7)))
+    name = " ".join(rng.choices(_WORDS, k=rng.randint(2, 5)))
+    return {"product_code": code, "product_name": name}
+
+
+def _linear_scan(products, terms, search_logic):
+    """Önceki itk_task davranışı: her ürün ve her terim için ayrı partial_ratio çağrısı."""
+    found = []
+    for product in products:
+        code = product.get("product_code", "").lower()
+        name = product.get("product_name", "").lower()
+        for term in terms:
+            term = term.lower()
+            if search_logic == "exact":
+                matched = term == name or term in code
+            else:
+                matched = round(fuzz.partial_ratio(term, code)) > 85 or round(fuzz.partial_ratio(term, name)) > 85
+            if matched:
+                found.append(product)
+                break
+    return found
+
+
+def _time_queries(func, queries, repeat):
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            func(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def run(sizes, query_count, repeat, search_logic, seed):
+    rng = random.Random(seed)
+    print(f"{'ürün':>8} {'kurulum ms':>11} {'doğrusal p50':>13} {'indeks p50':>11} {'indeks max':>11} {'hız':>7}")
+    for size in sizes:
+        products = [_random_product(rng) for _ in range(size)]
+        queries = []
+        for _ in range(query_count):
+            sample = rng.choice(products)
+            queries.append([rng.choice([sample["product_name"], sample["product_code"], " ".join(rng.choices(_WORDS, k=2))])])
+
+        start = time.perf_counter()
+        index = ItkSearchIndex(products)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        linear_p50, _ = _time_queries(lambda q: _linear_scan(products, q, search_logic), queries, 1)
+        index_p50, index_max = _time_queries(lambda q: index.search(q, search_logic), queries, repeat)
+        print(f"{size:>8} {build_ms:>11.1f} {linear_p50:>13.2f} {index_p50:>11.2f} {index_max:>11.2f} {linear_p50 / max(index_p50, 1e-6):>6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ITK indeks sorgu gecikmesi kıyaslaması")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000, 50000])
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--logic", choices=["similar", "exact"], default="similar")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    run(args.sizes, args.queries, args.repeat, args.logic, args.seed)
+
+
+if __name__ == "__main__":
+    main()
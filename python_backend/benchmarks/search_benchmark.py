@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+"""
+Çevrimdışı Arama Kıyaslaması
+============================
+Gerçek tedarikçi yanıtlarını (Sigma GraphQL, Netflex JSON, Orkim/ITK HTML, TCI
+sonuç sayfaları) bir kez kaydeder, sonra ağ olmadan yerel bir HTTP sunucusundan
+geri oynatarak ComparisonEngine.search_and_compare ve run_batch_search'ü ölçer.
+Kaynak başına verim, p50/p95 gecikme ve tepe bellek raporlanır; sonuçlar JSON
+olarak kaydedilip sonraki çalıştırmalarda gerileme kontrolü için kullanılabilir.
+
+TCI için tarayıcı (CDP) yolu geri oynatılmaz: kayıt sırasında tarayıcıyla açılan
+sonuç sayfalarının DOM'u HTML olarak saklanır ve geri oynatmada TciScraper
+yalnızca HTTP yoluyla (start_http_only) çalışır.
+
+Kullanım:
+    # Gerçek hesaplarla kayıt (uygulamanın veri klasöründeki settings.json kullanılır)
+    python -m python_backend.benchmarks.search_benchmark record --data-dir <veri klasörü> --fixtures bench_fixtures --terms-file terimler.txt
+    # Ağsız ölçüm
+    python -m python_backend.benchmarks.search_benchmark replay --fixtures bench_fixtures --repeat 3 --json sonuc.json
+    # Gerileme kontrolü (p95 %20'den fazla kötüleşirse çıkış kodu 1)
+    python -m python_backend.benchmarks.search_benchmark replay --fixtures bench_fixtures --baseline sonuc.json --tolerance 0.2
+"""
+
+import argparse
+import csv
+import importlib
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+import requests
+
+try:
+    from benchmarks.supplier_fixtures import FixtureRecorder, FixtureReplayer, FixtureServer, FixtureStore, make_entry
+except ImportError:
+    from python_backend.benchmarks.supplier_fixtures import FixtureRecorder, FixtureReplayer, FixtureServer, FixtureStore, make_entry
+
+
+SOURCES = ("sigma", "tci", "orkim", "itk", "netflex")
+BENCHMARK_SETTINGS = {"search_cache_enabled": False, "profiling_enabled": False}
+REPLAY_CREDENTIAL = "benchmark"
+
+
+def _load_backend(data_dir: Path):
+    """main.py veri klasörünü sys.argv[1]'den okur; bu yüzden içe aktarmadan önce ayarlanır."""
+    sys.argv = [sys.argv[0], str(data_dir)]
+    try:
+        backend = importlib.import_module("main")
+    except ImportError:
+        backend = importlib.import_module("python_backend.main")
+    # Çeviri harici bir servise gider ve kayıt/geri oynatma arasında değişebilir.
+    backend.term_translator.translate_terms = lambda terms: {term: term for term in terms}
+    return backend
+
+
+class _FrontendCollector:
+    """send_to_frontend yerine geçer; stdout'a yazmadan mesajları sayar."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.products = 0
+
+    def __call__(self, message_type, data, context=None):
+        if message_type == "product_found":
+            with self._lock: self.products += 1
+
+    def take(self) -> int:
+        with self._lock:
+            products, self.products = self.products, 0
+        return products
+
+
+def _install_itk_index(backend, itk_api):
+    products = itk_api.get_all_products() or []
+    search_index = backend.itk_index.ItkSearchIndex(products)
+    with backend.itk_cache_lock:
+        backend.itk_product_cache = products
+        backend.itk_search_index = search_index
+
+
+def _record_tci_dom(backend, store: FixtureStore):
+    """Tarayıcıyla yüklenen TCI sayfalarının DOM'unu aynı URL için HTTP yanıtı olarak saklar."""
+    scraper_cls = backend.tci.TciScraper
+    original = scraper_cls.__dict__["_load_results_page"]
+
+    def load_results_page(cls, worker, url):
+        start_time = time.perf_counter()
+        page_data = original.__func__(cls, worker, url)
+        if page_data.get("cards") or page_data.get("noResults"):
+            content = worker.page.content().encode("utf-8")
+            store.add(make_entry("GET", url, None, 200, {"content-type": "text/html; charset=utf-8"}, content, (time.perf_counter() - start_time) * 1000), replace=True)
+        return page_data
+
+    scraper_cls._load_results_page = classmethod(load_results_page)
+    return lambda: setattr(scraper_cls, "_load_results_page", original)
+
+
+def _build_live_engine(backend, settings):
+    obscura = backend.ObscuraManager(binary_path=os.getenv("OBSCURA_BINARY_PATH"), port=9222, workers=4, stealth=True)
+    if not obscura.start():
+        raise RuntimeError("Obscura CDP sunucusu başlatılamadı.")
+    cdp_endpoint = obscura.get_cdp_endpoint()
+    orkim_api = backend.orkim.OrkimScraper(username=settings.get("orkim_username"), password=settings.get("orkim_password"), openai_api_key=os.getenv("OCR_API_KEY"), max_concurrency=settings.get("orkim_max_concurrency", 4))
+    if not orkim_api._login():
+        logging.warning("Orkim girişi başarısız; Orkim kayıtları eksik olabilir.")
+    netflex_api = backend.netflex.NetflexAPI(username=settings.get("netflex_username"), password=settings.get("netflex_password"))
+    itk_api = backend.itk.ItkScraper(username=settings.get("itk_username"), password=settings.get("itk_password"))
+    engine = backend.ComparisonEngine(backend.sigma.SigmaAldrichAPI(cdp_endpoint=cdp_endpoint), netflex_api, backend.tci.TciScraper(cdp_endpoint=cdp_endpoint), orkim_api, itk_api, initial_settings=settings)
+    engine.initialize_drivers()
+    _install_itk_index(backend, itk_api)
+    return engine, obscura
+
+
+def _build_replay_engine(backend, settings, sigma_countries):
+    sigma_api = backend.sigma.SigmaAldrichAPI()
+    for country_code in sigma_countries:
+        session = requests.Session()
+        session.mount('https://', sigma_api.adapter)
+        session.headers.update({"Content-Type": "application/json", "x-gql-country": country_code.upper(), "x-gql-language": "en"})
+        sigma_api.sessions[country_code] = session
+    tci_api = backend.tci.TciScraper()
+    tci_api.start_http_only()
+    orkim_api = backend.orkim.OrkimScraper(username=REPLAY_CREDENTIAL, password=REPLAY_CREDENTIAL, openai_api_key=None, max_concurrency=settings.get("orkim_max_concurrency", 4))
+    orkim_api.is_logged_in = True
+    netflex_api = backend.netflex.NetflexAPI(username=REPLAY_CREDENTIAL, password=REPLAY_CREDENTIAL)
+    itk_api = backend.itk.ItkScraper(username=REPLAY_CREDENTIAL, password=REPLAY_CREDENTIAL)
+    _install_itk_index(backend, itk_api)
+    return backend.ComparisonEngine(sigma_api, netflex_api, tci_api, orkim_api, itk_api, initial_settings=settings)
+
+
+def _shutdown_engine(engine, obscura=None):
+    for close in (engine.sigma_api.stop_drivers, engine.tci_api.close_driver, engine.orkim_api.close_driver):
+        try:
+            close()
+        except Exception as e:
+            logging.warning(f"Kıyaslama kapanışında hata: {e}")
+    if obscura: obscura.stop()
+
+
+def _write_terms_csv(terms, directory: Path) -> Path:
+    path = Path(directory) / "batch_terms.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name"])
+        writer.writerows([term] for term in terms)
+    return path
+
+
+def _search(engine, term, logic, sources):
+    engine.search_and_compare({"searchTerm": term, "searchLogic": logic, "enabledBrands": list(sources)}, cancel_event=threading.Event())
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _measure(engine, collector, terms, logic, sources, repeat, trace_memory):
+    latencies = []
+    products = 0
+    collector.take()
+    if trace_memory:
+        tracemalloc.start()
+    wall_start = time.perf_counter()
+    for _ in range(repeat):
+        for term in terms:
+            start = time.perf_counter()
+            _search(engine, term, logic, sources)
+            latencies.append((time.perf_counter() - start) * 1000)
+            products += collector.take()
+    wall = time.perf_counter() - wall_start
+    peak_mb = None
+    if trace_memory:
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return {
+        "searches": len(latencies), "products": products, "wall_s": round(wall, 3),
+        "searches_per_s": round(len(latencies) / wall, 2) if wall else None,
+        "p50_ms": round(statistics.median(latencies), 1), "p95_ms": round(_percentile(latencies, 0.95), 1),
+        "max_ms": round(max(latencies), 1), "peak_mb": round(peak_mb, 1) if peak_mb is not None else None,
+    }
+
+
+def _measure_batch(engine, collector, terms, work_dir, concurrency, trace_memory):
+    engine.settings = dict(engine.settings, batch_search_concurrency=concurrency)
+    csv_path = _write_terms_csv(terms, work_dir)
+    collector.take()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    engine.run_batch_search(str(csv_path), "benchmark")
+    wall = time.perf_counter() - start
+    peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+    return {
+        "terms": len(terms), "concurrency": concurrency, "products": collector.take(), "wall_s": round(wall, 3),
+        "terms_per_s": round(len(terms) / wall, 2) if wall else None, "peak_mb": round(peak_mb, 1) if peak_mb is not None else None,
+    }
+
+
+def _read_terms(args):
+    terms = list(args.terms or [])
+    if args.terms_file:
+        with open(args.terms_file, "r", encoding="utf-8") as f:
+            terms.extend(line.strip() for line in f if line.strip())
+    if not terms:
+        raise SystemExit("En az bir arama terimi gerekli (--terms veya --terms-file).")
+    return terms
+
+
+def record(args):
+    terms = _read_terms(args)
+    backend = _load_backend(Path(args.data_dir))
+    collector = _FrontendCollector()
+    backend.send_to_frontend = collector
+    settings, _ = backend.load_settings()
+    settings = dict(settings, **BENCHMARK_SETTINGS)
+    store = FixtureStore(Path(args.fixtures))
+    restore_tci = _record_tci_dom(backend, store)
+    sigma_countries = []
+    try:
+        with FixtureRecorder(store):
+            engine, obscura = _build_live_engine(backend, settings)
+            try:
+                sigma_countries = sorted(engine.sigma_api.sessions.keys())
+                # Geri oynatmada yapılacak iş yükü aynen kaydedilir: kaynak bazlı ve birlikte aramalar, ardından toplu arama.
+                for term in terms:
+                    for sources in [(source,) for source in SOURCES] + [SOURCES]:
+                        _search(engine, term, args.logic, sources)
+                with tempfile.TemporaryDirectory() as work_dir:
+                    engine.settings = dict(engine.settings, batch_search_concurrency=args.batch_concurrency)
+                    engine.run_batch_search(str(_write_terms_csv(terms, Path(work_dir))), "benchmark")
+            finally:
+                _shutdown_engine(engine, obscura)
+    finally:
+        restore_tci()
+    store.save({"terms": terms, "logic": args.logic, "sigma_countries": sigma_countries, "settings": {k: v for k, v in settings.items() if "password" not in k and "username" not in k}})
+
+
+def _print_report(report):
+    print(f"{'kaynak':<8} {'arama':>6} {'ürün':>6} {'arama/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'tepe MB':>8}")
+    for name, row in report["sources"].items():
+        print(f"{name:<8} {row['searches']:>6} {row['products']:>6} {row['searches_per_s'] or 0:>8.2f} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['max_ms']:>9.1f} {row['peak_mb'] if row['peak_mb'] is not None else '-':>8}")
+    batch = report.get("batch")
+    if batch:
+        print(f"toplu arama: {batch['terms']} terim, eşzamanlılık {batch['concurrency']}, {batch['products']} ürün, {batch['wall_s']:.2f}s ({batch['terms_per_s'] or 0:.2f} terim/s), tepe {batch['peak_mb'] if batch['peak_mb'] is not None else '-'} MB")
+    fixtures = report["fixtures"]
+    print(f"fixture: {fixtures['hits']} tam, {fixtures['loose_hits']} gövdesiz eşleşme, {fixtures['misses']} eksik")
+
+
+def _check_regressions(report, baseline, tolerance):
+    regressions = []
+    for name, row in report["sources"].items():
+        previous = baseline.get("sources", {}).get(name)
+        if not previous: continue
+        for metric in ("p50_ms", "p95_ms", "peak_mb"):
+            old, new = previous.get(metric), row.get(metric)
+            if old and new is not None and new > old * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {old} -> {new}")
+    old_batch, new_batch = baseline.get("batch") or {}, report.get("batch") or {}
+    if old_batch.get("wall_s") and new_batch.get("wall_s") and new_batch["wall_s"] > old_batch["wall_s"] * (1 + tolerance):
+        regressions.append(f"batch.wall_s: {old_batch['wall_s']} -> {new_batch['wall_s']}")
+    return regressions
+
+
+def replay(args):
+    store = FixtureStore(Path(args.fixtures))
+    manifest = store.load()
+    terms = manifest["terms"]
+    server = FixtureServer(store.entries, latency_scale=args.latency_scale)
+    server_url = server.start()
+    work_dir = tempfile.TemporaryDirectory()
+    try:
+        with FixtureReplayer(server_url):
+            backend = _load_backend(Path(work_dir.name))
+            collector = _FrontendCollector()
+            backend.send_to_frontend = collector
+            settings, _ = backend.load_settings()
+            settings = dict(settings, **manifest.get("settings", {}), **BENCHMARK_SETTINGS)
+            engine = _build_replay_engine(backend, settings, manifest.get("sigma_countries") or ["us", "de", "gb"])
+            try:
+                report = {"fixtures": {}, "sources": {}, "latency_scale": args.latency_scale, "repeat": args.repeat}
+                for name, sources in [(source, (source,)) for source in SOURCES] + [("hepsi", SOURCES)]:
+                    # Gecikme tracemalloc olmadan ölçülür; bellek ayrı bir tek turda izlenir.
+                    row = _measure(engine, collector, terms, manifest["logic"], sources, args.repeat, trace_memory=False)
+                    if not args.no_memory:
+                        row["peak_mb"] = _measure(engine, collector, terms, manifest["logic"], sources, 1, trace_memory=True)["peak_mb"]
+                    report["sources"][name] = row
+                if not args.no_batch:
+                    report["batch"] = _measure_batch(engine, collector, terms, Path(work_dir.name), args.batch_concurrency, trace_memory=not args.no_memory)
+            finally:
+                _shutdown_engine(engine)
+    finally:
+        server.stop()
+    report["fixtures"] = {"hits": server.hits, "loose_hits": server.loose_hits, "misses": len(server.misses)}
+    if server.misses:
+        logging.warning(f"Kayıtta bulunmayan {len(server.misses)} istek (ilk 5): {server.misses[:5]}")
+    _print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = _check_regressions(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"GERİLEME {regression}")
+        exit_code = 1 if regressions else 0
+    try:
+        work_dir.cleanup()
+    except OSError:
+        pass
+    return exit_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kayıtlı tedarikçi yanıtlarıyla çevrimdışı arama kıyaslaması")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record", help="Gerçek tedarikçi yanıtlarını kaydet")
+    record_parser.add_argument("--data-dir", required=True, help="settings.json'un bulunduğu uygulama veri klasörü")
+    record_parser.add_argument("--fixtures", required=True)
+    record_parser.add_argument("--terms", nargs="*")
+    record_parser.add_argument("--terms-file")
+    record_parser.add_argument("--logic", choices=["similar", "exact"], default="similar")
+    record_parser.add_argument("--batch-concurrency", type=int, default=4)
+    replay_parser = subparsers.add_parser("replay", help="Kayıtları ağ olmadan geri oynat ve ölç")
+    replay_parser.add_argument("--fixtures", required=True)
+    replay_parser.add_argument("--repeat", type=int, default=3)
+    replay_parser.add_argument("--latency-scale", type=float, default=0.0, help="Kayıttaki yanıt sürelerinin çarpanı (0: gecikmesiz)")
+    replay_parser.add_argument("--batch-concurrency", type=int, default=4)
+    replay_parser.add_argument("--no-batch", action="store_true")
+    replay_parser.add_argument("--no-memory", action="store_true", help="tracemalloc ile tepe bellek ölçümünü atla")
+    replay_parser.add_argument("--json", help="Raporu JSON olarak kaydet")
+    replay_parser.add_argument("--baseline", help="Karşılaştırılacak önceki JSON raporu")
+    replay_parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args)
+        return 0
+    return replay(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+Tedarikçi Yanıt Kayıtları
+=========================
+Tedarikçi sitelerine giden HTTP isteklerini requests'in HTTPAdapter.send ve
+tedarikçi G/Ç çekirdeğinin (aiohttp) SupplierIO._send katmanlarında yakalar ve fixture dosyasına yazar (FixtureRecorder). Kayıtlar, yerel bir HTTP
+sunucusu (FixtureServer) üzerinden aynı katmanda yönlendirilerek ağ olmadan geri
+oynatılır (FixtureReplayer); servis kodu değiştirilmeden gerçek soket/HTTP yolu
+ölçülür.
+
+Eşleme anahtarı: yöntem + şema + host + yol + sıralı sorgu (önbellek kırıcı "_"
+parametresi hariç) + istek gövdesinin sha1'i. Gövdesi farklı bir istek (ör. kimlik
+bilgileri içeren giriş istekleri) için gövdesiz anahtara geri düşülür. Aynı anahtar
+için birden fazla kayıt varsa kayıt sırasıyla döngüsel olarak verilir.
+
+İstek gövdeleri ve cookie'ler saklanmaz; yanıt gövdeleri bayi fiyatları
+içerebileceğinden fixture klasörü depoya eklenmemelidir.
+"""
+
+import base64
+import gzip
+from abc import ABC, abstractmethod
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from requests.adapters import HTTPAdapter
+
+try:
+    from services.supplier_io import SupplierIO
+except ImportError:
+    from python_backend.services.supplier_io import SupplierIO
+
+
+SUPPLIER_HOSTS = (
+    "www.sigmaaldrich.com",
+    "www.tcichemicals.com",
+    "netflex-api.interlab.com.tr",
+    "www.orkimmarket.com",
+    "www.teknikkimya.com.tr",
+    "www.tcmb.gov.tr",
+)
+RESPONSES_FILE = "responses.jsonl.gz"
+MANIFEST_FILE = "manifest.json"
+VOLATILE_QUERY_PARAMS = {"_"}
+KEPT_RESPONSE_HEADERS = ("content-type", "location", "etag", "last-modified")
+ORIGIN_HEADER = "X-Fixture-Origin"
+
+
+def _body_bytes(body) -> bytes:
+    if body is None: return b""
+    if isinstance(body, str): return body.encode("utf-8")
+    if isinstance(body, (bytes, bytearray)): return bytes(body)
+    return b""
+
+
+def request_keys(method: str, url: str, body) -> tuple:
+    """(gövdeli anahtar, gövdesiz anahtar) çiftini döndürür."""
+    parts = urlsplit(url)
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in VOLATILE_QUERY_PARAMS))
+    loose = f"{method.upper()} {parts.scheme}://{parts.netloc}{parts.path or '/'}?{query}"
+    return f"{loose}#{hashlib.sha1(_body_bytes(body)).hexdigest()}", loose
+
+
+class FixtureStore:
+    """Kayıtları gzip'li JSON Lines dosyasında tutar."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._entries: List[Dict[str, Any]] = []
+
+    def add(self, entry: Dict[str, Any], replace: bool = False):
+        """replace=True ise aynı anahtarlı önceki kayıtlar silinir (ör. bot doğrulaması yerine tarayıcı DOM'u)."""
+        with self._lock:
+            if replace:
+                self._entries = [e for e in self._entries if e["key"] != entry["key"]]
+            self._entries.append(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def save(self, manifest: Dict[str, Any]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            entries = list(self._entries)
+        with gzip.open(self.directory / RESPONSES_FILE, "wt", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        manifest = dict(manifest, recorded_at=datetime.now().isoformat(timespec="seconds"), responses=len(entries))
+        with open(self.directory / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        logging.info(f"{len(entries)} tedarikçi yanıtı kaydedildi: {self.directory}")
+
+    def load(self) -> Dict[str, Any]:
+        with open(self.directory / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        with gzip.open(self.directory / RESPONSES_FILE, "rt", encoding="utf-8") as f:
+            self._entries = [json.loads(line) for line in f if line.strip()]
+        return manifest
+
+    @property
+    def entries(self) -> List[Dict[str, Any]]:
+        return self._entries
+
+
+def make_entry(method: str, url: str, body, status: int, headers, content: bytes, elapsed_ms: float) -> Dict[str, Any]:
+    key, loose_key = request_keys(method, url, body)
+    return {
+        "key": key, "loose_key": loose_key, "method": method.upper(), "url": url, "status": status,
+        "headers": {name: headers[name] for name in KEPT_RESPONSE_HEADERS if headers.get(name)},
+        "elapsed_ms": round(elapsed_ms, 1), "body": base64.b64encode(content).decode("ascii"),
+    }
+
+
+class _AdapterPatch(ABC):
+    """HTTPAdapter.send ve SupplierIO._send'i geçici olarak değiştirir; yalnızca tedarikçi host'larına giden istekler etkilenir.
+    Alt sınıflar _handle ve _handle_async'i tanımlar; taban sınıf doğrudan örneklenemez."""
+
+    def __init__(self, hosts: Iterable[str]):
+        self.hosts = set(hosts)
+        self._original_send = None
+        self._original_async_send = None
+
+    @abstractmethod
+    def _handle(self, original_send, adapter, request, **kwargs):
+        """Tedarikçi host'una giden senkron isteği işler."""
+
+    @abstractmethod
+    async def _handle_async(self, original_send, io, session, prepared, *args):
+        """Tedarikçi host'una giden asenkron isteği işler."""
+
+    def __enter__(self):
+        self._original_send = original_send = HTTPAdapter.send
+        self._original_async_send = original_async_send = SupplierIO._send
+        patch = self
+
+        def send(adapter, request, **kwargs):
+            if urlsplit(request.url).hostname not in patch.hosts:
+                return original_send(adapter, request, **kwargs)
+            return patch._handle(original_send, adapter, request, **kwargs)
+
+        async def async_send(io, session, prepared, *args):
+            if urlsplit(prepared.url).hostname not in patch.hosts:
+                return await original_async_send(io, session, prepared, *args)
+            return await patch._handle_async(original_async_send, io, session, prepared, *args)
+
+        HTTPAdapter.send = send
+        SupplierIO._send = async_send
+        return self
+
+    def __exit__(self, *exc_info):
+        HTTPAdapter.send = self._original_send
+        SupplierIO._send = self._original_async_send
+        return False
+
+
+class FixtureRecorder(_AdapterPatch):
+    def __init__(self, store: FixtureStore, hosts: Iterable[str] = SUPPLIER_HOSTS):
+        super().__init__(hosts)
+        self.store = store
+
+    def _handle(self, original_send, adapter, request, **kwargs):
+        response = original_send(adapter, request, **kwargs)
+        # Gövde burada okunur ve response._content içinde kalır; çağıran kod aynı içeriği görür.
+        content = response.content or b""
+        self.store.add(make_entry(request.method, request.url, request.body, response.status_code, response.headers, content, response.elapsed.total_seconds() * 1000))
+        return response
+
+    async def _handle_async(self, original_send, io, session, prepared, *args):
+        start = time.perf_counter()
+        response = await original_send(io, session, prepared, *args)
+        self.store.add(make_entry(prepared.method, prepared.url, prepared.body, response.status_code, response.headers, response.content, (time.perf_counter() - start) * 1000))
+        return response
+
+
+class FixtureServer:
+    """Kayıtları yerel bir ThreadingHTTPServer üzerinden sunar; gecikme kayıttaki süre x latency_scale kadardır."""
+
+    def __init__(self, entries: List[Dict[str, Any]], latency_scale: float = 0.0):
+        self.latency_scale = max(0.0, latency_scale)
+        self._by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_loose_key: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            self._by_key.setdefault(entry["key"], []).append(entry)
+            self._by_loose_key.setdefault(entry["loose_key"], []).append(entry)
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loose_hits = 0
+        self.misses: List[str] = []
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _next(self, key: str, candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with self._lock:
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+        return candidates[cursor % len(candidates)]
+
+    def lookup(self, method: str, url: str, body: bytes) -> Optional[Dict[str, Any]]:
+        key, loose_key = request_keys(method, url, body)
+        if key in self._by_key:
+            with self._lock: self.hits += 1
+            return self._next(key, self._by_key[key])
+        if loose_key in self._by_loose_key:
+            with self._lock: self.loose_hits += 1
+            return self._next(loose_key, self._by_loose_key[loose_key])
+        with self._lock: self.misses.append(loose_key)
+        return None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                url = f"{self.headers.get(ORIGIN_HEADER, '')}{self.path}"
+                entry = server.lookup(self.command, url, body)
+                if entry is None:
+                    content, status, headers, delay = b"fixture not found", 404, {"content-type": "text/plain"}, 0.0
+                else:
+                    content, status, headers = base64.b64decode(entry["body"]), entry["status"], entry["headers"]
+                    delay = entry["elapsed_ms"] / 1000 * server.latency_scale
+                if delay: time.sleep(delay)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_HEAD = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> str:
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="Fixture-Server", daemon=True)
+        self._thread.start()
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class FixtureReplayer(_AdapterPatch):
+    """Tedarikçi isteklerini FixtureServer'a yönlendirir; yanıt ve istek nesneleri orijinal URL'yi taşımaya devam eder."""
+
+    def __init__(self, server_url: str, hosts: Iterable[str] = SUPPLIER_HOSTS):
+        super().__init__(hosts)
+        self.server_url = server_url
+
+    def _route(self, request):
+        parts = urlsplit(request.url)
+        routed = request.copy()
+        routed.url = f"{self.server_url}{parts.path or '/'}" + (f"?{parts.query}" if parts.query else "")
+        routed.headers[ORIGIN_HEADER] = f"{parts.scheme}://{parts.netloc}"
+        return routed
+
+    async def _handle_async(self, original_send, io, session, prepared, *args):
+        response = await original_send(io, session, self._route(prepared), *args)
+        response.request = prepared
+        response.url = prepared.url
+        return response
+
+    def _handle(self, original_send, adapter, request, **kwargs):
+        routed = self._route(request)
+        kwargs["proxies"] = {}
+        response = original_send(adapter, routed, **kwargs)
+        # Yönlendirmeler ve urljoin çağrıları orijinal adres üzerinden çözülsün.
+        response.request = request
+        response.url = request.url
+        return response
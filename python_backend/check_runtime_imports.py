@@ -5,11 +5,16 @@ from __future__ import annotations
 
 import ast
 import importlib
+import json
+import os
+import subprocess
 import sys
+from collections import Counter
 from pathlib import Path
 
 
 REQUIRED_IMPORTS = [
+    "aiohttp",
     "bs4",
     "chardet",
     "docx",
@@ -17,27 +22,111 @@ REQUIRED_IMPORTS = [
     "googletrans",
     "langdetect",
     "lxml",
+    "msgpack",
+    "numpy",
     "openai",
     "openpyxl",
+    "orjson",
     "PIL",
     "playwright",
+    "rapidfuzz",
     "requests",
     "sqlalchemy",
-    "thefuzz",
 ]
 
+# Heavy modules main.py must import lazily, on first use, rather than at startup.
+DEFERRED_IMPORTS = [
+    "chardet",
+    "docx",
+    "googletrans",
+    "langdetect",
+    "openai",
+    "openpyxl",
+    "PIL",
+    "playwright",
+    "rapidfuzz",
+]
+
+STARTUP_MODULE = "python_backend.main"
+STARTUP_IMPORT_BUDGET_MS = 1500
+IMPORT_BUDGET_ENV = "NPC_IMPORT_BUDGET_MS"
+IMPORT_REPORT_LIMIT = 15
+
 BACKEND_MODULES = [
     "python_backend.main",
+    "python_backend.database.db_manager",
     "python_backend.services.currency_converter",
+    "python_backend.services.excel_export",
+    "python_backend.services.price_parser",
+    "python_backend.services.pricing",
     "python_backend.services.itk",
+    "python_backend.services.itk_index",
+    "python_backend.services.itk_snapshot",
+    "python_backend.services.ipc_protocol",
+    "python_backend.services.ipc_writer",
     "python_backend.services.netflex",
     "python_backend.services.obscura_manager",
     "python_backend.services.orkim",
+    "python_backend.services.profiler",
+    "python_backend.services.rate_limiter",
+    "python_backend.services.sigma_cookie_jar",
     "python_backend.services.sigma_playwright",
+    "python_backend.services.single_flight",
+    "python_backend.services.source_scheduler",
+    "python_backend.services.supplier_io",
+    "python_backend.services.term_translator",
     "python_backend.services.tci_playwright",
 ]
 
 
+def import_costs(importtime_log: str) -> Counter:
+    """Sum the self import time (microseconds) of each top-level package in a -X importtime log."""
+    costs: Counter = Counter()
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        costs[fields[2].strip().split(".")[0]] += int(fields[0])
+    return costs
+
+
+def check_startup_imports(repo_root: Path) -> bool:
+    """Import the backend entry point in a fresh interpreter and enforce the startup import budget."""
+    budget_ms = float(os.getenv(IMPORT_BUDGET_ENV, STARTUP_IMPORT_BUDGET_MS))
+    probe = (
+        f"import json, sys; import {STARTUP_MODULE}; "
+        f"print(json.dumps([name for name in {DEFERRED_IMPORTS!r} if name in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=repo_root, capture_output=True, text=True, encoding="utf-8", errors="replace",
+    )
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        print(f"STARTUP FAIL {STARTUP_MODULE}: exit code {result.returncode}")
+        print("\n".join(errors[-20:]))
+        return False
+
+    costs = import_costs(result.stderr)
+    total_ms = sum(costs.values()) / 1000
+    for package, cost_us in costs.most_common(IMPORT_REPORT_LIMIT):
+        print(f"IMPORT TIME {cost_us / 1000:8.1f} ms {package}")
+
+    ok = True
+    loaded = json.loads(result.stdout.strip().splitlines()[-1]) if result.stdout.strip() else []
+    for name in loaded:
+        ok = False
+        print(f"STARTUP FAIL {name} is imported at startup; it must be imported on first use")
+    if total_ms > budget_ms:
+        ok = False
+        print(f"STARTUP FAIL import time {total_ms:.0f} ms exceeds budget of {budget_ms:.0f} ms")
+    else:
+        print(f"STARTUP OK import time {total_ms:.0f} ms (budget {budget_ms:.0f} ms)")
+    return ok
+
+
 def main() -> int:
     repo_root = Path(__file__).resolve().parents[1]
     if str(repo_root) not in sys.path:
@@ -70,6 +159,9 @@ def main() -> int:
             ok = False
             print(f"BACKEND FAIL {module_name}: {type(exc).__name__}: {exc}")
 
+    if not check_startup_imports(repo_root):
+        ok = False
+
     return 0 if ok else 1
 
 
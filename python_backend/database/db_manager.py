@@ -2,6 +2,7 @@ import logging
 import os
 import sys
 from pathlib import Path
+from datetime import datetime, timezone
 from sqlalchemy import create_engine, Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey
 from sqlalchemy.orm import sessionmaker, relationship, declarative_base
 from sqlalchemy.sql import func
@@ -116,6 +117,41 @@ def load_calendar_notes_from_db() -> list:
     finally:
         db.close()
 
+def get_product_cache_entry(cache_key: str):
+    """Önbellekteki arama sonucunu (sonuç listesi, UTC zaman damgası) olarak döndürür; yoksa None."""
+    db = SessionLocal()
+    try:
+        entry = db.query(ProductCache).filter(ProductCache.search_term == cache_key).first()
+        if not entry:
+            return None
+        timestamp = entry.timestamp.replace(tzinfo=None) if entry.timestamp else None
+        return json.loads(entry.results or "[]"), timestamp
+    except Exception as e:
+        logging.error(f"Ürün önbelleği okunurken hata ({cache_key}): {e}", exc_info=True)
+        return None
+    finally:
+        db.close()
+
+def save_product_cache_entry(cache_key: str, results: list):
+    """Arama sonucunu önbelleğe yazar; aynı anahtar varsa sonucu ve zaman damgasını günceller."""
+    db = SessionLocal()
+    try:
+        now_utc = datetime.now(timezone.utc).replace(tzinfo=None)
+        results_json = json.dumps(results, ensure_ascii=False)
+        entry = db.query(ProductCache).filter(ProductCache.search_term == cache_key).first()
+        if entry:
+            entry.results = results_json
+            entry.timestamp = now_utc
+        else:
+            db.add(ProductCache(search_term=cache_key, results=results_json, timestamp=now_utc))
+        db.commit()
+        logging.debug(f"Ürün önbelleği güncellendi: '{cache_key}' ({len(results)} sonuç)")
+    except Exception as e:
+        db.rollback()
+        logging.warning(f"Ürün önbelleğine yazılırken hata ({cache_key}): {e}")
+    finally:
+        db.close()
+
 # Diğer fonksiyonlar (ürün ekleme, müşteri ekleme vb.) buraya eklenecek.
 
 if __name__ == "__main__":
@@ -6,29 +6,48 @@ import json
 import logging
 import re
 import threading
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional, Set
 from pathlib import Path
-import openpyxl
-import docx
 import csv
-import chardet
 from dotenv import load_dotenv
-from thefuzz import fuzz
 import io
-from openpyxl.styles import Font, Alignment
-
-from googletrans import Translator
-from langdetect import detect, LangDetectException
 
+# openpyxl, python-docx ve chardet açılışı yavaşlattığından ilk kullanımda içe aktarılır (googletrans/langdetect: term_translator).
 try:
     from services import sigma_playwright as sigma, netflex, tci_playwright as tci, currency_converter, orkim, itk
     from services.obscura_manager import ObscuraManager
+    from services.source_scheduler import SourceScheduler
+    from services.profiler import profiler
+    from services.single_flight import single_flight
+    from services.supplier_io import supplier_io
+    from services.ipc_writer import frontend_writer
+    from services import ipc_protocol
+    from services import itk_index, itk_snapshot, price_parser, pricing
+    from services import term_translator as term_translation
+    from database import db_manager
 except ImportError:
     sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
     from python_backend.services import sigma_playwright as sigma, netflex, tci_playwright as tci, currency_converter, orkim, itk
     from python_backend.services.obscura_manager import ObscuraManager
+    from python_backend.services.source_scheduler import SourceScheduler
+    from python_backend.services.profiler import profiler
+    from python_backend.services.single_flight import single_flight
+    from python_backend.services.supplier_io import supplier_io
+    from python_backend.services.ipc_writer import frontend_writer
+    from python_backend.services import ipc_protocol
+    from python_backend.services import itk_index, itk_snapshot, price_parser, pricing
+    from python_backend.services import term_translator as term_translation
+    from python_backend.database import db_manager
+
+def _excel_export():
+    # openpyxl'i çeken dışa aktarma modülü ilk dışa aktarmada yüklenir; statik import PyInstaller'ın modülü paketlemesini sağlar.
+    try:
+        from services import excel_export
+    except ImportError:
+        from python_backend.services import excel_export
+    return excel_export
 
 def get_resource_path(relative_path: str) -> str:
     try:
@@ -49,6 +68,13 @@ LOGS_AND_SETTINGS_DIR = get_persistent_data_path()
 SETTINGS_FILE_PATH = LOGS_AND_SETTINGS_DIR / "settings.json"
 CALENDAR_NOTES_FILE_PATH = LOGS_AND_SETTINGS_DIR / "calendar_notes.json"
 NOTIFICATION_STATE_FILE = LOGS_AND_SETTINGS_DIR / "notification_state.json"
+ITK_SNAPSHOT_FILE_PATH = LOGS_AND_SETTINGS_DIR / "itk_catalogue.json"
+CURRENCY_SNAPSHOT_FILE_PATH = LOGS_AND_SETTINGS_DIR / "currency_rates.json"
+SIGMA_COOKIE_JAR_FILE_PATH = LOGS_AND_SETTINGS_DIR / "sigma_cookies.json"
+TRANSLATION_CACHE_FILE_PATH = LOGS_AND_SETTINGS_DIR / "term_translations.json"
+PROFILE_TRACES_DIR = LOGS_AND_SETTINGS_DIR / "traces"
+MAX_PROFILE_TRACE_FILES = 50
+HTML_TAG_PATTERN = re.compile('<.*?>')
 
 dotenv_path = get_resource_path('.env')
 load_dotenv(dotenv_path=dotenv_path)
@@ -56,14 +82,21 @@ load_dotenv(dotenv_path=dotenv_path)
 notification_thread = None
 notification_running = False
 itk_product_cache = []
+itk_search_index = None
 itk_cache_lock = threading.Lock()
+term_translator = term_translation.TermTranslator(TRANSLATION_CACHE_FILE_PATH)
+# ITK zaten bellekte arandığı için kalıcı arama önbelleğine yalnızca ağ üzerinden sorgulanan kaynaklar yazılır.
+CACHED_SEARCH_SOURCES = ("sigma", "tci", "orkim", "netflex")
 
 def load_settings() -> (Dict[str, Any], bool):
     default_settings = {
         "netflex_username": "", "netflex_password": "", "tci_coefficient": 1.4,
         "sigma_coefficient_us": 1.0, "sigma_coefficient_de": 1.0, "sigma_coefficient_gb": 1.0,
-        "orkim_username": "", "orkim_password": "",
+        "orkim_username": "", "orkim_password": "", "orkim_max_concurrency": 4,
         "itk_username": "", "itk_password": "", "itk_coefficient": 1.0,
+        "sigma_batch_pricing": True, "batch_search_concurrency": 4,
+        "search_cache_enabled": True, "search_cache_ttl_hours": 12, "search_cache_max_age_hours": 168,
+        "profiling_enabled": False,
     }
     LOGS_AND_SETTINGS_DIR.mkdir(exist_ok=True)
     if not SETTINGS_FILE_PATH.exists():
@@ -273,15 +306,11 @@ def setup_logging():
 admin_logger = setup_logging()
 
 def send_to_frontend(message_type: str, data: Any, context: Dict = None):
+    # Mesajlar tek bir yazıcı thread'inden partiler halinde yazılır; bkz. services/ipc_writer.
     try:
-        message_obj = {"type": message_type, "data": data}
-        if context: message_obj["context"] = context
-        json_string = json.dumps(message_obj, ensure_ascii=False) + '\n'
-        sys.stdout.buffer.write(json_string.encode('utf-8'))
-        sys.stdout.flush()
-    except (TypeError, OSError, BrokenPipeError) as e:
-        if not isinstance(e, BrokenPipeError):
-            logging.error(f"Frontend'e mesaj gönderilemedi: {e}")
+        frontend_writer.send(message_type, data, context)
+    except TypeError as e:
+        logging.error(f"Frontend'e mesaj gönderilemedi: {e}")
 
 def export_meetings_to_excel(data: Dict[str, Any]):
     notes = data.get("notes", [])
@@ -321,30 +350,7 @@ def export_meetings_to_excel(data: Dict[str, Any]):
     filename = f"Etkinlik_Raporu_{start_date_str}_-_{end_date_str}.xlsx"
     filepath = desktop_path / filename
     try:
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = "Etkinlik Listesi"
-        headers = ["FİRMA ADI", "YETKİLİSİ", "DEPARTMANI", "MAİL ADRESİ", "TELEFON", "ETKİNLİK TİPİ", "KAYIT TARİHİ", "ETKİNLİK TARİHİ", "AÇIKLAMA"]
-        sheet.append(headers)
-        for cell in sheet["1:1"]:
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-        for meeting in meetings_to_export:
-            formatted_meeting_date = meeting['actual_meeting_date'].strftime('%d.%m.%Y')
-            formatted_note_date = meeting['note_date'].strftime('%d.%m.%Y') if 'note_date' in meeting else 'N/A'
-            row = [meeting.get("companyName", ""), meeting.get("authorizedPerson", ""), meeting.get("department", ""), meeting.get("email", ""), meeting.get("phone", ""), meeting.get("type", "Bilinmiyor").capitalize(), formatted_note_date, formatted_meeting_date, meeting.get("meetingNotes", "")]
-            sheet.append([str(item) for item in row])
-        for col in sheet.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except: pass
-            adjusted_width = (max_length + 2) if max_length < 50 else 50
-            sheet.column_dimensions[column].width = adjusted_width
-        workbook.save(filepath)
+        _excel_export().write_meetings(filepath, meetings_to_export)
         logging.info(f"Etkinlik listesi Excel dosyası oluşturuldu: {filepath}")
         return {"status": "success", "path": str(filepath)}
     except Exception as e:
@@ -360,86 +366,17 @@ def export_to_excel(data: Dict[str, Any]):
     filename = f"{safe_customer_name}_urun_listesi_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
     filepath = desktop_path / filename
     try:
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = "Ürün Listesi"
-        headers = ["Kaynak", "Ürün Adı", "Marka", "Ürün Kodu", "Fiyat", "Para Birimi", "KDV", "Birim", "Stok Durumu"]
-        sheet.append(headers)
-        for cell in sheet["1:1"]: cell.font = openpyxl.styles.Font(bold=True)
-        for product in products:
-            price_str_from_product = str(product.get("price_str", "N/A"))
-            kdv_str = "Yok"
-            clean_price_str = price_str_from_product
-            kdv_match = re.search(r'\+\s*%(\d+)\s*KDV', price_str_from_product, re.IGNORECASE)
-            if kdv_match:
-                kdv_str = f"%{kdv_match.group(1)}"
-                clean_price_str = re.sub(r'\s*\+\s*%(\d+)\s*KDV.*', '', price_str_from_product, flags=re.IGNORECASE).strip()
-            currency_symbol = ""
-            price_str_lower = clean_price_str.lower()
-            if '€' in price_str_lower or 'eur' in price_str_lower: currency_symbol = "€"
-            elif '$' in price_str_lower or 'usd' in price_str_lower: currency_symbol = "$"
-            elif '£' in price_str_lower or 'gbp' in price_str_lower: currency_symbol = "£"
-            elif '₺' in price_str_lower or 'try' in price_str_lower or 'tl' in price_str_lower: currency_symbol = "₺"
-            price_val = product.get("price_numeric")
-            excel_price_value = 0
-            if isinstance(price_val, (int, float)):
-                excel_price_value = price_val
-            elif clean_price_str not in ["N/A", "Teklif İsteyiniz", ""]:
-                try:
-                    numeric_part = re.sub(r'[^\d,.]', '', clean_price_str).strip()
-                    if ',' in numeric_part and '.' in numeric_part:
-                        if numeric_part.rfind(',') > numeric_part.rfind('.'):
-                            numeric_part = numeric_part.replace('.', '').replace(',', '.')
-                        else:
-                            numeric_part = numeric_part.replace(',', '')
-                    else:
-                        numeric_part = numeric_part.replace(',', '.')
-                    parsed_price = float(numeric_part)
-                    if not isinstance(price_val, (int, float)):
-                        excel_price_value = parsed_price
-                except ValueError: pass
-            row = [product.get("source", "N/A"), product.get("product_name", "N/A"), product.get("brand", product.get("source", "N/A")), product.get("product_code", "N/A"), excel_price_value, currency_symbol, kdv_str, product.get("unit", "Adet"), product.get("cheapest_netflex_stock", "N/A")]
-            sheet.append(row)
-        price_column = sheet['E']
-        for cell in price_column[1:]:
-            cell.number_format = '#,##0.00'
-        for col in sheet.columns:
-            max_length = 0
-            column_letter = col[0].column_letter
-            try:
-                if column_letter == 'E':
-                    max_length = 15
-                else:
-                    max_length = max(len(str(cell.value)) for cell in col if cell.value is not None)
-            except (ValueError, TypeError): pass
-            adjusted_width = max_length + 2
-            if column_letter == 'E': adjusted_width = max_length
-            elif column_letter == 'G': adjusted_width = 8
-            sheet.column_dimensions[column_letter].width = adjusted_width
-        workbook.save(filepath)
+        _excel_export().write_quotation(filepath, products)
         logging.info(f"Excel dosyası oluşturuldu: {filepath}")
         admin_logger.info(f"Müşteri Ataması ve Rapor: Müşteri='{customer_name}', Atanan Ürün Sayısı={len(products)}")
         for product in products:
-            p_name = re.sub(re.compile('<.*?>'), '', product.get("product_name", "N/A"))
+            p_name = HTML_TAG_PATTERN.sub('', product.get("product_name", "N/A"))
             admin_logger.info(f"  -> Atanan Ürün: Ad='{p_name}', Kod='{product.get('product_code', 'N/A')}', Fiyat='{product.get('price_str', 'N/A')}'")
         return {"status": "success", "path": str(filepath)}
     except Exception as e:
         logging.error(f"Excel hatası: {e}", exc_info=True)
         return {"status": "error", "message": str(e)}
 
-translator = Translator()
-
-def _translate_if_turkish(term: str) -> str:
-    if not term: return term
-    try:
-        if detect(term) == 'tr':
-            translated = translator.translate(term, src='tr', dest='en')
-            if translated and translated.text:
-                logging.info(f"Otomatik Çeviri: '{term}' -> '{translated.text}'")
-                return translated.text
-    except (LangDetectException, Exception): pass
-    return term
-
 def _clean_term(term):
     if not isinstance(term, str): return ""
     return re.sub(r'\s*$$[^)]*$$', '', term).strip()
@@ -463,6 +400,7 @@ def process_raw_data(data: List[List[str]]) -> List[str]:
 
 def read_excel_terms(file_path: str) -> List[str]:
     try:
+        import openpyxl
         return process_raw_data(list(openpyxl.load_workbook(file_path, data_only=True).active.values))
     except Exception as e:
         logging.error(f"Excel okuma hatası: {e}", exc_info=True)
@@ -470,6 +408,7 @@ def read_excel_terms(file_path: str) -> List[str]:
 
 def read_docx_terms(file_path: str) -> List[str]:
     try:
+        import docx
         doc = docx.Document(file_path)
         return [term for table in doc.tables for term in process_raw_data([[cell.text for cell in row.cells] for row in table.rows])]
     except Exception as e:
@@ -478,6 +417,7 @@ def read_docx_terms(file_path: str) -> List[str]:
 
 def read_csv_terms(file_path: str) -> List[str]:
     try:
+        import chardet
         with open(file_path, 'rb') as f_raw:
             encoding = chardet.detect(f_raw.read())['encoding'] or 'utf-8'
         with open(file_path, 'r', encoding=encoding, newline='', errors='replace') as f:
@@ -496,7 +436,9 @@ def get_search_terms_from_file(file_path):
     file_ext = os.path.splitext(file_path)[1].lower()
     if file_ext not in ext_map: return []
     raw_terms = ext_map[file_ext](file_path)
-    processed_terms = {_translate_if_turkish(_clean_term(term)) for term in raw_terms if _clean_term(term)}
+    cleaned_terms = {cleaned for cleaned in map(_clean_term, raw_terms) if cleaned}
+    translations = term_translator.translate_terms(cleaned_terms)
+    processed_terms = {translations.get(term, term) for term in cleaned_terms}
     return [term for term in processed_terms if len(term) > 2]
 
 def _get_orkim_stock_task(orkim_api_instance, product_url: str):
@@ -549,15 +491,23 @@ def get_merck_code_variations(term: str) -> set:
     return variations
 
 class ComparisonEngine:
-    def __init__(self, sigma_api: sigma.SigmaAldrichAPI, netflex_api: netflex.NetflexAPI, tci_api: tci.TciScraper, orkim_api: orkim.OrkimScraper, itk_api: itk.ItkScraper, initial_settings: Dict[str, Any], max_workers=10):
+    def __init__(self, sigma_api: sigma.SigmaAldrichAPI, netflex_api: netflex.NetflexAPI, tci_api: tci.TciScraper, orkim_api: orkim.OrkimScraper, itk_api: itk.ItkScraper, initial_settings: Dict[str, Any], max_workers=10, currency_api: currency_converter.CurrencyConverter = None):
         self.sigma_api, self.netflex_api, self.tci_api, self.orkim_api, self.itk_api = sigma_api, netflex_api, tci_api, orkim_api, itk_api
-        self.currency_converter = currency_converter.CurrencyConverter()
+        self.currency_converter = currency_api or currency_converter.currency_converter
         self.max_workers = max_workers
         self.search_cancelled = threading.Event()
         self.batch_search_cancelled = threading.Event()
+        # Arka plan önbellek yenilemeleri yalnızca kapanışta iptal edilir; anlık arama iptali onları etkilemez.
+        self.shutdown_event = threading.Event()
         self.settings = initial_settings
         self.cas_search_sigma_codes: Dict[str, str] = {}
         self.cas_search_lock = threading.Lock()
+        self.cache_refreshes_in_flight: set = set()
+        self.cache_refresh_lock = threading.Lock()
+        self.source_scheduler = SourceScheduler()
+        self.active_batch_terms: Dict[int, threading.Event] = {}
+        self.current_batch_term_index = None
+        self.batch_terms_lock = threading.Lock()
 
     def initialize_drivers(self):
         logging.info("Ağır servisler (Playwright+Obscura) başlatılıyor...")
@@ -575,14 +525,20 @@ class ComparisonEngine:
             logging.critical(f"Playwright+Obscura bağlantıları kurulamadı: {e}", exc_info=True)
             raise e
 
-    def _get_cas_from_sigma_for_merck_code(self, merck_code: str) -> str:
+    def _get_cas_from_sigma_for_merck_code(self, merck_code: str, cancel_event: threading.Event = None) -> str:
         if not merck_code: return "N/A"
         extracted_code = extract_merck_core(merck_code)
         if not extracted_code: return "N/A"
+        cancel_event = cancel_event or self.search_cancelled
+        # Aynı Merck çekirdeği birden fazla Orkim ürününde geçebilir; Sigma araması tek seferde yapılır.
+        lookup = lambda: self._lookup_cas_on_sigma(merck_code, extracted_code, cancel_event)
+        return single_flight.do("sigma", "merck_cas", extracted_code, lookup, ttl=lambda cas: 0 if cas == "N/A" else 600, cancel_event=cancel_event, default="N/A")
+
+    def _lookup_cas_on_sigma(self, merck_code: str, extracted_code: str, cancel_event: threading.Event) -> str:
         try:
-            search_generator = self.sigma_api.search_products(extracted_code, self.search_cancelled)
+            search_generator = self.sigma_api.search_products(extracted_code, cancel_event)
             first_sigma_result = next(search_generator, None)
-            if self.search_cancelled.is_set(): return "N/A"
+            if cancel_event.is_set(): return "N/A"
             if first_sigma_result and (cas := first_sigma_result.get('cas_number', 'N/A')) != 'N/A':
                 logging.info(f"CAS Tespiti (Kod Arama): Merck kodu '{merck_code}' için Sigma'dan '{extracted_code}' arandı, CAS '{cas}' bulundu.")
                 return cas
@@ -593,177 +549,211 @@ class ComparisonEngine:
             logging.error(f"CAS Tespiti (Kod Arama): Sigma araması sırasında hata ({extracted_code}): {e}")
             return "N/A"
 
-    def _process_single_sigma_product_and_send(self, raw_sigma_product: Dict[str, Any], context: Dict, search_data: dict):
+    def _register_cas_sigma_code(self, product_number: str, cas_number: str):
+        """CAS aramasında bulunan Sigma ürününün Merck çekirdeğini Orkim/ITK eşleştirmesi için kaydeder."""
+        merck_core = extract_merck_core(product_number)
+        if not merck_core: return
+        with self.cas_search_lock:
+            if merck_core not in self.cas_search_sigma_codes:
+                self.cas_search_sigma_codes[merck_core] = cas_number
+                logging.info(f"CAS Eşleştirme: Sigma ürünü '{product_number}' (çekirdek: {merck_core}) CAS '{cas_number}' için listeye eklendi.")
+
+    @staticmethod
+    def _sigma_netflex_terms(product_number: str, sigma_variations_data: Any) -> Set[str]:
+        """Sigma ürününün Netflex'te aranacak kodları: ürün numarası ve tüm ülkelerdeki malzeme numaraları."""
+        netflex_terms = {product_number.replace('.', '')} if product_number else set()
+        if isinstance(sigma_variations_data, dict):
+            for country_vars in sigma_variations_data.values():
+                if isinstance(country_vars, list):
+                    for var in country_vars:
+                        if isinstance(var, dict) and (mat_num := var.get('material_number')):
+                            netflex_terms.add(mat_num.replace('.', ''))
+        return netflex_terms
+
+    def _prepare_sigma_product(self, raw_sigma_product: Dict[str, Any], search_data: dict, cancel_event: threading.Event, sigma_variations_data: Dict[str, Any] = None):
+        """CAS eşleşmesini kaydeder, eksikse fiyatları çeker ve Netflex eşleşmelerini toplar; iptalde None döner."""
+        s_num, s_brand, s_key, s_mids, s_cas = (raw_sigma_product.get('product_number'), raw_sigma_product.get('brand'), raw_sigma_product.get('product_key'), raw_sigma_product.get('material_ids', []), raw_sigma_product.get('cas_number'))
+        search_term = search_data.get("searchTerm", "")
+        search_logic = search_data.get("searchLogic", "exact")
+        is_exact_cas_search = search_logic == "exact" and is_cas_number(search_term)
+        if is_exact_cas_search and s_cas == search_term: self._register_cas_sigma_code(s_num, search_term)
+        if sigma_variations_data is None:
+            sigma_variations_data = self.sigma_api.get_all_product_prices(s_num, s_brand, s_key.replace('.', ''), s_mids, cancel_event)
+        if cancel_event.is_set(): return None
+        netflex_cache = {}
+        try:
+            # Malzeme numaraları paylaşılan Netflex önbelleği üzerinden aynı anda çözülür.
+            for results in self.netflex_api.lookup_many(self._sigma_netflex_terms(s_num, sigma_variations_data), cancel_event).values():
+                for r in results:
+                    if r_code := r.get('product_code'): netflex_cache[r_code] = r
+        except netflex.AuthenticationError:
+            logging.error(f"Netflex kimlik doğrulaması başarısız oldu (Sigma ürünü işlenirken). Ürün: {s_num}")
+        except Exception as e:
+            logging.error(f"Netflex araması sırasında beklenmedik hata (Sigma ürünü işlenirken {s_num}): {e}")
+        if cancel_event.is_set(): return None
+        return sigma_variations_data, netflex_cache
+
+    @staticmethod
+    def _sigma_product_matches(final_product: Dict[str, Any], search_data: dict) -> bool:
+        search_term_lower = search_data.get("searchTerm", "").lower()
+        if search_data.get("searchLogic", "exact") != "exact": return True
+        product_number_lower = final_product.get('product_number', '').lower()
+        product_name_lower = final_product.get('product_name', '').lower()
+        cas_number_lower = final_product.get('cas_number', '').lower()
+        if (search_term_lower in product_name_lower or search_term_lower == cas_number_lower):
+            return True
+        elif (search_term_lower in product_number_lower):
+            return True
+        elif (sigma_vars := final_product.get('sigma_variations')):
+            for country_vars in sigma_vars.values():
+                if isinstance(country_vars, list):
+                    for var in country_vars:
+                        if isinstance(var, dict) and search_term_lower == var.get('material_number', '').lower():
+                            return True
+        elif (netflex_matches := final_product.get('netflex_matches')):
+            for match in netflex_matches:
+                if isinstance(match, dict) and search_term_lower == match.get('product_code', '').lower():
+                    return True
+        logging.debug(f"Sigma ürünü '{final_product.get('product_number')}' esnek exact filtreyi geçemedi ('{search_term_lower}').")
+        return False
+
+    def _process_single_sigma_product_and_send(self, raw_sigma_product: Dict[str, Any], search_data: dict, emit, cancel_event: threading.Event, sigma_variations_data: Dict[str, Any] = None, incomplete: threading.Event = None):
         try:
-            if self.search_cancelled.is_set(): return False
-            s_num, s_brand, s_key, s_mids, s_cas = (raw_sigma_product.get('product_number'), raw_sigma_product.get('brand'), raw_sigma_product.get('product_key'), raw_sigma_product.get('material_ids', []), raw_sigma_product.get('cas_number'))
-            search_term = search_data.get("searchTerm", "")
-            search_logic = search_data.get("searchLogic", "exact")
-            is_exact_cas_search = search_logic == "exact" and is_cas_number(search_term)
-            if is_exact_cas_search and s_cas == search_term:
-                merck_core = extract_merck_core(s_num)
-                if merck_core:
-                    with self.cas_search_lock:
-                        if merck_core not in self.cas_search_sigma_codes:
-                            self.cas_search_sigma_codes[merck_core] = search_term
-                            logging.info(f"CAS Eşleştirme: Sigma ürünü '{s_num}' (çekirdek: {merck_core}) CAS '{search_term}' için listeye eklendi.")
-            sigma_variations_data = self.sigma_api.get_all_product_prices(s_num, s_brand, s_key.replace('.', ''), s_mids, self.search_cancelled)
-            if self.search_cancelled.is_set(): return False
-            netflex_terms = {s_num.replace('.', '')} if s_num else set()
-            if isinstance(sigma_variations_data, dict):
-                for country_vars in sigma_variations_data.values():
-                    if isinstance(country_vars, list):
-                        for var in country_vars:
-                            if isinstance(var, dict) and (mat_num := var.get('material_number')):
-                                netflex_terms.add(mat_num.replace('.', ''))
-            netflex_cache = {}
-            for term in netflex_terms:
-                if self.search_cancelled.is_set(): return False
-                try:
-                    results = self.netflex_api.search_products(term, self.search_cancelled)
-                    if results:
-                        for r in results:
-                            if r_code := r.get('product_code'): netflex_cache[r_code] = r
-                except netflex.AuthenticationError:
-                    logging.error(f"Netflex kimlik doğrulaması başarısız oldu (Sigma ürünü işlenirken). Ürün: {s_num}")
-                    break
-                except Exception as e:
-                    logging.error(f"Netflex araması sırasında beklenmedik hata (Sigma ürünü işlenirken {term}): {e}")
-            if self.search_cancelled.is_set(): return False
+            if cancel_event.is_set(): return False
+            prepared = self._prepare_sigma_product(raw_sigma_product, search_data, cancel_event, sigma_variations_data)
+            if prepared is None: return False
+            sigma_variations_data, netflex_cache = prepared
+            s_num = raw_sigma_product.get('product_number')
             final_product = self._build_final_sigma_product(raw_sigma_product, netflex_cache, {s_num: sigma_variations_data}, self.settings)
-            if final_product:
-                search_term_lower = search_data.get("searchTerm", "").lower()
-                match_found = False
-                if search_logic == "exact":
-                    product_number_lower = final_product.get('product_number', '').lower()
-                    product_name_lower = final_product.get('product_name', '').lower()
-                    cas_number_lower = final_product.get('cas_number', '').lower()
-                    if (search_term_lower in product_name_lower or search_term_lower == cas_number_lower):
-                        match_found = True
-                    elif (search_term_lower in product_number_lower):
-                        match_found = True
-                    elif (sigma_vars := final_product.get('sigma_variations')):
-                        for country_vars in sigma_vars.values():
-                            if isinstance(country_vars, list):
-                                for var in country_vars:
-                                    if isinstance(var, dict) and search_term_lower == var.get('material_number', '').lower():
-                                        match_found = True
-                                        break
-                            if match_found: break
-                    elif (netflex_matches := final_product.get('netflex_matches')):
-                        for match in netflex_matches:
-                            if isinstance(match, dict) and search_term_lower == match.get('product_code', '').lower():
-                                match_found = True
-                                break
-                else:
-                    match_found = True
-                if match_found:
-                    send_to_frontend("product_found", {"product": final_product}, context=context)
-                    return True
-                else:
-                    logging.debug(f"Sigma ürünü '{s_num}' esnek exact filtreyi geçemedi ('{search_term_lower}').")
-                    return False
+            if final_product and self._sigma_product_matches(final_product, search_data):
+                emit(final_product)
+                return True
         except Exception as e:
             logging.error(f"Tekil Sigma ürünü ({raw_sigma_product.get('product_number')}) işlenirken hata: {e}", exc_info=True)
+            if incomplete is not None: incomplete.set()
         return False
 
+    def _process_sigma_page_and_send(self, raw_sigma_products: List[Dict[str, Any]], page_prices: Dict[str, Any], search_data: dict, emit, cancel_event: threading.Event, incomplete: threading.Event = None):
+        """Fiyatları toplu çekilmiş bir sayfanın ürünlerini tek fiyat partisiyle işleyip gönderir; işlenemeyen ürün olursa incomplete kurulur."""
+        products, netflex_caches, all_sigma_variations = [], [], {}
+        for raw_sigma_product in raw_sigma_products:
+            if cancel_event.is_set(): return
+            s_num = raw_sigma_product.get('product_number')
+            try:
+                prepared = self._prepare_sigma_product(raw_sigma_product, search_data, cancel_event, page_prices.get(s_num))
+            except Exception as e:
+                logging.error(f"Tekil Sigma ürünü ({s_num}) işlenirken hata: {e}", exc_info=True)
+                if incomplete is not None: incomplete.set()
+                continue
+            if prepared is None: return
+            all_sigma_variations[s_num] = prepared[0]
+            products.append(raw_sigma_product)
+            netflex_caches.append(prepared[1])
+        for final_product in self._build_final_sigma_products(products, netflex_caches, all_sigma_variations, self.settings):
+            if cancel_event.is_set(): return
+            if final_product and self._sigma_product_matches(final_product, search_data): emit(final_product)
+
     def _build_final_sigma_product(self, sigma_product: Dict, netflex_cache: Dict, all_sigma_variations: Dict, settings: Dict) -> Dict or None:
-        s_name, s_num, s_brand, cas = sigma_product.get('product_name_sigma'), sigma_product.get('product_number'), sigma_product.get('brand'), sigma_product.get('cas_number', 'N/A')
-        if not s_num: return None
+        return self._build_final_sigma_products([sigma_product], [netflex_cache], all_sigma_variations, settings)[0]
+
+    def _build_final_sigma_products(self, sigma_products: List[Dict], netflex_caches: List[Dict], all_sigma_variations: Dict, settings: Dict) -> List[Optional[Dict]]:
+        """Bir sayfadaki Sigma ürünlerini tek bir fiyat partisiyle (tek parite okuması, tek EUR dönüşümü) nihai ürünlere çevirir."""
         parities = self.currency_converter.get_parities()
         if "error" in parities: logging.error("Pariteler alınamadı.")
-        sigma_variations = all_sigma_variations.get(s_num, {})
-        all_price_options = []
-        valid_sigma_variations_exist = False
-        if isinstance(sigma_variations, dict):
-            for country_code, variations in sigma_variations.items():
-                coefficient = settings.get(f"sigma_coefficient_{country_code}", 1.0)
-                if isinstance(variations, list):
-                    for var in variations:
-                        if isinstance(var, dict) and 'error' not in var:
-                            price_eur, original_price, currency = None, var.get('price'), var.get('currency', '').upper()
-                            if original_price is not None:
-                                try:
-                                    base_price_eur = None
-                                    if currency == 'USD' and parities.get('usd_eur'): base_price_eur = original_price * parities['usd_eur']
-                                    elif currency == 'GBP' and parities.get('gbp_eur'): base_price_eur = original_price * parities['gbp_eur']
-                                    elif currency == 'EUR': base_price_eur = original_price
-                                    if base_price_eur is not None:
-                                        price_eur = base_price_eur * coefficient
-                                        if mat_num := var.get('material_number'):
-                                            all_price_options.append({'price': price_eur, 'code': mat_num, 'source': f"Sigma ({country_code.upper()})"})
-                                            valid_sigma_variations_exist = True
-                                except Exception as e:
-                                    logging.warning(f"Sigma fiyat hesaplamada hata ({s_num} - {var.get('material_number')}): {e}")
-        netflex_matches = []
-        sigma_mat_nums = set()
-        if isinstance(sigma_variations, dict):
-            for vars_list in sigma_variations.values():
-                if isinstance(vars_list, list):
-                    for var in vars_list:
-                        if isinstance(var, dict) and (mat_num := var.get('material_number')):
-                            sigma_mat_nums.add(mat_num)
-        if not sigma_mat_nums and s_num: sigma_mat_nums.add(s_num)
-        for mat_num in sigma_mat_nums:
-            clean_mat_num = mat_num.replace('.', '')
-            if clean_mat_num in netflex_cache:
-                match = netflex_cache[clean_mat_num]
-                match['product_name'] = match.get('product_name') or s_name
-                match['cas_number'] = cas
-                netflex_matches.append(match)
-                if price := match.get('price_numeric'):
-                    all_price_options.append({'price': price, 'code': match.get('product_code'), 'source': 'Netflex'})
-        cheapest_option = min(all_price_options, key=lambda x: x['price']) if all_price_options else {}
-        final_product = {"source": "Sigma", "product_name": s_name or "N/A", "product_number": s_num, "cas_number": cas or "N/A", "brand": f"Sigma ({s_brand or 'N/A'})", "sigma_variations": sigma_variations if valid_sigma_variations_exist else {}, "netflex_matches": netflex_matches, "cheapest_eur_price_str": cheapest_option.get('price') and f"{cheapest_option['price']:,.2f}€".replace(",", "X").replace(".", ",").replace("X", ".") or "N/A", "cheapest_material_number": cheapest_option.get('code', s_num), "cheapest_source_country": cheapest_option.get('source', "Netflex" if netflex_matches else "Sigma")}
-        cheapest_code = final_product["cheapest_material_number"]
-        cheapest_netflex_match = next((m for m in netflex_matches if m.get('product_code') == cheapest_code), None)
-        final_product["cheapest_netflex_stock"] = cheapest_netflex_match.get('stock', 'N/A') if cheapest_netflex_match else 'N/A'
-        if not valid_sigma_variations_exist and netflex_matches: final_product["source"] = "Netflex (Sigma eşleşmesi)"
-        if not all_price_options:
-            final_product["cheapest_eur_price_str"] = "Fiyat Yok"
-            final_product["cheapest_material_number"] = s_num
-            final_product["cheapest_source_country"] = "Sigma/Netflex"
-        return final_product
+        batch = pricing.PriceBatch()
+        prepared = []
+        for group, (sigma_product, netflex_cache) in enumerate(zip(sigma_products, netflex_caches)):
+            s_name, s_num, cas = sigma_product.get('product_name_sigma'), sigma_product.get('product_number'), sigma_product.get('cas_number', 'N/A')
+            if not s_num:
+                prepared.append(None)
+                continue
+            sigma_variations = all_sigma_variations.get(s_num, {})
+            sigma_rows = []
+            sigma_mat_nums = set()
+            if isinstance(sigma_variations, dict):
+                for country_code, variations in sigma_variations.items():
+                    coefficient = settings.get(f"sigma_coefficient_{country_code}", 1.0)
+                    if isinstance(variations, list):
+                        for var in variations:
+                            if not isinstance(var, dict): continue
+                            mat_num = var.get('material_number')
+                            if mat_num: sigma_mat_nums.add(mat_num)
+                            if 'error' not in var and mat_num and var.get('price') is not None:
+                                sigma_rows.append(batch.add(group, var.get('price'), price_parser.normalize_currency(var.get('currency')), coefficient, mat_num, f"Sigma ({country_code.upper()})"))
+            netflex_matches = []
+            if not sigma_mat_nums and s_num: sigma_mat_nums.add(s_num)
+            for mat_num in sigma_mat_nums:
+                clean_mat_num = mat_num.replace('.', '')
+                if clean_mat_num in netflex_cache:
+                    match = netflex_cache[clean_mat_num]
+                    match['product_name'] = match.get('product_name') or s_name
+                    match['cas_number'] = cas
+                    netflex_matches.append(match)
+                    if match.get('price_numeric'):
+                        batch.add(group, match['price_numeric'], match.get('currency', "EUR"), 1.0, match.get('product_code'), 'Netflex')
+            prepared.append((sigma_variations, sigma_rows, netflex_matches))
+        priced = batch.evaluate(parities)
+        final_products = []
+        for group, (sigma_product, entry) in enumerate(zip(sigma_products, prepared)):
+            if entry is None:
+                final_products.append(None)
+                continue
+            sigma_variations, sigma_rows, netflex_matches = entry
+            s_name, s_num, s_brand, cas = sigma_product.get('product_name_sigma'), sigma_product.get('product_number'), sigma_product.get('brand'), sigma_product.get('cas_number', 'N/A')
+            valid_sigma_variations_exist = any(priced.price(row) is not None for row in sigma_rows)
+            cheapest_option = priced.cheapest(group)
+            final_product = {"source": "Sigma", "product_name": s_name or "N/A", "product_number": s_num, "cas_number": cas or "N/A", "brand": f"Sigma ({s_brand or 'N/A'})", "sigma_variations": sigma_variations if valid_sigma_variations_exist else {}, "netflex_matches": netflex_matches, "cheapest_eur_price_str": cheapest_option.get('price') and price_parser.format_eur(cheapest_option['price']) or "N/A", "cheapest_material_number": cheapest_option.get('code', s_num), "cheapest_source_country": cheapest_option.get('source', "Netflex" if netflex_matches else "Sigma")}
+            cheapest_code = final_product["cheapest_material_number"]
+            cheapest_netflex_match = next((m for m in netflex_matches if m.get('product_code') == cheapest_code), None)
+            final_product["cheapest_netflex_stock"] = cheapest_netflex_match.get('stock', 'N/A') if cheapest_netflex_match else 'N/A'
+            if not valid_sigma_variations_exist and netflex_matches: final_product["source"] = "Netflex (Sigma eşleşmesi)"
+            if not cheapest_option:
+                final_product["cheapest_eur_price_str"] = "Fiyat Yok"
+                final_product["cheapest_material_number"] = s_num
+                final_product["cheapest_source_country"] = "Sigma/Netflex"
+            final_products.append(final_product)
+        return final_products
 
     def _process_tci_product(self, tci_product: tci.Product, context: Dict = None) -> Dict[str, Any]:
+        return self._process_tci_products([tci_product])[0]
+
+    def _process_tci_products(self, tci_products: List[tci.Product]) -> List[Dict[str, Any]]:
+        """TCI ürünlerinin tüm varyasyonlarını tek bir fiyat partisinde EUR'a çevirip nihai ürünleri üretir."""
         parities = self.currency_converter.get_parities()
         tci_coefficient = self.settings.get('tci_coefficient', 1.4)
-        processed_variations = []
-        all_price_options = []
-        valid_tci_variations_exist = False
-        if not tci_product.variations:
-            logging.warning(f"TCI ürünü ({tci_product.code}) için varyasyon bulunamadı.")
-        else:
-            for variation in tci_product.variations:
-                original_price_str = variation.get('price', 'N/A')
-                currency_symbol = '€' if '€' in original_price_str else '$' if '$' in original_price_str else '£' if '£' in original_price_str else '€'
-                price_float = None
-                calculated_price_eur = None
-                try:
-                    cleaned = re.sub(r'[^\d,.]', '', original_price_str)
-                    if cleaned:
-                        standardized = cleaned.replace('.', '').replace(',', '.') if cleaned.rfind(',') > cleaned.rfind('.') else cleaned.replace(',', '')
-                        price_float = float(standardized) if standardized else None
-                    if price_float is not None:
-                        base_price_eur = price_float
-                        if currency_symbol == '$' and parities.get('usd_eur'): base_price_eur = price_float * parities['usd_eur']
-                        elif currency_symbol == '£' and parities.get('gbp_eur'): base_price_eur = price_float * parities['gbp_eur']
-                        calculated_price_eur = base_price_eur * tci_coefficient
-                        valid_tci_variations_exist = True
-                        all_price_options.append({'price': calculated_price_eur, 'code': f"{tci_product.code}-{variation.get('unit', 'N/A')}", 'source': 'TCI'})
-                except (ValueError, TypeError) as e:
-                    logging.warning(f"TCI fiyat parse/hesaplama hatası ({tci_product.code} - {variation.get('unit')}): {e}")
-                processed_variations.append({"unit": variation.get('unit'), "original_price": original_price_str, "original_price_numeric": price_float, "stock_info": variation.get('stock_info', []), "calculated_price_eur": calculated_price_eur, "calculated_price_eur_str": f"{calculated_price_eur:,.2f}€".replace(",", "X").replace(".", ",").replace("X", ".") if calculated_price_eur is not None else "N/A"})
-        cheapest_option = min(all_price_options, key=lambda x: x['price']) if all_price_options else {}
-        final_product = {"source": "TCI", "product_name": tci_product.name or "N/A", "product_number": tci_product.code or "N/A", "cas_number": tci_product.cas_number or "N/A", "brand": "TCI", "tci_variations": processed_variations if valid_tci_variations_exist else [], "sigma_variations": {}, "netflex_matches": [], "cheapest_eur_price_str": cheapest_option.get('price') and f"{cheapest_option['price']:,.2f}€".replace(",", "X").replace(".", ",").replace("X", ".") or "Fiyat Yok", "cheapest_material_number": cheapest_option.get('code', tci_product.code or "N/A"), "cheapest_source_country": cheapest_option.get('source', "TCI")}
-        cheapest_variation_details = next((v for v in processed_variations if v.get('calculated_price_eur_str') == final_product["cheapest_eur_price_str"]), None)
-        if cheapest_variation_details and cheapest_variation_details.get('stock_info'):
-            final_product["cheapest_netflex_stock"] = ", ".join([f"{s['country']}: {s['stock']}" for s in cheapest_variation_details['stock_info']])
-        else:
-            final_product["cheapest_netflex_stock"] = "N/A"
-        return final_product
+        batch = pricing.PriceBatch()
+        product_rows = []
+        for group, tci_product in enumerate(tci_products):
+            rows = []
+            if not tci_product.variations:
+                logging.warning(f"TCI ürünü ({tci_product.code}) için varyasyon bulunamadı.")
+            else:
+                # Sembolsüz TCI fiyatları EUR kabul edilir.
+                price_records = price_parser.parse_prices((variation.get('price', 'N/A') for variation in tci_product.variations), default_currency="EUR")
+                for variation, price_record in zip(tci_product.variations, price_records):
+                    rows.append((variation, price_record, batch.add(group, price_record.amount, price_record.currency, tci_coefficient, f"{tci_product.code}-{variation.get('unit', 'N/A')}", 'TCI')))
+            product_rows.append(rows)
+        priced = batch.evaluate(parities)
+        final_products = []
+        for group, (tci_product, rows) in enumerate(zip(tci_products, product_rows)):
+            processed_variations = []
+            valid_tci_variations_exist = False
+            for variation, price_record, row in rows:
+                calculated_price_eur = priced.price(row)
+                if calculated_price_eur is not None: valid_tci_variations_exist = True
+                elif price_record.amount is not None: logging.warning(f"TCI için {price_record.currency} -> EUR dönüşüm oranı bulunamadı ({tci_product.code} - {variation.get('unit')}).")
+                processed_variations.append({"unit": variation.get('unit'), "original_price": variation.get('price', 'N/A'), "original_price_numeric": price_record.amount, "stock_info": variation.get('stock_info', []), "calculated_price_eur": calculated_price_eur, "calculated_price_eur_str": price_parser.format_eur(calculated_price_eur) if calculated_price_eur is not None else "N/A"})
+            cheapest_option = priced.cheapest(group)
+            final_product = {"source": "TCI", "product_name": tci_product.name or "N/A", "product_number": tci_product.code or "N/A", "cas_number": tci_product.cas_number or "N/A", "brand": "TCI", "tci_variations": processed_variations if valid_tci_variations_exist else [], "sigma_variations": {}, "netflex_matches": [], "cheapest_eur_price_str": cheapest_option.get('price') and price_parser.format_eur(cheapest_option['price']) or "Fiyat Yok", "cheapest_material_number": cheapest_option.get('code', tci_product.code or "N/A"), "cheapest_source_country": cheapest_option.get('source', "TCI")}
+            cheapest_variation_details = next((v for v in processed_variations if v.get('calculated_price_eur_str') == final_product["cheapest_eur_price_str"]), None)
+            if cheapest_variation_details and cheapest_variation_details.get('stock_info'):
+                final_product["cheapest_netflex_stock"] = ", ".join([f"{s['country']}: {s['stock']}" for s in cheapest_variation_details['stock_info']])
+            else:
+                final_product["cheapest_netflex_stock"] = "N/A"
+            final_products.append(final_product)
+        return final_products
 
-    def _process_orkim_product(self, orkim_product: Dict[str, Any], search_data: Dict[str, Any], is_cas_search: bool, context: Dict = None) -> Dict[str, Any]:
+    def _process_orkim_product(self, orkim_product: Dict[str, Any], search_data: Dict[str, Any], is_cas_search: bool, context: Dict = None, cancel_event: threading.Event = None) -> Dict[str, Any]:
         stock_quantity = orkim_product.get("stock_quantity")
         stock_status = orkim_product.get("stock_status")
         stock_display = "N/A"
@@ -780,7 +770,7 @@ class ComparisonEngine:
         search_term_variations = get_merck_code_variations(original_search_term)
         is_direct_code_search = search_logic == "exact" and any(term in product_code_lower for term in search_term_variations)
         if product_code_lower.startswith('m') and is_direct_code_search:
-            found_cas = self._get_cas_from_sigma_for_merck_code(product_code)
+            found_cas = self._get_cas_from_sigma_for_merck_code(product_code, cancel_event)
         elif search_logic == "exact" and is_cas_search and product_code_lower.startswith('m'):
             merck_core = extract_merck_core(product_code)
             if merck_core:
@@ -791,22 +781,29 @@ class ComparisonEngine:
                         logging.info(f"CAS Eşleştirme: Orkim ürünü '{product_code}' (çekirdek: {merck_core}) Sigma koduyla eşleşti, CAS '{found_cas}' atandı.")
         return {"source": "Orkim", "product_name": orkim_product.get("urun_adi", "N/A"), "product_number": product_code, "cas_number": found_cas, "brand": orkim_product.get("brand", "Orkim"), "cheapest_eur_price_str": price_str, "cheapest_material_number": product_code, "cheapest_source_country": "Orkim", "cheapest_netflex_stock": stock_display, "sigma_variations": {}, "netflex_matches": [], "tci_variations": [], "product_url": orkim_product.get("product_url")}
 
-    def _process_itk_product(self, itk_product: Dict[str, Any], search_data: Dict[str, Any], is_cas_search: bool, context: Dict = None) -> Dict[str, Any]:
+    def _process_itk_product(self, itk_product: Dict[str, Any], search_data: Dict[str, Any], is_cas_search: bool, context: Dict = None, cancel_event: threading.Event = None) -> Dict[str, Any]:
+        return next(self._process_itk_products([itk_product], search_data, is_cas_search, cancel_event))
+
+    def _process_itk_products(self, itk_products: List[Dict[str, Any]], search_data: Dict[str, Any], is_cas_search: bool, cancel_event: threading.Event = None) -> Iterator[Dict[str, Any]]:
+        """Eşleşen ITK ürünlerini tek fiyat partisinde EUR'a çevirir; ürünleri (CAS tespiti yapılarak) sırayla üretir."""
+        itk_coefficient = self.settings.get('itk_coefficient', 1.0)
+        batch = pricing.PriceBatch()
+        rows = [batch.add(group, product.get("price"), price_parser.normalize_currency(product.get("currency"), "EUR"), itk_coefficient) for group, product in enumerate(itk_products)]
+        parities = self.currency_converter.get_parities() if len(batch) else {}
+        if "error" in parities: logging.warning("ITK fiyat dönüşümü için pariteler alınamadı.")
+        priced = batch.evaluate(parities)
+        for itk_product, row in zip(itk_products, rows):
+            yield self._build_itk_product(itk_product, priced.price(row), search_data, is_cas_search, cancel_event, itk_coefficient)
+
+    def _build_itk_product(self, itk_product: Dict[str, Any], eur_price: Optional[float], search_data: Dict[str, Any], is_cas_search: bool, cancel_event: threading.Event, itk_coefficient: float) -> Dict[str, Any]:
         original_price = itk_product.get("price")
-        original_currency = itk_product.get("currency", "EUR").upper()
         product_code = itk_product.get("product_code", "N/A")
-        eur_price = None
         cheapest_price_str = "Fiyat Yok"
-        if original_price is not None:
-            parities = self.currency_converter.get_parities()
-            if "error" in parities: logging.warning("ITK fiyat dönüşümü için pariteler alınamadı.")
-            if original_currency == "EUR": eur_price = original_price
-            elif original_currency == "USD" and parities.get("usd_eur"): eur_price = original_price * parities["usd_eur"]
-            elif original_currency == "GBP" and parities.get("gbp_eur"): eur_price = original_price * parities["gbp_eur"]
-            else:
-                if original_currency != "EUR": logging.warning(f"ITK için {original_currency} -> EUR dönüşüm oranı bulunamadı.")
-                eur_price = original_price
-            if eur_price is not None: cheapest_price_str = f"{eur_price:,.2f}€".replace(",", "X").replace(".", ",").replace("X", ".")
+        if isinstance(original_price, (int, float)):
+            if eur_price is None:
+                logging.warning(f"ITK için {price_parser.normalize_currency(itk_product.get('currency'), 'EUR')} -> EUR dönüşüm oranı bulunamadı.")
+                eur_price = original_price * itk_coefficient
+            cheapest_price_str = price_parser.format_eur(eur_price)
         stock_quantity = itk_product.get("stock_quantity", "N/A")
         found_cas = "N/A"
         original_search_term = search_data.get("searchTerm", "").lower()
@@ -815,7 +812,7 @@ class ComparisonEngine:
         search_term_variations = get_merck_code_variations(original_search_term)
         is_direct_code_search = search_logic == "exact" and any(term in product_code_lower for term in search_term_variations)
         if product_code_lower.startswith('m') and is_direct_code_search:
-            found_cas = self._get_cas_from_sigma_for_merck_code(product_code)
+            found_cas = self._get_cas_from_sigma_for_merck_code(product_code, cancel_event)
         elif search_logic == "exact" and is_cas_search and product_code_lower.startswith('m'):
             merck_core = extract_merck_core(product_code)
             if merck_core:
@@ -833,9 +830,249 @@ class ComparisonEngine:
         price_str = netflex_product.get("price_str", "N/A")
         return {"source": "Netflex", "product_name": netflex_product.get("product_name", "N/A"), "product_number": netflex_product.get("product_code", "N/A"), "cas_number": "N/A", "brand": netflex_product.get("brand", "Netflex"), "cheapest_eur_price_str": price_str, "cheapest_material_number": netflex_product.get("product_code", "N/A"), "cheapest_source_country": "Netflex", "cheapest_netflex_stock": netflex_product.get("stock", "N/A"), "sigma_variations": {}, "netflex_matches": [], "tci_variations": [], "itk_variations": []}
 
-    def search_and_compare(self, search_data: dict, context: Dict = None):
+    def _build_source_tasks(self, search_data: dict, search_term_variations: set, is_exact_cas_search: bool) -> Dict[str, Any]:
+        search_term = search_data.get("searchTerm", "").strip()
+        search_logic = search_data.get("searchLogic", "exact")
+        # Görevler yalnızca sonuçlar eksiksizse True döner; sayfa veya ürün kaybı olan aramalar önbelleğe yazılmaz.
+        def tci_task(cancel_event: threading.Event, emit) -> bool:
+            found_product_codes = set()
+            incomplete = threading.Event()
+            found_lock = threading.Lock()
+            def search_variation(term_variation: str):
+                logging.info(f"TCI: Varyasyon aranıyor: '{term_variation}'")
+                term_lower = term_variation.lower()
+                for product_page in self.tci_api.get_products(term_variation, cancel_event, incomplete):
+                    if cancel_event.is_set(): break
+                    page_matches = []
+                    for product in product_page:
+                        if cancel_event.is_set(): break
+                        product_code_lower = (product.code or "").lower()
+                        match_found = False
+                        product_name_lower = (product.name or "").lower()
+                        cas_number_lower = (product.cas_number or "").lower()
+                        if search_logic == "exact":
+                            if (term_lower in product_name_lower or (term_lower in product_code_lower or product_code_lower in term_lower) or (cas_number_lower and term_lower == cas_number_lower)):
+                                match_found = True
+                        else: match_found = True
+                        if not match_found: continue
+                        with found_lock:
+                            if product_code_lower in found_product_codes: continue
+                            if product_code_lower: found_product_codes.add(product_code_lower)
+                        page_matches.append(product)
+                    if page_matches and not cancel_event.is_set():
+                        for final_product in self._process_tci_products(page_matches): emit(final_product)
+            try:
+                # Varyasyonlar TCI sayfa havuzunu paylaşarak aynı anda aranır.
+                with ThreadPoolExecutor(max_workers=max(1, min(len(search_term_variations), self.tci_api.pool_size)), thread_name_prefix="TCI-Variation") as variation_executor:
+                    for future in [variation_executor.submit(search_variation, term) for term in search_term_variations]: future.result()
+                if incomplete.is_set(): logging.warning(f"TCI: '{search_term}' sonuçları eksik, önbelleğe yazılmayacak.")
+                return not incomplete.is_set()
+            except Exception as e:
+                logging.error(f"TCI akış hatası: {e}", exc_info=True)
+                return False
+        def sigma_task(cancel_event: threading.Event, emit) -> bool:
+            found_product_numbers = set()
+            incomplete = threading.Event()
+            batch_pricing = self.settings.get("sigma_batch_pricing", True)
+            # Toplu fiyatlamada bir sayfanın tüm G/Ç'si (fiyatlar ve Netflex kodları) tedarikçi G/Ç döngüsünde topluca yapılır
+            # ve ürünler bu thread'de işlenir; havuz yalnızca tekil fiyat isteyen ürünler için kullanılır.
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="Sigma-Processor") as processor:
+                try:
+                    futures = []
+                    for term_variation in search_term_variations:
+                        if cancel_event.is_set(): break
+                        logging.info(f"Sigma: Varyasyon aranıyor: '{term_variation}'")
+                        variation_search_data = search_data.copy()
+                        variation_search_data["searchTerm"] = term_variation
+                        for raw_page in self.sigma_api.search_product_pages(term_variation, cancel_event, incomplete):
+                            if cancel_event.is_set(): break
+                            page_products = []
+                            for raw_product in raw_page:
+                                product_number = raw_product.get('product_number')
+                                if product_number in found_product_numbers: continue
+                                if product_number: found_product_numbers.add(product_number)
+                                page_products.append(raw_product)
+                            page_prices = self.sigma_api.get_prices_for_products(page_products, cancel_event) if batch_pricing else {}
+                            if cancel_event.is_set(): break
+                            if page_prices:
+                                netflex_terms = set()
+                                for raw_product in page_products:
+                                    netflex_terms |= self._sigma_netflex_terms(raw_product.get('product_number'), page_prices.get(raw_product.get('product_number')))
+                                try:
+                                    self.netflex_api.lookup_many(netflex_terms, cancel_event)
+                                except netflex.AuthenticationError:
+                                    pass  # Ürünler işlenirken ayrıca loglanır.
+                            priced_products = [raw_product for raw_product in page_products if page_prices.get(raw_product.get('product_number')) is not None]
+                            if priced_products:
+                                self._process_sigma_page_and_send(priced_products, page_prices, variation_search_data, emit, cancel_event, incomplete)
+                            for raw_product in page_products:
+                                if page_prices.get(raw_product.get('product_number')) is None:
+                                    futures.append(processor.submit(self._process_single_sigma_product_and_send, raw_product, variation_search_data, emit, cancel_event, None, incomplete))
+                    for future in as_completed(futures):
+                        future.result()
+                    if incomplete.is_set(): logging.warning(f"Sigma: '{search_term}' sonuçları eksik, önbelleğe yazılmayacak.")
+                    return not incomplete.is_set()
+                except Exception as e:
+                    logging.error(f"Sigma akış hatası: {e}", exc_info=True)
+                    return False
+        def orkim_task(cancel_event: threading.Event, emit) -> bool:
+            found_product_codes = set()
+            found_lock = threading.Lock()
+            incomplete = threading.Event()
+            def search_variation(term_variation: str):
+                logging.info(f"Orkim: Varyasyon aranıyor: '{term_variation}'")
+                orkim_results = self.orkim_api.search_products(term_variation, cancel_event, search_logic, incomplete)
+                if cancel_event.is_set(): return
+                variation_search_data = search_data.copy()
+                variation_search_data["searchTerm"] = term_variation
+                for product in orkim_results:
+                    if cancel_event.is_set(): break
+                    product_code = product.get("k_kodu", "N/A")
+                    with found_lock:
+                        if product_code in found_product_codes: continue
+                        if product_code != "N/A": found_product_codes.add(product_code)
+                    emit(self._process_orkim_product(product, variation_search_data, is_exact_cas_search, cancel_event=cancel_event))
+            try:
+                if not self.orkim_api: return False
+                # Her varyasyon havuzdan kendi Orkim oturumunu alır.
+                with ThreadPoolExecutor(max_workers=max(1, min(len(search_term_variations), self.orkim_api.max_concurrency)), thread_name_prefix="Orkim-Variation") as variation_executor:
+                    for future in [variation_executor.submit(search_variation, term) for term in search_term_variations]: future.result()
+                if incomplete.is_set(): logging.warning(f"Orkim: '{search_term}' sonuçları eksik, önbelleğe yazılmayacak.")
+                return not incomplete.is_set()
+            except Exception as e:
+                logging.error(f"Orkim akış hatası: {e}", exc_info=True)
+                return False
+        def itk_task(cancel_event: threading.Event, emit) -> bool:
+            found_codes = set()
+            unique_matches = []
+            with itk_cache_lock: search_index = itk_search_index
+            if search_index is None or not len(search_index): return False
+            with profiler.span("itk.index_search", "itk", term=search_term.lower(), products=len(search_index)) as span:
+                matches = search_index.search(search_term_variations, search_logic)
+                span.set(matches=len(matches))
+            for product in matches:
+                if cancel_event.is_set(): return False
+                code_lower = product.get("product_code", "").lower()
+                if code_lower not in found_codes:
+                    unique_matches.append(product)
+                    if code_lower: found_codes.add(code_lower)
+            for final_product in self._process_itk_products(unique_matches, search_data, is_exact_cas_search, cancel_event):
+                if cancel_event.is_set(): return False
+                emit(final_product)
+            return True
+        def netflex_task(cancel_event: threading.Event, emit) -> bool:
+            found_product_codes = set()
+            incomplete = threading.Event()
+            try:
+                for term_variation in search_term_variations:
+                    if cancel_event.is_set(): break
+                    logging.info(f"Netflex: Varyasyon aranıyor: '{term_variation}'")
+                    netflex_results = self.netflex_api.lookup(term_variation, cancel_event, incomplete)
+                    if cancel_event.is_set(): break
+                    term_lower = term_variation.lower()
+                    for product in netflex_results:
+                        if cancel_event.is_set(): break
+                        product_code_lower = (product.get('product_code', '') or "").lower()
+                        if product_code_lower in found_product_codes: continue
+                        match_found = False
+                        product_name_lower = (product.get('product_name', '') or "").lower()
+                        if search_logic == "exact":
+                            if (term_lower in product_name_lower or (term_lower in product_code_lower or product_code_lower in term_lower)):
+                                match_found = True
+                        else: match_found = True
+                        if match_found:
+                            emit(self._process_netflex_product(product))
+                            if product_code_lower: found_product_codes.add(product_code_lower)
+                if incomplete.is_set(): logging.warning(f"Netflex: '{search_term}' sonuçları eksik, önbelleğe yazılmayacak.")
+                return not incomplete.is_set()
+            except netflex.AuthenticationError:
+                logging.error("Netflex kimlik doğrulaması başarısız oldu (2. aşama Netflex araması).")
+            except Exception as e:
+                logging.error(f"İkincil Netflex araması sırasında hata: {e}", exc_info=True)
+            return False
+        return {"tci": tci_task, "sigma": sigma_task, "orkim": orkim_task, "itk": itk_task, "netflex": netflex_task}
+
+    def _search_cache_key(self, source: str, normalized_term: str, search_logic: str, enabled_brands: set) -> str:
+        return f"{source}|{search_logic}|{','.join(sorted(enabled_brands))}|{normalized_term}"
+
+    def _search_cache_hours(self, key: str, default: float) -> float:
+        try:
+            return float(str(self.settings.get(key, default)).replace(',', '.'))
+        except (TypeError, ValueError):
+            return default
+
+    def _replay_cached_source(self, source: str, cache_key: str, refresh_task, emit) -> bool:
+        if not self.settings.get("search_cache_enabled", True): return False
+        entry = db_manager.get_product_cache_entry(cache_key)
+        if not entry: return False
+        products, timestamp = entry
+        age_hours = (datetime.now(timezone.utc).replace(tzinfo=None) - timestamp).total_seconds() / 3600 if timestamp else float("inf")
+        if age_hours > self._search_cache_hours("search_cache_max_age_hours", 168):
+            logging.info(f"Önbellek ({source}): '{cache_key}' kaydı çok eski ({age_hours:.1f} saat), canlı arama yapılacak.")
+            return False
+        logging.info(f"Önbellek ({source}): '{cache_key}' için {len(products)} ürün önbellekten gönderiliyor ({age_hours:.1f} saatlik).")
+        for product in products:
+            emit(product)
+        if age_hours > self._search_cache_hours("search_cache_ttl_hours", 12):
+            self._refresh_cached_source_in_background(source, cache_key, refresh_task)
+        return True
+
+    def _store_cached_source(self, source: str, cache_key: str, products: list):
+        if not self.settings.get("search_cache_enabled", True) or not products: return
+        db_manager.save_product_cache_entry(cache_key, products)
+
+    def _refresh_cached_source_in_background(self, source: str, cache_key: str, refresh_task):
+        with self.cache_refresh_lock:
+            if cache_key in self.cache_refreshes_in_flight: return
+            self.cache_refreshes_in_flight.add(cache_key)
+        def refresh():
+            refreshed_products = []
+            try:
+                logging.info(f"Önbellek ({source}): '{cache_key}' arka planda yenileniyor...")
+                # Kaynakta boş yer yoksa yenileme atlanır; kayıt bir sonraki okumada yeniden denenir.
+                with self.source_scheduler.slot(source, self.shutdown_event, wait=False) as acquired:
+                    if not acquired:
+                        logging.info(f"Önbellek ({source}): kaynak meşgul, '{cache_key}' yenilemesi ertelendi.")
+                        return
+                    with profiler.span(f"{source}.cache_refresh", "search", source=source):
+                        completed = refresh_task(self.shutdown_event, refreshed_products.append)
+                if completed and not self.shutdown_event.is_set():
+                    self._store_cached_source(source, cache_key, refreshed_products)
+                    logging.info(f"Önbellek ({source}): '{cache_key}' yenilendi ({len(refreshed_products)} ürün).")
+            except Exception as e:
+                logging.error(f"Önbellek yenilenirken hata ({cache_key}): {e}", exc_info=True)
+            finally:
+                with self.cache_refresh_lock: self.cache_refreshes_in_flight.discard(cache_key)
+        threading.Thread(target=refresh, name=f"Cache-Refresh-{source}", daemon=True).start()
+
+    def _run_source_task(self, source: str, task, cancel_event: threading.Event, emit, term: str = None) -> bool:
+        wait_start = profiler.now()
+        with self.source_scheduler.slot(source, cancel_event) as acquired:
+            profiler.record("scheduler.wait", "search", wait_start, source=source, term=term)
+            if not acquired: return False
+            with profiler.span(f"{source}.task", "search", source=source, term=term):
+                return task(cancel_event, emit)
+
+    def _report_search_profile(self, search_term: str, search_term_variations: set, profile_start: int, total_found: int, context: Dict = None):
+        """Aramanın span'lerini Chrome trace olarak kaydeder ve kaynak bazlı özeti arayüze gönderir."""
+        spans = profiler.spans_between(profile_start, terms=search_term_variations | {search_term.lower()})
+        if not spans: return
+        wall_ms = (profiler.now() - profile_start) / 1e6
+        safe_term = re.sub(r'[^\w.-]+', '_', search_term)[:40] or "arama"
+        trace_path = profiler.export_chrome_trace(spans, PROFILE_TRACES_DIR / f"search-{datetime.now():%Y%m%d-%H%M%S}-{safe_term}.json")
+        try:
+            trace_files = sorted(PROFILE_TRACES_DIR.glob("search-*.json"), key=lambda f: f.stat().st_mtime)
+            for old_file in trace_files[:-MAX_PROFILE_TRACE_FILES]: old_file.unlink(missing_ok=True)
+        except OSError as e: logging.debug(f"Eski profil izleri temizlenemedi: {e}")
+        summary = {"term": search_term, "wall_ms": round(wall_ms, 1), "total_found": total_found, "span_count": len(spans), "sources": profiler.summarize(spans), "hosts": supplier_io.get_host_stats(), "trace_file": str(trace_path) if trace_path else None}
+        logging.info(f"Arama profili: '{search_term}' {wall_ms:.0f} ms, {len(spans)} span, iz dosyası: {trace_path}")
+        send_to_frontend("search_profile", summary, context=context)
+
+    def search_and_compare(self, search_data: dict, context: Dict = None, cancel_event: threading.Event = None):
         start_time = time.monotonic()
-        if self.search_cancelled.is_set():
+        profile_start = profiler.now()
+        cancel_event = cancel_event or self.search_cancelled
+        if cancel_event.is_set():
             logging.warning("Arama başlamadan iptal edildi (search_and_compare başlangıç kontrolü)!")
             send_to_frontend("search_complete", {"status": "cancelled"})
             return
@@ -852,153 +1089,44 @@ class ComparisonEngine:
         logging.info(f"Oluşturulan arama varyasyonları: {search_term_variations}")
         total_found = 0
         total_found_lock = threading.Lock()
-        sigma_found_count = 0
-        sigma_found_lock = threading.Lock()
-        with ThreadPoolExecutor(max_workers=len(enabled_brands), thread_name_prefix="Source-Streamer") as executor:
-            def tci_task():
+        source_tasks = self._build_source_tasks(search_data, search_term_variations, is_exact_cas_search)
+        collected_products: Dict[str, list] = {}
+        def make_emit(source: str):
+            collected_products[source] = []
+            def emit(product: Dict[str, Any]):
                 nonlocal total_found
-                found_product_codes = set()
-                try:
-                    for term_variation in search_term_variations:
-                        if self.search_cancelled.is_set(): break
-                        logging.info(f"TCI: Varyasyon aranıyor: '{term_variation}'")
-                        for product_page in self.tci_api.get_products(term_variation, self.search_cancelled):
-                            if self.search_cancelled.is_set(): break
-                            for product in product_page:
-                                if self.search_cancelled.is_set(): break
-                                product_code_lower = (product.code or "").lower()
-                                if product_code_lower in found_product_codes: continue
-                                match_found = False
-                                term_lower = term_variation.lower()
-                                product_name_lower = (product.name or "").lower()
-                                product_code_lower = (product.code or "").lower()
-                                cas_number_lower = (product.cas_number or "").lower()
-                                if search_logic == "exact":
-                                    if (term_lower in product_name_lower or (term_lower in product_code_lower or product_code_lower in term_lower) or (cas_number_lower and term_lower == cas_number_lower)):
-                                        match_found = True
-                                else: match_found = True
-                                if match_found:
-                                    processed = self._process_tci_product(product, context)
-                                    send_to_frontend("product_found", {"product": processed}, context=context)
-                                    with total_found_lock: total_found += 1
-                                    if product_code_lower: found_product_codes.add(product_code_lower)
-                except Exception as e:
-                    logging.error(f"TCI akış hatası: {e}", exc_info=True)
-            def sigma_task():
-                nonlocal total_found, sigma_found_count
-                found_product_numbers = set()
-                with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="Sigma-Processor") as processor:
-                    try:
-                        self.currency_converter.get_parities()
-                        futures = []
-                        for term_variation in search_term_variations:
-                            if self.search_cancelled.is_set(): break
-                            logging.info(f"Sigma: Varyasyon aranıyor: '{term_variation}'")
-                            variation_search_data = search_data.copy()
-                            variation_search_data["searchTerm"] = term_variation
-                            raw_product_stream = self.sigma_api.search_products(term_variation, self.search_cancelled)
-                            for raw_product in raw_product_stream:
-                                if self.search_cancelled.is_set(): break
-                                product_number = raw_product.get('product_number')
-                                if product_number in found_product_numbers: continue
-                                if product_number: found_product_numbers.add(product_number)
-                                futures.append(processor.submit(self._process_single_sigma_product_and_send, raw_product, context, variation_search_data))
-                        for future in as_completed(futures):
-                            if future.result():
-                                with total_found_lock: total_found += 1
-                                with sigma_found_lock: sigma_found_count += 1
-                    except Exception as e:
-                        logging.error(f"Sigma akış hatası: {e}", exc_info=True)
-            def orkim_task():
-                nonlocal total_found
-                found_product_codes = set()
+                send_to_frontend("product_found", {"product": product}, context=context)
+                with total_found_lock:
+                    total_found += 1
+                    collected_products[source].append(product)
+            return emit
+        with ThreadPoolExecutor(max_workers=len(enabled_brands), thread_name_prefix="Source-Streamer") as executor:
+            future_to_source = {}
+            for source in ("tci", "sigma", "orkim", "itk"):
+                if source not in enabled_brands: continue
+                cache_key = self._search_cache_key(source, normalized_term, search_logic, enabled_brands) if source in CACHED_SEARCH_SOURCES else None
+                if cache_key and self._replay_cached_source(source, cache_key, source_tasks[source], make_emit(source)):
+                    # Önbellekten gelen Sigma ürünleri _prepare_sigma_product'tan geçmediği için CAS -> Merck eşleşmeleri burada kurulur.
+                    if source == "sigma" and is_exact_cas_search:
+                        for product in collected_products[source]:
+                            if (product.get('cas_number') or '').lower() == normalized_term: self._register_cas_sigma_code(product.get('product_number'), search_term)
+                    continue
+                future_to_source[executor.submit(self._run_source_task, source, source_tasks[source], cancel_event, make_emit(source), normalized_term)] = (source, cache_key)
+            for future in as_completed(future_to_source):
+                source, cache_key = future_to_source[future]
                 try:
-                    if self.orkim_api:
-                        for term_variation in search_term_variations:
-                            if self.search_cancelled.is_set(): break
-                            logging.info(f"Orkim: Varyasyon aranıyor: '{term_variation}'")
-                            orkim_results = self.orkim_api.search_products(term_variation, self.search_cancelled, search_logic)
-                            if self.search_cancelled.is_set(): return
-                            variation_search_data = search_data.copy()
-                            variation_search_data["searchTerm"] = term_variation
-                            for product in orkim_results:
-                                if self.search_cancelled.is_set(): break
-                                product_code = product.get("k_kodu", "N/A")
-                                if product_code in found_product_codes: continue
-                                processed = self._process_orkim_product(product, variation_search_data, is_exact_cas_search, context)
-                                send_to_frontend("product_found", {"product": processed}, context=context)
-                                with total_found_lock: total_found += 1
-                                if product_code != "N/A": found_product_codes.add(product_code)
-                except Exception as e:
-                    logging.error(f"Orkim akış hatası: {e}", exc_info=True)
-            def itk_task():
-                nonlocal total_found
-                itk_search_terms = search_term_variations
-                found_codes = set()
-                with itk_cache_lock: cache_to_search = list(itk_product_cache)
-                for product in cache_to_search:
-                    if self.search_cancelled.is_set(): return
-                    code_lower = product.get("product_code", "").lower()
-                    name_lower = product.get("product_name", "").lower()
-                    match_found = False
-                    for term_variation in itk_search_terms:
-                        if search_logic == "exact":
-                            if (term_variation == name_lower or (term_variation in code_lower)):
-                                match_found = True
-                                break
-                        else:
-                            score = 100 if term_variation == code_lower else max(fuzz.partial_ratio(term_variation, name_lower), fuzz.partial_ratio(term_variation, code_lower))
-                            if score > 85:
-                                match_found = True
-                                break
-                    if not match_found and search_logic != "exact":
-                        term_lower = search_term.lower()
-                        score = 100 if term_lower == code_lower else max(fuzz.partial_ratio(term_lower, name_lower), fuzz.partial_ratio(term_lower, code_lower))
-                        if score > 85: match_found = True
-                    if match_found and code_lower not in found_codes:
-                        processed = self._process_itk_product(product, search_data, is_exact_cas_search, context)
-                        send_to_frontend("product_found", {"product": processed}, context=context)
-                        with total_found_lock: total_found += 1
-                        if code_lower: found_codes.add(code_lower)
-            futures = []
-            if 'tci' in enabled_brands: futures.append(executor.submit(tci_task))
-            if 'sigma' in enabled_brands: futures.append(executor.submit(sigma_task))
-            if 'orkim' in enabled_brands: futures.append(executor.submit(orkim_task))
-            if 'itk' in enabled_brands: futures.append(executor.submit(itk_task))
-            for future in as_completed(futures):
-                try: future.result()
+                    if future.result() and cache_key and not cancel_event.is_set():
+                        self._store_cached_source(source, cache_key, collected_products[source])
                 except Exception as task_exc: logging.error(f"Arama görevi sırasında hata: {task_exc}", exc_info=True)
-        if total_found == 0 and not self.search_cancelled.is_set() and 'netflex' in enabled_brands:
+        if total_found == 0 and not cancel_event.is_set() and 'netflex' in enabled_brands:
             logging.info(f"İlk aşamada sonuç bulunamadı, şimdi Netflex'te varyasyonlar aranıyor: {search_term_variations}")
-            found_product_codes = set()
-            try:
-                for term_variation in search_term_variations:
-                    if self.search_cancelled.is_set(): break
-                    logging.info(f"Netflex: Varyasyon aranıyor: '{term_variation}'")
-                    netflex_results = self.netflex_api.search_products(term_variation, self.search_cancelled)
-                    if not self.search_cancelled.is_set():
-                        term_lower = term_variation.lower()
-                        for product in netflex_results:
-                            if self.search_cancelled.is_set(): break
-                            product_code_lower = (product.get('product_code', '') or "").lower()
-                            if product_code_lower in found_product_codes: continue
-                            match_found = False
-                            product_name_lower = (product.get('product_name', '') or "").lower()
-                            if search_logic == "exact":
-                                if (term_lower in product_name_lower or (term_lower in product_code_lower or product_code_lower in term_lower)):
-                                    match_found = True
-                            else: match_found = True
-                            if match_found:
-                                processed = self._process_netflex_product(product, context)
-                                send_to_frontend("product_found", {"product": processed}, context=context)
-                                with total_found_lock: total_found += 1
-                                if product_code_lower: found_product_codes.add(product_code_lower)
-            except netflex.AuthenticationError:
-                logging.error("Netflex kimlik doğrulaması başarısız oldu (2. aşama Netflex araması).")
-            except Exception as e:
-                logging.error(f"İkincil Netflex araması sırasında hata: {e}", exc_info=True)
-        if not self.search_cancelled.is_set():
+            cache_key = self._search_cache_key("netflex", normalized_term, search_logic, enabled_brands)
+            if not self._replay_cached_source("netflex", cache_key, source_tasks["netflex"], make_emit("netflex")):
+                if self._run_source_task("netflex", source_tasks["netflex"], cancel_event, make_emit("netflex"), normalized_term) and not cancel_event.is_set():
+                    self._store_cached_source("netflex", cache_key, collected_products["netflex"])
+        if not cancel_event.is_set():
             logging.info(f"Arama Tamamlandı: '{search_term}', Toplam={total_found}, Süre={time.monotonic() - start_time:.2f}s")
+            if profiler.enabled: self._report_search_profile(search_term, search_term_variations, profile_start, total_found, context)
             send_to_frontend("search_complete", {"status": "complete", "total_found": total_found}, context=context)
         elif not context:
             send_to_frontend("search_complete", {"status": "cancelled"})
@@ -1013,32 +1141,88 @@ class ComparisonEngine:
             send_to_frontend("batch_search_complete", {"status": "error", "message": "Dosyadan ürün okunamadı."})
             return
         total_terms = len(search_terms)
-        for i, term in enumerate(search_terms):
-            if self.batch_search_cancelled.is_set(): logging.warning("Toplu arama iptal edildi."); break
-            self.search_cancelled.clear()
-            send_to_frontend("log_search_term", {"term": term})
-            send_to_frontend("batch_search_progress", {"term": term, "current": i + 1, "total": total_terms})
-            admin_logger.info(f"  -> Toplu Arama ({i + 1}/{total_terms}): '{term}'")
-            search_data = {"searchTerm": term, "searchLogic": "similar"}
-            self.search_and_compare(search_data, context={"batch_search_term": term})
-            if self.search_cancelled.is_set() and not self.batch_search_cancelled.is_set():
-                logging.info(f"'{term}' araması atlandı (cancel_current_term).")
-                continue
+        try:
+            concurrency = max(1, int(self.settings.get("batch_search_concurrency", 4)))
+        except (TypeError, ValueError):
+            concurrency = 1
+        if concurrency == 1:
+            for i, term in enumerate(search_terms):
+                if self.batch_search_cancelled.is_set(): logging.warning("Toplu arama iptal edildi."); break
+                self.search_cancelled.clear()
+                send_to_frontend("log_search_term", {"term": term})
+                send_to_frontend("batch_search_progress", {"term": term, "current": i + 1, "total": total_terms})
+                admin_logger.info(f"  -> Toplu Arama ({i + 1}/{total_terms}): '{term}'")
+                search_data = {"searchTerm": term, "searchLogic": "similar"}
+                self.search_and_compare(search_data, context={"batch_search_term": term})
+                if self.search_cancelled.is_set() and not self.batch_search_cancelled.is_set():
+                    logging.info(f"'{term}' araması atlandı (cancel_current_term).")
+                    continue
+        else:
+            self._run_batch_terms_concurrently(search_terms, concurrency)
         status = "cancelled" if self.batch_search_cancelled.is_set() else "complete"
         send_to_frontend("batch_search_complete", {"status": status})
         if status == 'complete': admin_logger.info(f"Toplu Arama Tamamlandı: Müşteri='{customer_name}'")
 
+    def _run_batch_terms_concurrently(self, search_terms: List[str], concurrency: int):
+        # Terimler sırayla başlatılır (ilerleme mesajları da bu sırayla gider); her terimin kendi iptal sinyali vardır.
+        # Kaynak başına eşzamanlılık source_scheduler tarafından sınırlanır.
+        total_terms = len(search_terms)
+        term_slots = threading.Semaphore(concurrency)
+        logging.info(f"Toplu arama {concurrency} eşzamanlı terimle yürütülüyor. Kaynak limitleri: {self.source_scheduler.get_limits()}")
+        def run_term(index: int, term: str, term_cancel: threading.Event):
+            try:
+                self.search_and_compare({"searchTerm": term, "searchLogic": "similar"}, context={"batch_search_term": term}, cancel_event=term_cancel)
+                if term_cancel.is_set() and not self.batch_search_cancelled.is_set():
+                    logging.info(f"'{term}' araması atlandı (cancel_current_term).")
+            except Exception as e:
+                logging.error(f"Toplu arama terimi '{term}' işlenirken hata: {e}", exc_info=True)
+            finally:
+                with self.batch_terms_lock: self.active_batch_terms.pop(index, None)
+                term_slots.release()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="Batch-Term") as executor:
+            for i, term in enumerate(search_terms):
+                acquired = False
+                while not acquired and not self.batch_search_cancelled.is_set():
+                    acquired = term_slots.acquire(timeout=0.5)
+                if self.batch_search_cancelled.is_set():
+                    if acquired: term_slots.release()
+                    logging.warning("Toplu arama iptal edildi.")
+                    break
+                term_cancel = threading.Event()
+                with self.batch_terms_lock:
+                    self.active_batch_terms[i] = term_cancel
+                    self.current_batch_term_index = i
+                send_to_frontend("log_search_term", {"term": term})
+                send_to_frontend("batch_search_progress", {"term": term, "current": i + 1, "total": total_terms})
+                admin_logger.info(f"  -> Toplu Arama ({i + 1}/{total_terms}): '{term}'")
+                executor.submit(run_term, i, term, term_cancel)
+        with self.batch_terms_lock: self.current_batch_term_index = None
+
     def force_cancel(self):
         self.search_cancelled.set()
+        with self.batch_terms_lock:
+            # Eşzamanlı toplu aramada "mevcut terim", arayüze en son ilerleme mesajı gönderilen terimdir.
+            current_term_cancel = self.active_batch_terms.get(self.current_batch_term_index)
+        if current_term_cancel: current_term_cancel.set()
         logging.info("Anlık arama iptal sinyali gönderildi.")
 
     def force_cancel_batch(self):
         self.batch_search_cancelled.set()
+        with self.batch_terms_lock:
+            for term_cancel in self.active_batch_terms.values(): term_cancel.set()
         self.force_cancel()
         logging.info("Toplu arama iptal sinyali gönderildi.")
 
+    def shutdown(self):
+        """Aramaları ve arka plan önbellek yenilemelerini iptal eder."""
+        self.shutdown_event.set()
+        self.force_cancel_batch()
+
 def main():
     logging.info("=" * 40 + "\nPython Arka Plan Servisi Başlatıldı\n" + "=" * 40)
+    # Çerçeveleme anlaşması diğer tüm mesajlardan önce yapılmalıdır.
+    frontend_writer.negotiate(ipc_protocol.requested_framing())
+    db_manager.init_db()
     start_notification_scheduler()
     obscura_binary_path = os.getenv("OBSCURA_BINARY_PATH")
     if not obscura_binary_path:
@@ -1050,10 +1234,10 @@ def main():
             obscura_binary_path = bundled_unix
         else:
             obscura_binary_path = None
+    # Süreç başına worker sayısı CPU çekirdeklerinden, süreç sayısı tarayıcı talebinden belirlenir.
     obscura_mgr = ObscuraManager(
         binary_path=obscura_binary_path,
         port=9222,
-        workers=4,
         stealth=True
     )
     if not obscura_mgr.start():
@@ -1062,9 +1246,10 @@ def main():
         return
     cdp_endpoint = obscura_mgr.get_cdp_endpoint()
     services_initialized = threading.Event()
-    sigma_api = sigma.SigmaAldrichAPI(cdp_endpoint=cdp_endpoint)
-    tci_api = tci.TciScraper(cdp_endpoint=cdp_endpoint)
-    currency_api = currency_converter.CurrencyConverter()
+    sigma_api = sigma.SigmaAldrichAPI(cdp_endpoint=cdp_endpoint, cookie_jar_path=SIGMA_COOKIE_JAR_FILE_PATH)
+    tci_api = tci.TciScraper(cdp_endpoint=cdp_endpoint, endpoint_pool=obscura_mgr)
+    currency_api = currency_converter.currency_converter
+    currency_api.start(CURRENCY_SNAPSHOT_FILE_PATH)
     itk_api = None
     orkim_api = None
     netflex_api = None
@@ -1072,23 +1257,51 @@ def main():
     search_thread = None
     batch_search_thread = None
 
+    itk_store = itk_snapshot.ItkCatalogueStore(ITK_SNAPSHOT_FILE_PATH)
+    itk_refresh_lock = threading.Lock()
+
+    def _swap_itk_cache(products):
+        # İndeks kilit dışında kurulur; aramalar eski indeksi kullanmaya devam eder ve yalnızca referans değişimi kilitlenir.
+        search_index = itk_index.ItkSearchIndex(products)
+        with itk_cache_lock:
+            global itk_product_cache, itk_search_index
+            itk_product_cache = products
+            itk_search_index = search_index
+
     def _populate_itk_cache(api_instance):
         if not api_instance: return
-        logging.info("ITK ürün önbelleği oluşturuluyor...")
-        start_time = time.monotonic()
+        if not itk_refresh_lock.acquire(blocking=False):
+            logging.info("ITK önbelleği zaten yenileniyor, yeni istek atlandı.")
+            return
         try:
-            products = api_instance.get_all_products()
-            with itk_cache_lock:
-                global itk_product_cache
-                itk_product_cache = products
-            duration = time.monotonic() - start_time
-            logging.info(f"ITK önbelleği {len(products)} ürünle {duration:.2f} saniyede tamamlandı.")
+            start_time = time.monotonic()
+            username = api_instance.USERNAME
+            categories = itk_store.load(username)
+            if categories:
+                products = itk_snapshot.products_from_categories(categories)
+                _swap_itk_cache(products)
+                logging.info(f"ITK önbelleği diskteki anlık görüntüden {len(products)} ürünle {time.monotonic() - start_time:.2f} saniyede yüklendi.")
+            logging.info("ITK kataloğu arka planda yenileniyor...")
+            refreshed, changed = api_instance.refresh_catalogue(categories)
+            if not refreshed:
+                logging.warning("ITK kataloğu yenilenemedi; mevcut önbellek korunuyor.")
+                return
+            if changed or not categories:
+                products = itk_snapshot.products_from_categories(refreshed)
+                _swap_itk_cache(products)
+                itk_store.save(username, refreshed)
+                logging.info(f"ITK önbelleği {len(products)} ürünle {time.monotonic() - start_time:.2f} saniyede güncellendi.")
+            else:
+                logging.info(f"ITK kataloğunda değişiklik yok ({time.monotonic() - start_time:.2f}s).")
         except Exception as e:
             logging.error(f"ITK önbelleği oluşturulurken hata: {e}", exc_info=True)
+        finally:
+            itk_refresh_lock.release()
 
     def initialize_services(settings_data: Dict[str, Any]):
         nonlocal netflex_api, engine, orkim_api, itk_api
         logging.info(f"Servisler başlatılıyor...")
+        profiler.set_enabled(settings_data.get("profiling_enabled", False))
         try:
             if netflex_api: netflex_api.update_credentials(settings_data.get("netflex_username"), settings_data.get("netflex_password"))
             else: netflex_api = netflex.NetflexAPI(username=settings_data.get("netflex_username"), password=settings_data.get("netflex_password"))
@@ -1097,12 +1310,16 @@ def main():
                 orkim_api.password = settings_data.get("orkim_password")
                 orkim_api.openai_api_key = os.getenv("OCR_API_KEY")
                 orkim_api.is_logged_in = False
+                orkim_api.set_max_concurrency(settings_data.get("orkim_max_concurrency", 4))
             else:
-                orkim_api = orkim.OrkimScraper(username=settings_data.get("orkim_username"), password=settings_data.get("orkim_password"), openai_api_key=os.getenv("OCR_API_KEY"))
+                orkim_api = orkim.OrkimScraper(username=settings_data.get("orkim_username"), password=settings_data.get("orkim_password"), openai_api_key=os.getenv("OCR_API_KEY"), max_concurrency=settings_data.get("orkim_max_concurrency", 4))
                 threading.Thread(target=orkim_api.run_background_session_manager, name="Orkim-Session-Manager", daemon=True).start()
             if itk_api:
+                itk_credentials_changed = (itk_api.USERNAME, itk_api.PASSWORD) != (settings_data.get("itk_username"), settings_data.get("itk_password"))
                 itk_api.USERNAME = settings_data.get("itk_username")
                 itk_api.PASSWORD = settings_data.get("itk_password")
+                if itk_credentials_changed:
+                    threading.Thread(target=_populate_itk_cache, args=(itk_api,), name="ITK-Cache-Builder", daemon=True).start()
             else:
                 itk_api = itk.ItkScraper(username=settings_data.get("itk_username"), password=settings_data.get("itk_password"))
                 threading.Thread(target=_populate_itk_cache, args=(itk_api,), name="ITK-Cache-Builder", daemon=True).start()
@@ -1112,7 +1329,7 @@ def main():
                 engine.orkim_api = orkim_api
                 engine.itk_api = itk_api
             else:
-                engine = ComparisonEngine(sigma_api, netflex_api, tci_api, orkim_api, itk_api, initial_settings=settings_data)
+                engine = ComparisonEngine(sigma_api, netflex_api, tci_api, orkim_api, itk_api, initial_settings=settings_data, currency_api=currency_api)
             def init_task():
                 try:
                     netflex_api.get_token()
@@ -1143,11 +1360,8 @@ def main():
     else:
         initialize_services(loaded_settings)
 
-    for line_bytes in sys.stdin.buffer:
-        line = line_bytes.decode('utf-8', errors='replace')
-        if not line.strip(): continue
+    for request in ipc_protocol.CommandReader(sys.stdin.buffer):
         try:
-            request = json.loads(line.strip())
             action, data = request.get("action"), request.get("data")
             logging.debug(f"Komut alındı: Eylem='{action}'")
             if action == "load_settings":
@@ -1198,6 +1412,7 @@ def main():
             elif action == "export": send_to_frontend("export_result", export_to_excel(data))
             elif action == "export_meetings": send_to_frontend("export_meetings_result", export_meetings_to_excel(data))
             elif action == "get_parities": send_to_frontend("parities_updated", currency_api.get_parities())
+            elif action == "get_rate_limits": send_to_frontend("rate_limits", supplier_io.get_host_stats())
             elif action == "get_orkim_stock" and isinstance(data, dict) and data.get("url"):
                 if not orkim_api:
                     logging.warning("Orkim API hazır değilken stok sorgusu istendi.")
@@ -1208,8 +1423,7 @@ def main():
                 logging.info("Kapatma komutu alındı. Kaynaklar serbest bırakılıyor...")
                 stop_notification_scheduler()
                 if engine:
-                    engine.force_cancel()
-                    engine.force_cancel_batch()
+                    engine.shutdown()
                     if search_thread and search_thread.is_alive(): search_thread.join(1.0)
                     if batch_search_thread and batch_search_thread.is_alive(): batch_search_thread.join(1.0)
                 driver_shutdown_errors = False
@@ -1222,6 +1436,10 @@ def main():
                 try:
                     if orkim_api: orkim_api.close_driver()
                 except Exception as e: logging.error(f"Orkim oturumu kapatılırken hata: {e}"); driver_shutdown_errors = True
+                currency_api.stop()
+                try:
+                    supplier_io.close()
+                except Exception as e: logging.error(f"Tedarikçi G/Ç döngüsü kapatılırken hata: {e}")
                 try:
                     obscura_mgr.stop()
                     logging.info("Obscura CDP sunucusu kapatıldı.")
@@ -1231,11 +1449,9 @@ def main():
                 else: logging.info("Tüm sürücüler ve oturumlar başarıyla kapatıldı.")
                 logging.info("Arka plan servisinden çıkılıyor.")
                 send_to_frontend('python_shutdown_complete', {})
-                sys.stdout.flush()
+                frontend_writer.flush()
                 time.sleep(0.1)
                 break
-        except json.JSONDecodeError:
-            logging.error(f"Geçersiz JSON alındı: {line.strip()}")
         except Exception as e:
             logging.critical(f"Ana döngüde beklenmedik bir hata oluştu: {e}", exc_info=True)
     logging.info("Python ana döngüsü sona erdi.")
@@ -1247,5 +1463,5 @@ if __name__ == '__main__':
     except Exception as e:
         logging.critical(f"main() fonksiyonunda yakalanmayan kritik hata: {e}", exc_info=True)
         send_to_frontend('python_shutdown_complete', {'error': True})
-        sys.stdout.flush()
+        frontend_writer.flush()
         time.sleep(0.1)
@@ -1,63 +1,199 @@
-import requests
-import xml.etree.ElementTree as ET
+# -*- coding: utf-8 -*-
+"""
+Döviz Kuru Dönüştürücü
+======================
+TCMB kurları tek bir paylaşılan dönüştürücüde, değişmez bir anlık görüntü
+(RatesSnapshot) olarak yayınlanır. Okuyucular yalnızca o anki görüntünün
+referansını alır; kilit beklemez ve ağ isteği yapmaz. Kurlar bir arka plan
+thread'inde süresi dolmadan önce yenilenir, yenileme başarısız olursa eski
+görüntü kullanılmaya devam edilir ve kısa aralıklarla yeniden denenir.
+
+Son başarılı görüntü diske yazılır; uygulama açılışında kurlar buradan anında
+yüklenir ve TCMB erişilemezken de bu değerler kullanılır. Arama thread'leri
+yalnızca hiç görüntü yokken (ilk kurulumda) ilk indirmeyi kısa bir süre bekler.
+"""
+
+import json
 import logging
+import os
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
 from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+import requests
+
+from .profiler import profiler
+
+
+TCMB_URL = "https://www.tcmb.gov.tr/kurlar/today.xml"
+REFRESH_INTERVAL_SECONDS = 3600
+# Görüntünün süresi dolmadan bu kadar önce yenilenir.
+REFRESH_AHEAD_SECONDS = 300
+RETRY_INTERVAL_SECONDS = 60
+FIRST_FETCH_WAIT_SECONDS = 15
+SNAPSHOT_VERSION = 1
+REQUIRED_CODES = ("USD", "GBP", "EUR")
+
+
+@dataclass(frozen=True)
+class RatesSnapshot:
+    rates: Mapping[str, float]
+    fetched_at: datetime
+    parities: Mapping[str, Any] = field(default_factory=dict)
+
+    def age_seconds(self) -> float:
+        return (datetime.now() - self.fetched_at).total_seconds()
+
+
+def _compute_parities(rates: Mapping[str, float], fetched_at: datetime) -> Dict[str, Any]:
+    missing = [code for code in REQUIRED_CODES if not rates.get(code)]
+    if missing:
+        logging.error(f"Parite hesaplaması için gerekli kurlar bulunamadı: {', '.join(missing)}")
+        return {"error": f"Gerekli kurlar bulunamadı: {', '.join(missing)}"}
+    eur_try = rates["EUR"]
+    return {
+        "usd_eur": round(rates["USD"] / eur_try, 4),
+        "gbp_eur": round(rates["GBP"] / eur_try, 4),
+        "try_eur": round(1 / eur_try, 6),
+        "last_updated": fetched_at.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def _build_snapshot(rates: Dict[str, float], fetched_at: datetime) -> RatesSnapshot:
+    return RatesSnapshot(MappingProxyType(dict(rates)), fetched_at, MappingProxyType(_compute_parities(rates, fetched_at)))
+
 
 class CurrencyConverter:
-    def __init__(self):
-        self.url = "https://www.tcmb.gov.tr/kurlar/today.xml"
-        self.rates = {}
-        self.last_updated = None
+    def __init__(self, snapshot_path: Path = None, url: str = TCMB_URL):
+        self.url = url
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._snapshot: Optional[RatesSnapshot] = None
+        self._fetch_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._first_snapshot = threading.Event()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread = None
 
-    def _fetch_rates(self):
+    @property
+    def snapshot(self) -> Optional[RatesSnapshot]:
+        return self._snapshot
+
+    def _publish(self, snapshot: RatesSnapshot):
+        self._snapshot = snapshot
+        self._first_snapshot.set()
+
+    def _fetch_rates(self) -> Optional[Dict[str, float]]:
         try:
             timestamp_url = f"{self.url}?_={int(datetime.now().timestamp() * 1000)}"
-            response = requests.get(timestamp_url, timeout=15)
+            with profiler.span("currency.fetch", "currency") as span:
+                response = requests.get(timestamp_url, timeout=15)
+                span.set(bytes=len(response.content), status=response.status_code)
             response.raise_for_status()
             xml_root = ET.fromstring(response.content)
-            self.rates = {}
+            rates = {}
             for currency in xml_root.findall('Currency'):
                 code = currency.get('CurrencyCode')
                 forex_selling_tag = currency.find('ForexSelling')
                 if code and forex_selling_tag is not None and forex_selling_tag.text:
                     try:
-                        rate = float(forex_selling_tag.text)
-                        self.rates[code] = rate
+                        rates[code] = float(forex_selling_tag.text)
                     except (ValueError, TypeError):
                         continue
-            self.last_updated = datetime.now()
-            logging.info(f"TCMB döviz kurları başarıyla güncellendi. Toplam {len(self.rates)} kur bulundu.")
-            return True
+            logging.info(f"TCMB döviz kurları başarıyla güncellendi. Toplam {len(rates)} kur bulundu.")
+            return rates
         except requests.exceptions.RequestException as e:
             logging.error(f"TCMB döviz kuru verisi çekilirken ağ hatası oluştu: {e}")
         except ET.ParseError as e:
             logging.error(f"TCMB'den gelen XML verisi parse edilemedi: {e}")
         except Exception as e:
             logging.error(f"Döviz kurları alınırken beklenmedik bir hata oluştu: {e}")
-        return False
+        return None
 
-    def get_parities(self) -> dict:
-        if not self.rates or (self.last_updated and (datetime.now() - self.last_updated).total_seconds() > 3600):
-            if not self._fetch_rates():
-                return {"error": "Döviz kurları alınamadı."}
+    def refresh(self) -> bool:
+        """Kurları TCMB'den indirip yeni görüntüyü yayınlar. Aynı anda yalnızca bir indirme yapılır."""
+        with self._fetch_lock:
+            rates = self._fetch_rates()
+            if not rates: return False
+            snapshot = _build_snapshot(rates, datetime.now())
+            if "error" in snapshot.parities and self._snapshot is not None and "error" not in self._snapshot.parities:
+                logging.warning("Yeni kurlar eksik, önceki döviz kuru görüntüsü korunuyor.")
+                return False
+            self._publish(snapshot)
+            self._save_snapshot(snapshot)
+            return True
+
+    def _load_snapshot(self) -> Optional[RatesSnapshot]:
+        if self.snapshot_path is None or not self.snapshot_path.exists(): return None
         try:
-            usd_try = self.rates.get("USD")
-            gbp_try = self.rates.get("GBP")
-            eur_try = self.rates.get("EUR")
-            if not all([usd_try, gbp_try, eur_try]):
-                missing = [code for code, rate in [("USD", usd_try), ("GBP", gbp_try), ("EUR", eur_try)] if not rate]
-                logging.error(f"Parite hesaplaması için gerekli kurlar bulunamadı: {', '.join(missing)}")
-                return {"error": f"Gerekli kurlar bulunamadı: {', '.join(missing)}"}
-            usd_eur_parity = usd_try / eur_try
-            gbp_eur_parity = gbp_try / eur_try
-            return {
-                "usd_eur": round(usd_eur_parity, 4),
-                "gbp_eur": round(gbp_eur_parity, 4),
-                "last_updated": self.last_updated.strftime("%Y-%m-%d %H:%M:%S") if self.last_updated else "N/A"
-            }
-        except ZeroDivisionError:
-            logging.error("Parite hesaplaması sırasında EUR kuru sıfır veya geçersiz olduğu için hata oluştu.")
-            return {"error": "EUR kuru sıfır veya geçersiz."}
-        except Exception as e:
-            logging.error(f"Parite hesaplaması sırasında beklenmedik hata: {e}")
-            return {"error": "Parite hesaplanırken bir hata oluştu."}
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != SNAPSHOT_VERSION: return None
+            rates = {code: float(rate) for code, rate in data["rates"].items()}
+            return _build_snapshot(rates, datetime.fromisoformat(data["fetched_at"]))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.warning(f"Döviz kuru görüntüsü okunamadı, yok sayılıyor: {e}")
+            return None
+
+    def _save_snapshot(self, snapshot: RatesSnapshot):
+        if self.snapshot_path is None: return
+        data = {"version": SNAPSHOT_VERSION, "fetched_at": snapshot.fetched_at.isoformat(timespec="seconds"), "rates": dict(snapshot.rates)}
+        tmp_path = self.snapshot_path.with_suffix(self.snapshot_path.suffix + ".tmp")
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logging.warning(f"Döviz kuru görüntüsü kaydedilemedi: {e}")
+
+    def _next_refresh_delay(self) -> float:
+        snapshot = self._snapshot
+        if snapshot is None: return 0.0
+        return max(0.0, REFRESH_INTERVAL_SECONDS - REFRESH_AHEAD_SECONDS - snapshot.age_seconds())
+
+    def _refresh_loop(self):
+        while not self._stopped.is_set():
+            delay = self._next_refresh_delay()
+            if delay > 0:
+                self._wakeup.wait(delay)
+                self._wakeup.clear()
+                continue
+            if not self.refresh():
+                self._stopped.wait(RETRY_INTERVAL_SECONDS)
+
+    def start(self, snapshot_path: Path = None):
+        """Diskteki görüntüyü yükler ve arka plan yenilemesini başlatır; birden fazla çağrı güvenlidir."""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive(): return
+            if snapshot_path is not None: self.snapshot_path = Path(snapshot_path)
+            if self._snapshot is None and (stored := self._load_snapshot()) is not None:
+                self._publish(stored)
+                logging.info(f"Döviz kurları diskten yüklendi (kayıt: {stored.fetched_at:%Y-%m-%d %H:%M:%S}).")
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._refresh_loop, name="Currency-Refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def get_parities(self) -> dict:
+        """Güncel görüntünün paritelerini döndürür; ağ isteği yapmaz. Görüntü yoksa ilk indirmeyi kısa süre bekler."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.start()
+            self._first_snapshot.wait(FIRST_FETCH_WAIT_SECONDS)
+            snapshot = self._snapshot
+            if snapshot is None: return {"error": "Döviz kurları alınamadı."}
+        parities = dict(snapshot.parities)
+        if "error" not in parities and snapshot.age_seconds() > REFRESH_INTERVAL_SECONDS:
+            parities["stale"] = True
+        return parities
+
+
+currency_converter = CurrencyConverter()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Akışlı Excel Dışa Aktarma
+=========================
+Teklif ve etkinlik listelerini openpyxl'in write-only modunda yazar. Satırlar bir
+üreteçten tek tek gelir; sütun genişlikleri satırlar eklenirken artımlı olarak
+hesaplanır, böylece çalışma kitabı bellekte hücre nesneleri olarak tutulmaz ve
+genişlik için ikinci bir tarama yapılmaz.
+
+write-only modda sütun genişlikleri ilk satırdan önce yazılmak zorunda olduğundan
+satırlar önce geçici bir dosyaya (küçük listelerde bellekte kalır) JSON satırları
+olarak alınır, genişlikler belli olunca sayfaya aktarılır.
+"""
+
+import json
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font
+from openpyxl.utils import get_column_letter
+
+from .price_parser import parse_price
+
+
+SPOOL_MEMORY_BYTES = 4 * 1024 * 1024
+PRICE_NUMBER_FORMAT = '#,##0.00'
+QUOTATION_HEADERS = ["Kaynak", "Ürün Adı", "Marka", "Ürün Kodu", "Fiyat", "Para Birimi", "KDV", "Birim", "Stok Durumu"]
+MEETING_HEADERS = ["FİRMA ADI", "YETKİLİSİ", "DEPARTMANI", "MAİL ADRESİ", "TELEFON", "ETKİNLİK TİPİ", "KAYIT TARİHİ", "ETKİNLİK TARİHİ", "AÇIKLAMA"]
+
+
+def parse_price_text(price_str: str) -> Tuple[str, str, Optional[float]]:
+    """Fiyat metninden (para birimi sembolü, KDV, sayısal değer) çıkarır; sayı okunamazsa değer None olur."""
+    record = parse_price(price_str)
+    return record.symbol, f"%{record.vat}" if record.vat is not None else "Yok", record.amount
+
+
+def quotation_rows(products: Iterable[Dict[str, Any]]) -> Iterable[List[Any]]:
+    for product in products:
+        currency_symbol, kdv_str, parsed_price = parse_price_text(str(product.get("price_str", "N/A")))
+        price_val = product.get("price_numeric")
+        excel_price_value = price_val if isinstance(price_val, (int, float)) else (parsed_price if parsed_price is not None else 0)
+        yield [product.get("source", "N/A"), product.get("product_name", "N/A"), product.get("brand", product.get("source", "N/A")), product.get("product_code", "N/A"), excel_price_value, currency_symbol, kdv_str, product.get("unit", "Adet"), product.get("cheapest_netflex_stock", "N/A")]
+
+
+def meeting_rows(meetings: Iterable[Dict[str, Any]]) -> Iterable[List[str]]:
+    for meeting in meetings:
+        formatted_meeting_date = meeting['actual_meeting_date'].strftime('%d.%m.%Y')
+        formatted_note_date = meeting['note_date'].strftime('%d.%m.%Y') if 'note_date' in meeting else 'N/A'
+        row = [meeting.get("companyName", ""), meeting.get("authorizedPerson", ""), meeting.get("department", ""), meeting.get("email", ""), meeting.get("phone", ""), meeting.get("type", "Bilinmiyor").capitalize(), formatted_note_date, formatted_meeting_date, meeting.get("meetingNotes", "")]
+        yield [str(item) for item in row]
+
+
+class StreamingSheet:
+    """
+    Write-only sayfa yazıcısı. append() satırı biriktirir ve sütun genişliklerini
+    günceller; write() genişlikleri, başlığı ve satırları sayfaya aktarır.
+    fixed_widths sütun indeksi -> sabit genişlik, number_formats sütun indeksi -> biçim.
+    """
+
+    def __init__(self, headers: Sequence[str], header_font: Font = None, header_alignment: Alignment = None,
+                 fixed_widths: Dict[int, float] = None, number_formats: Dict[int, str] = None, padding: int = 2, max_width: float = None):
+        self.headers = list(headers)
+        self.header_font = header_font or Font(bold=True)
+        self.header_alignment = header_alignment
+        self.fixed_widths = fixed_widths or {}
+        self.number_formats = number_formats or {}
+        self.padding = padding
+        self.max_width = max_width
+        self._max_lengths = [0] * len(self.headers)
+        self._spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES, mode="w+", encoding="utf-8")
+        self.row_count = 0
+        self._track(self.headers)
+
+    def _track(self, row: Sequence[Any]):
+        lengths = self._max_lengths
+        if len(row) > len(lengths): lengths.extend([0] * (len(row) - len(lengths)))
+        for index, value in enumerate(row):
+            if value is not None and index not in self.fixed_widths:
+                length = len(str(value))
+                if length > lengths[index]: lengths[index] = length
+
+    def append(self, row: Sequence[Any]):
+        self._track(row)
+        self._spool.write(json.dumps(list(row), ensure_ascii=False, default=str))
+        self._spool.write("\n")
+        self.row_count += 1
+
+    def extend(self, rows: Iterable[Sequence[Any]]):
+        for row in rows: self.append(row)
+
+    def column_widths(self) -> List[float]:
+        widths = []
+        for index, length in enumerate(self._max_lengths):
+            width = self.fixed_widths.get(index, length + self.padding)
+            if self.max_width is not None and index not in self.fixed_widths: width = min(width, self.max_width)
+            widths.append(width)
+        return widths
+
+    def write(self, workbook: Workbook, title: str):
+        sheet = workbook.create_sheet(title)
+        for index, width in enumerate(self.column_widths(), start=1):
+            sheet.column_dimensions[get_column_letter(index)].width = width
+        header_cells = []
+        for header in self.headers:
+            cell = WriteOnlyCell(sheet, value=header)
+            cell.font = self.header_font
+            if self.header_alignment: cell.alignment = self.header_alignment
+            header_cells.append(cell)
+        sheet.append(header_cells)
+        self._spool.seek(0)
+        for line in self._spool:
+            row = json.loads(line)
+            for index, number_format in self.number_formats.items():
+                if index < len(row):
+                    cell = WriteOnlyCell(sheet, value=row[index])
+                    cell.number_format = number_format
+                    row[index] = cell
+            sheet.append(row)
+        self._spool.close()
+        return sheet
+
+
+def write_workbook(filepath: Path, sheets: Iterable[Tuple[str, StreamingSheet]]):
+    workbook = Workbook(write_only=True)
+    for title, sheet in sheets:
+        sheet.write(workbook, title)
+    workbook.save(filepath)
+    logging.debug(f"Akışlı Excel yazıldı: {filepath}")
+
+
+def write_quotation(filepath: Path, products: Iterable[Dict[str, Any]]) -> int:
+    # Fiyat sütunu sabit 15, KDV sütunu sabit 8 genişliktedir.
+    sheet = StreamingSheet(QUOTATION_HEADERS, fixed_widths={4: 15, 6: 8}, number_formats={4: PRICE_NUMBER_FORMAT})
+    sheet.extend(quotation_rows(products))
+    write_workbook(filepath, [("Ürün Listesi", sheet)])
+    return sheet.row_count
+
+
+def write_meetings(filepath: Path, meetings: Iterable[Dict[str, Any]]) -> int:
+    sheet = StreamingSheet(MEETING_HEADERS, header_alignment=Alignment(horizontal="center", vertical="center"), max_width=50)
+    sheet.extend(meeting_rows(meetings))
+    write_workbook(filepath, [("Etkinlik Listesi", sheet)])
+    return sheet.row_count
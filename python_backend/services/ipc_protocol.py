@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Electron IPC Çerçeveleme Protokolü
+==================================
+Varsayılan protokol stdin/stdout üzerinde satır sonlu UTF-8 JSON'dur. Electron
+süreci NPC_IPC_FRAMING=msgpack ortam değişkeniyle başlatırsa arka uç anlaşmaya
+geçer:
+
+1. Arka uç ilk mesaj olarak JSON satırı {"type": "ipc_framing", "data": {"mode": "msgpack"}}
+   gönderir; sonraki tüm çıktıları uzunluk önekli çerçevelerdir.
+2. Electron bunu görünce JSON satırı {"action": "ipc_framing_ack"} gönderir; bu
+   satırdan sonraki tüm komutları da çerçeve olarak yazar.
+
+Çerçeve: 4 baytlık big-endian yük uzunluğu + MessagePack yükü. Ortam değişkeni
+yoksa (eski arayüz, benchmark'lar, elle çalıştırma) JSON satır protokolü kullanılır.
+"""
+
+import json
+import logging
+import os
+import struct
+from datetime import date, datetime
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional
+
+import msgpack
+import orjson
+
+
+FRAMING_ENV = "NPC_IPC_FRAMING"
+FRAMING_JSON = "json"
+FRAMING_MSGPACK = "msgpack"
+HANDSHAKE_TYPE = "ipc_framing"
+ACK_ACTION = "ipc_framing_ack"
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+_JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+
+
+def requested_framing() -> str:
+    mode = os.getenv(FRAMING_ENV, FRAMING_JSON).strip().lower()
+    return mode if mode in ENCODERS else FRAMING_JSON
+
+
+def _msgpack_default(obj: Any) -> Any:
+    # orjson'un JSON yolunda desteklediği türler MessagePack yolunda da aynı biçimde gönderilir.
+    if hasattr(obj, "tolist"): return obj.tolist()
+    if isinstance(obj, (datetime, date)): return obj.isoformat()
+    if isinstance(obj, (set, frozenset)): return list(obj)
+    raise TypeError(f"MessagePack ile serileştirilemeyen tür: {type(obj).__name__}")
+
+
+def encode_json_line(obj: Any) -> bytes:
+    return orjson.dumps(obj, option=_JSON_OPTIONS)
+
+
+def encode_frame(obj: Any) -> bytes:
+    payload = msgpack.packb(obj, default=_msgpack_default, use_bin_type=True)
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+ENCODERS: Dict[str, Callable[[Any], bytes]] = {FRAMING_JSON: encode_json_line, FRAMING_MSGPACK: encode_frame}
+
+
+class CommandReader:
+    """stdin'den komutları okur; ack satırı gelince çerçeve moduna geçer. Bozuk girdiler loglanıp atlanır."""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.mode = FRAMING_JSON
+
+    def _read_line_command(self) -> Optional[Any]:
+        while True:
+            line_bytes = self.stream.readline()
+            if not line_bytes: raise EOFError
+            line = line_bytes.decode('utf-8', errors='replace').strip()
+            if not line: continue
+            try:
+                return json.loads(line)
+            except json.JSONDecodeError:
+                logging.error(f"Geçersiz JSON alındı: {line}")
+
+    def _read_exact(self, size: int) -> bytes:
+        data = self.stream.read(size)
+        if data is None or len(data) < size: raise EOFError
+        return data
+
+    def _read_frame_command(self) -> Optional[Any]:
+        (length,) = FRAME_HEADER.unpack(self._read_exact(FRAME_HEADER.size))
+        if length > MAX_FRAME_BYTES:
+            # Çerçeve sınırı kaybedildi; akış güvenle sürdürülemez.
+            logging.critical(f"IPC çerçevesi çok büyük ({length} bayt), komut okuma durduruluyor.")
+            raise EOFError
+        payload = self._read_exact(length)
+        try:
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as e:
+            logging.error(f"Geçersiz IPC çerçevesi alındı ({length} bayt): {e}")
+            return None
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            try:
+                command = self._read_frame_command() if self.mode == FRAMING_MSGPACK else self._read_line_command()
+            except EOFError:
+                return
+            if command is None: continue
+            if isinstance(command, dict) and command.get("action") == ACK_ACTION:
+                self.mode = (command.get("data") or {}).get("mode", FRAMING_MSGPACK)
+                if self.mode not in ENCODERS: self.mode = FRAMING_JSON
+                logging.info(f"IPC komut çerçevelemesi: {self.mode}")
+                continue
+            yield command
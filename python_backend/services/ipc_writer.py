@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Arayüz IPC Yazıcısı
+===================
+Electron'a giden mesajlar tek bir yazıcı thread'inden stdout'a yazılır. Mesajlar
+çağıran thread'de anlaşılan çerçevelemeye göre (JSON satırı veya uzunluk önekli
+MessagePack, bkz. ipc_protocol) baytlara çevrilip sınırlı bir kuyruğa konur;
+yazıcı kuyruktan gelenleri küçük partilerde (BATCH_WINDOW_SECONDS veya
+MAX_BATCH_BYTES dolana kadar) birleştirip tek write + flush ile gönderir.
+
+Her mesaj tek parça halinde yazıldığından satırlar/çerçeveler iç içe geçmez. Electron boruyu
+yavaş okursa yazma bloklanır, kuyruk dolar ve üreticiler put() üzerinde bekler
+(geri basınç). Boru kapanırsa yazıcı mesajları sessizce düşürür, üreticiler
+bloklanmaz.
+"""
+
+import logging
+import queue
+import sys
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Optional
+
+from .ipc_protocol import ENCODERS, FRAMING_JSON, HANDSHAKE_TYPE, encode_json_line
+
+
+MAX_QUEUED_MESSAGES = 2048
+MAX_BATCH_BYTES = 256 * 1024
+BATCH_WINDOW_SECONDS = 0.005
+
+
+def build_message(message_type: str, data: Any, context: Optional[Dict] = None) -> Dict[str, Any]:
+    message_obj = {"type": message_type, "data": data}
+    if context: message_obj["context"] = context
+    return message_obj
+
+
+class FrontendWriter:
+    def __init__(self, stream: BinaryIO = None, max_queued: int = MAX_QUEUED_MESSAGES, max_batch_bytes: int = MAX_BATCH_BYTES, batch_window: float = BATCH_WINDOW_SECONDS):
+        self._stream = stream
+        self.max_batch_bytes = max_batch_bytes
+        self.batch_window = batch_window
+        self._queue: "queue.Queue[bytes]" = queue.Queue(maxsize=max_queued)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread = None
+        self._broken = False
+        self.framing = FRAMING_JSON
+        self._encode = ENCODERS[FRAMING_JSON]
+        self.stats = {"messages": 0, "batches": 0, "bytes": 0}
+
+    @property
+    def stream(self) -> BinaryIO:
+        return self._stream if self._stream is not None else sys.stdout.buffer
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive(): return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="IPC-Writer", daemon=True)
+                self._thread.start()
+
+    def negotiate(self, framing: str):
+        """Çıktı çerçevelemesini seçer ve anlaşma mesajını gönderir. Başka bir mesajdan önce çağrılmalıdır."""
+        if framing == self.framing or framing not in ENCODERS: return
+        if self._thread is not None:
+            logging.warning("IPC çerçevelemesi mesaj gönderimi başladıktan sonra değiştirilemez, JSON ile devam ediliyor.")
+            return
+        self._put(encode_json_line(build_message(HANDSHAKE_TYPE, {"mode": framing})))
+        self.framing, self._encode = framing, ENCODERS[framing]
+        logging.info(f"IPC çıktı çerçevelemesi: {framing}")
+
+    def send(self, message_type: str, data: Any, context: Optional[Dict] = None):
+        """Mesajı kodlayıp kuyruğa koyar; serileştirilemezse TypeError fırlatır."""
+        self._put(self._encode(build_message(message_type, data, context)))
+
+    def _put(self, payload: bytes):
+        if self._broken: return
+        self._ensure_thread()
+        self._queue.put(payload)
+
+    def _collect_batch(self, first: bytes) -> list:
+        batch, size = [first], len(first)
+        deadline = time.monotonic() + self.batch_window
+        while size < self.max_batch_bytes:
+            remaining = deadline - time.monotonic()
+            try:
+                payload = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(payload)
+            size += len(payload)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch(self._queue.get())
+            try:
+                if not self._broken:
+                    data = b"".join(batch)
+                    self.stream.write(data)
+                    self.stream.flush()
+                    self.stats["messages"] += len(batch)
+                    self.stats["batches"] += 1
+                    self.stats["bytes"] += len(data)
+            except (BrokenPipeError, ValueError):
+                # Electron boruyu kapattı; kalan mesajlar düşürülür.
+                self._broken = True
+            except OSError as e:
+                logging.error(f"Frontend'e mesaj gönderilemedi: {e}")
+            finally:
+                for _ in batch: self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Kuyruktaki tüm mesajlar yazılana kadar (en fazla timeout saniye) bekler."""
+        if self._thread is None: return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline or not self._thread.is_alive(): return False
+            time.sleep(0.005)
+        return True
+
+
+frontend_writer = FrontendWriter()
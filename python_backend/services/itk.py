@@ -1,14 +1,18 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import hashlib
 import requests
 from urllib3 import Retry
 from bs4 import BeautifulSoup
 import time
 import logging
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any
 from requests.adapters import HTTPAdapter
 
+from . import price_parser
+from .supplier_io import supplier_io
+
 class ItkScraper:
     def __init__(self, username, password):
         self.BASE_URL = "https://www.teknikkimya.com.tr"
@@ -78,73 +82,98 @@ class ItkScraper:
             logging.error(f"ITK Scraper: Kategori linkleri alınırken hata: {e}")
             return []
 
-    def _scrape_category_page(self, link: str) -> List[Dict[str, Any]]:
+    def _parse_category_page(self, content: bytes, link: str) -> List[Dict[str, Any]]:
         page_products = []
-        try:
-            category_page = self.session.get(link, verify=False, timeout=20)
-            category_soup = BeautifulSoup(category_page.content, 'lxml')
-            product_rows = category_soup.select('tbody tr')
-            if not product_rows:
-                product_rows = category_soup.select('table tr')[1:]
-            for row in product_rows:
-                try:
-                    stok_kod_input = row.find('input', {'name': 'stok_kod'})
-                    stok_adi_input = row.find('input', {'name': 'stok_adi'})
-                    fiyat_input = row.find('input', {'name': 'fiyat'})
-                    doviz_input = row.find('input', {'name': 'doviz'})
-                    if not all([stok_kod_input, stok_adi_input, fiyat_input, doviz_input]):
-                        continue
-                    stok_kod = stok_kod_input['value']
-                    stok_adi = stok_adi_input['value']
-                    fiyat = fiyat_input['value']
-                    doviz = doviz_input['value']
-                    stok_span = row.find('span', title=lambda t: t and t.startswith('Stok:'))
-                    if stok_span:
-                        stok_durumu = stok_span.get_text(strip=True)
-                        stok_adeti = stok_span['title'].replace('Stok:', '').strip()
-                    else:
-                        stok_durumu = "Belirtilmemiş"
-                        stok_adeti = "N/A"
-                    page_products.append({
-                        "source": "ITK",
-                        "product_code": stok_kod,
-                        "product_name": stok_adi,
-                        "stock_status": stok_durumu,
-                        "stock_quantity": stok_adeti,
-                        "price": float(fiyat.replace(',', '.')) if fiyat else 0.0,
-                        "currency": doviz,
-                        "price_str": f"{float(fiyat.replace(',', '.')):.2f} {doviz}" if fiyat else "N/A"
-                    })
-                except (AttributeError, TypeError, KeyError, ValueError):
-                    logging.debug(f"ITK Scraper: Bir ürün satırı işlenemedi. Link: {link}", exc_info=False)
+        category_soup = BeautifulSoup(content, 'lxml')
+        product_rows = category_soup.select('tbody tr')
+        if not product_rows:
+            product_rows = category_soup.select('table tr')[1:]
+        for row in product_rows:
+            try:
+                stok_kod_input = row.find('input', {'name': 'stok_kod'})
+                stok_adi_input = row.find('input', {'name': 'stok_adi'})
+                fiyat_input = row.find('input', {'name': 'fiyat'})
+                doviz_input = row.find('input', {'name': 'doviz'})
+                if not all([stok_kod_input, stok_adi_input, fiyat_input, doviz_input]):
                     continue
-            return page_products
-        except requests.exceptions.RequestException as e:
-            logging.warning(f"ITK Scraper: Kategori sayfası işlenirken hata: {link}. Hata: {e}")
-            return []
+                stok_kod = stok_kod_input['value']
+                stok_adi = stok_adi_input['value']
+                fiyat = fiyat_input['value']
+                doviz = doviz_input['value']
+                price = price_parser.parse_amount(fiyat) if fiyat else 0.0
+                if price is None: continue
+                currency = price_parser.normalize_currency(doviz, doviz)
+                stok_span = row.find('span', title=lambda t: t and t.startswith('Stok:'))
+                if stok_span:
+                    stok_durumu = stok_span.get_text(strip=True)
+                    stok_adeti = stok_span['title'].replace('Stok:', '').strip()
+                else:
+                    stok_durumu = "Belirtilmemiş"
+                    stok_adeti = "N/A"
+                page_products.append({
+                    "source": "ITK",
+                    "product_code": stok_kod,
+                    "product_name": stok_adi,
+                    "stock_status": stok_durumu,
+                    "stock_quantity": stok_adeti,
+                    "price": price,
+                    "currency": currency,
+                    "price_str": f"{price:.2f} {currency}" if fiyat else "N/A"
+                })
+            except (AttributeError, TypeError, KeyError, ValueError):
+                logging.debug(f"ITK Scraper: Bir ürün satırı işlenemedi. Link: {link}", exc_info=False)
+                continue
+        return page_products
 
-    def get_all_products(self):
+    async def _refresh_category_page(self, link: str, previous: Dict[str, Any]) -> Dict[str, Any]:
+        """Kategori sayfasını koşullu olarak indirir; içerik değişmediyse önceki ürünleri yeniden kullanır, değiştiyse ham içeriği döndürür."""
+        headers = {}
+        if previous.get("etag"): headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"): headers["If-Modified-Since"] = previous["last_modified"]
+        # Oturumdaki urllib3 Retry stratejisinin karşılığı: 429/5xx ve bağlantı hatalarında 3 yeniden deneme.
+        response = await supplier_io.request(self.session, "GET", link, headers=headers, timeout=20, verify=False, retries=3)
+        if response.status_code == 304 and "products" in previous:
+            return dict(previous, changed=False)
+        if response.status_code != 200:
+            raise requests.exceptions.RequestException(f"Status: {response.status_code}")
+        content_hash = hashlib.sha1(response.content).hexdigest()
+        entry = {"hash": content_hash, "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        if content_hash == previous.get("hash") and "products" in previous:
+            return dict(entry, products=previous["products"], changed=False)
+        # Ayrıştırma olay döngüsünü bloklamasın diye içerik çağırana bırakılır.
+        return dict(entry, content=response.content, changed=True)
+
+    def refresh_catalogue(self, previous_categories: Dict[str, Dict[str, Any]] = None):
+        """
+        Kategori bazlı katalog anlık görüntüsünü günceller. Yalnızca içeriği değişen
+        kategoriler yeniden ayrıştırılır; indirilemeyen kategoriler önceki haliyle korunur.
+        (kategoriler, değişiklik_var_mı) döndürür; giriş başarısızsa (None, False) döner.
+        """
+        previous_categories = previous_categories or {}
         if not self._login():
-            return []
+            return None, False
         category_links = self._get_category_links()
         if not category_links:
-            return []
-        all_products = []
-        total_categories = len(category_links)
+            return None, False
+        categories: Dict[str, Dict[str, Any]] = {}
+        changed_count = 0
         start_time = time.monotonic()
-        with ThreadPoolExecutor(max_workers=10, thread_name_prefix="ITK-Scraper") as executor:
-            future_to_link = {executor.submit(self._scrape_category_page, link): link for link in category_links}
-            processed_count = 0
-            for future in as_completed(future_to_link):
-                link = future_to_link[future]
-                processed_count += 1
-                try:
-                    page_products = future.result()
-                    if page_products:
-                        all_products.extend(page_products)
-                    logging.info(f"ITK Scraper: Kategori {processed_count}/{total_categories} işlendi ({len(page_products)} ürün bulundu).")
-                except Exception as exc:
-                    logging.error(f"ITK Scraper: Kategori {link} işlenirken kritik hata: {exc}")
-        end_time = time.monotonic()
-        logging.info(f"ITK Scraper: Toplam {len(all_products)} adet ürün {end_time - start_time:.2f} saniyede (paralel olarak) çekildi.")
-        return all_products
+        async def refresh_all():
+            return await asyncio.gather(*(self._refresh_category_page(link, previous_categories.get(link, {})) for link in category_links), return_exceptions=True)
+        for link, entry in zip(category_links, supplier_io.run(refresh_all())):
+            if isinstance(entry, Exception):
+                logging.warning(f"ITK Scraper: Kategori {link} yenilenemedi: {entry}")
+                if link in previous_categories: categories[link] = previous_categories[link]
+                continue
+            if entry.pop("changed"):
+                changed_count += 1
+                entry["products"] = self._parse_category_page(entry.pop("content"), link)
+            categories[link] = entry
+        removed_count = len(set(previous_categories) - set(categories))
+        ordered = {link: categories[link] for link in category_links if link in categories}
+        logging.info(f"ITK Scraper: {len(ordered)} kategori {time.monotonic() - start_time:.2f} saniyede kontrol edildi ({changed_count} değişti, {removed_count} kaldırıldı).")
+        return ordered, bool(changed_count or removed_count)
+
+    def get_all_products(self):
+        categories, _ = self.refresh_catalogue()
+        return [product for entry in (categories or {}).values() for product in entry["products"]]
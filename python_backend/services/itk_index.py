@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+ITK Ürün Önbelleği İndeksi
+==========================
+ITK ürün önbelleği üzerinde doğrusal tarama yerine bigram ters indeksi ile aday
+seçer, adayları RapidFuzz'ın C tabanlı toplu skorlayıcısıyla puanlar.
+
+Aday filtresi kayıpsızdır: "similar" aramada eşik (yuvarlanmış partial_ratio > 85)
+ancak terim ile hizalanan pencere arasındaki indel mesafesi d <= 0.29 * m iken
+geçilebilir (m: kısa olan metnin uzunluğu). Her indel işlemi en fazla iki bigramı
+bozduğundan, eşleşen bir metin kısa tarafın farklı bigramlarından en az
+(farklı bigram sayısı - 2 * d) tanesini paylaşmak zorundadır.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Set
+
+
+
+SIMILAR_SCORE_THRESHOLD = 85
+# thefuzz skorları tam sayıya yuvarlar; "round(skor) > 85" koşulu "skor >= 85.5" ile eşdeğerdir.
+_SCORE_CUTOFF = SIMILAR_SCORE_THRESHOLD + 0.5
+_MAX_INDEL_RATIO = 2 * (1 - _SCORE_CUTOFF / 100)
+
+
+def _bigrams(text: str) -> Set[str]:
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _required_shared(distinct_bigrams: int, length: int) -> int:
+    # Kayan nokta hatası (ör. 0.29 * 100 = 28.999...) sınırı daraltmasın diye küçük bir pay eklenir.
+    return distinct_bigrams - 2 * int(_MAX_INDEL_RATIO * length + 1e-9)
+
+
+class _FieldIndex:
+    """Tek bir metin alanı (kod veya ad) için bigram ters indeksi."""
+
+    def __init__(self, values: List[str]):
+        self.values = values
+        self.lengths = [len(v) for v in values]
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        self.own_required: List[int] = []
+        for idx, value in enumerate(values):
+            grams = _bigrams(value)
+            for gram in grams:
+                self.postings[gram].append(idx)
+            self.own_required.append(_required_shared(len(grams), len(value)))
+        # Terimden kısa olduğunda filtrelenemeyecek kadar kısa alanlar her zaman aday olur.
+        self.always_candidates = [idx for idx, req in enumerate(self.own_required) if req <= 0 and self.lengths[idx] > 0]
+
+    def containing(self, term: str) -> Iterable[int]:
+        """Terimi alt dize olarak içermesi mümkün olan kayıtlar (tüm bigramlarını içerenler)."""
+        if len(term) < 2:
+            return range(len(self.values))
+        grams = _bigrams(term)
+        posting_lists = sorted((self.postings.get(gram, []) for gram in grams), key=len)
+        if not posting_lists[0]:
+            return []
+        candidates = set(posting_lists[0])
+        for posting in posting_lists[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def similar_candidates(self, term: str) -> Set[int]:
+        term_grams = _bigrams(term)
+        term_length = len(term)
+        term_required = _required_shared(len(term_grams), term_length)
+        if term_length < 2 or term_required <= 0:
+            return set(range(len(self.values)))
+        shared = defaultdict(int)
+        for gram in term_grams:
+            for idx in self.postings.get(gram, ()):
+                shared[idx] += 1
+        candidates = set(self.always_candidates)
+        for idx, count in shared.items():
+            required = term_required if self.lengths[idx] >= term_length else self.own_required[idx]
+            if count >= required:
+                candidates.add(idx)
+        return candidates
+
+
+class ItkSearchIndex:
+    """ITK ürün listesi için değişmez arama indeksi; yeni liste geldiğinde baştan kurulur."""
+
+    def __init__(self, products: List[Dict[str, Any]]):
+        start_time = time.monotonic()
+        self.products = products
+        self.codes = [(p.get("product_code") or "").lower() for p in products]
+        self.names = [(p.get("product_name") or "").lower() for p in products]
+        self._code_index = _FieldIndex(self.codes)
+        self._name_index = _FieldIndex(self.names)
+        self._names_exact: Dict[str, List[int]] = defaultdict(list)
+        for idx, name in enumerate(self.names):
+            self._names_exact[name].append(idx)
+        logging.info(f"ITK indeksi {len(products)} ürün için {time.monotonic() - start_time:.2f}s içinde oluşturuldu.")
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def _score(self, term: str, values: List[str], candidates: Iterable[int]) -> Set[int]:
+        choices = {idx: values[idx] for idx in candidates if values[idx]}
+        if not choices:
+            return set()
+        from rapidfuzz import fuzz, process  # İlk aramada yüklenir; indeks kurulumu rapidfuzz gerektirmez.
+        matches = process.extract(term, choices, scorer=fuzz.partial_ratio, score_cutoff=_SCORE_CUTOFF, limit=None)
+        return {idx for _, _, idx in matches}
+
+    def search(self, search_terms: Iterable[str], search_logic: str) -> List[Dict[str, Any]]:
+        """Eşleşen ürünleri önbellekteki sıralarıyla döndürür."""
+        matched: Set[int] = set()
+        for term in {t.lower() for t in search_terms if t}:
+            if search_logic == "exact":
+                matched.update(self._names_exact.get(term, ()))
+                matched.update(idx for idx in self._code_index.containing(term) if term in self.codes[idx])
+            else:
+                matched.update(self._score(term, self.codes, self._code_index.similar_candidates(term)))
+                matched.update(self._score(term, self.names, self._name_index.similar_candidates(term)))
+        return [self.products[idx] for idx in sorted(matched)]
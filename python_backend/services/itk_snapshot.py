@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+ITK Katalog Anlık Görüntüsü
+===========================
+ITK kataloğunu kategori sayfası hash'leriyle birlikte diske yazar. Uygulama
+açılışında katalog buradan anında yüklenir; arka plandaki yenileme yalnızca
+içeriği değişen kategorileri yeniden ayrıştırır.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+SNAPSHOT_VERSION = 1
+
+
+class ItkCatalogueStore:
+    """Anlık görüntüyü JSON olarak saklar; yazma işlemi geçici dosya + os.replace ile atomiktir."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def load(self, username: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Kayıtlı kategorileri döndürür. Dosya yoksa, bozuksa veya başka bir bayi hesabına aitse None döner."""
+        if not self.path.exists():
+            return None
+        try:
+            with self._lock, open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"ITK anlık görüntüsü okunamadı, yok sayılıyor: {e}")
+            return None
+        if data.get("version") != SNAPSHOT_VERSION or data.get("username") != username:
+            logging.info("ITK anlık görüntüsü farklı bir sürüme veya hesaba ait, yok sayılıyor.")
+            return None
+        categories = data.get("categories") or {}
+        logging.info(f"ITK anlık görüntüsü yüklendi: {len(categories)} kategori (kayıt: {data.get('saved_at')}).")
+        return categories
+
+    def save(self, username: str, categories: Dict[str, Dict[str, Any]]):
+        data = {"version": SNAPSHOT_VERSION, "username": username, "saved_at": datetime.now().isoformat(timespec="seconds"), "categories": categories}
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"ITK anlık görüntüsü kaydedilemedi: {e}")
+
+
+def products_from_categories(categories: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [product for entry in categories.values() for product in entry.get("products", [])]
@@ -3,12 +3,21 @@ import time
 import json
 import logging
 import threading
-from typing import Dict, Any, List
+from concurrent.futures import Future
+from typing import Dict, Any, Iterable, List, Optional
 
 import requests
 from requests.adapters import HTTPAdapter
 import os
 
+from .profiler import profiler
+from .single_flight import FlightCancelled, single_flight
+from . import price_parser
+from .supplier_io import supplier_io
+
+LOOKUP_TTL_SECONDS = 600
+EMPTY_LOOKUP_TTL_SECONDS = 120
+
 class AuthenticationError(Exception):
     """Netflex kimlik doğrulama başarısız olduğunda fırlatılacak özel hata."""
     pass
@@ -22,7 +31,6 @@ class NetflexAPI:
         self.token = None
         self.token_last_updated = 0
         self.token_lock = threading.Lock()
-        self.token_lock = threading.Lock()
 
     def update_credentials(self, username: str, password: str):
         with self.token_lock:
@@ -30,6 +38,7 @@ class NetflexAPI:
             self.credentials = {"adi": username, "sifre": password}
             self.token = None
             self.token_last_updated = 0
+        self.clear_lookup_cache()
 
     def get_token(self) -> str:
         with self.token_lock:
@@ -61,13 +70,23 @@ class NetflexAPI:
     def search_products(self, search_term: str, cancel_event: threading.Event) -> List[Dict[str, Any]]:
         if cancel_event.is_set():
             return []
+        return self._query_products(search_term, cancel_event) or []
+
+    def _query_products(self, search_term: str, cancel_event: threading.Event = None) -> Optional[List[Dict[str, Any]]]:
+        """Tek bir terim için Netflex'i sorgular. Ağ/ayrıştırma hatasında None döner (önbelleğe alınmaz)."""
         token = self.get_token()
+        return supplier_io.run(self._query_products_async(search_term, token, cancel_event), cancel_event)
+
+    async def _query_products_async(self, search_term: str, token: str, cancel_event: threading.Event = None) -> Optional[List[Dict[str, Any]]]:
         timestamp = int(time.time() * 1000)
         search_url = f"https://netflex-api.interlab.com.tr/common/urun_sorgula?filter={search_term}&userId=285&nOfItems=250&_={timestamp}"
         headers = {'Authorization': f'Bearer {token}', 'User-Agent': 'Mozilla/5.0'}
+        cancelled = lambda: cancel_event is not None and cancel_event.is_set()
         try:
-            response = self.session.get(search_url, headers=headers, timeout=20)
-            if cancel_event.is_set(): return []
+            with profiler.span("netflex.query", "netflex", term=search_term) as span:
+                response = await supplier_io.request(self.session, "GET", search_url, headers=headers, timeout=20)
+                span.set(bytes=len(response.content), status=response.status_code)
+            if cancelled(): return None
             response.raise_for_status()
             products = response.json()
             if not isinstance(products, list):
@@ -75,9 +94,9 @@ class NetflexAPI:
                 return []
             found_products = []
             for product in products:
-                if cancel_event.is_set():
+                if cancelled():
                     logging.info("Netflex araması ürün işlenirken iptal edildi.")
-                    break
+                    return None
                 price_value = product.get('urn_Fiyat')
                 currency = product.get('urn_FiyatDovizi', '')
                 price_numeric = None
@@ -99,17 +118,81 @@ class NetflexAPI:
                     "brand": brand,
                     "price_numeric": price_numeric,
                     "price_str": price_str,
+                    "currency": price_parser.normalize_currency(currency, "EUR"),
                     "stock": stock_info,
                     "cheapest_netflex_price_str": price_str,
                     "cheapest_netflex_stock": stock_info,
                 })
             return found_products
         except requests.exceptions.RequestException as e:
-            if not cancel_event.is_set():
+            if not cancelled():
                 logging.error(f"Netflex Arama HATA ('{search_term}'): Ağ hatası - {e}")
         except json.JSONDecodeError as e:
-            if not cancel_event.is_set():
+            if not cancelled():
                 logging.error(f"Netflex Arama HATA ('{search_term}'): Yanıt JSON olarak ayrıştırılamadı - {e}")
                 response_text = response.text if 'response' in locals() else 'Yanıt alınamadı'
                 logging.error(f"Hatalı yanıt içeriği: {response_text[:500]}...")
-        return []
+        return None
+
+    def clear_lookup_cache(self):
+        single_flight.invalidate("netflex")
+
+    @staticmethod
+    def _lookup_ttl(products: Optional[List[Dict[str, Any]]]) -> float:
+        if products is None: return 0
+        return LOOKUP_TTL_SECONDS if products else EMPTY_LOOKUP_TTL_SECONDS
+
+    def _lookup_future(self, term: str) -> Future:
+        """Süreç genelindeki single-flight katmanı üzerinden sorgu; aynı terimin eşzamanlı sorguları tek istekte birleşir.
+        Ortak sorgu başka aramalarca da beklendiği için çağıranın iptal sinyalini dinlemez."""
+        key = (self.credentials.get("adi"), term)
+        future, is_leader = single_flight.begin("netflex", "urun_sorgula", key)
+        if not is_leader:
+            return future
+        try:
+            # Token yenilemesi senkron ve kilitli olduğundan olay döngüsünde değil çağıranın thread'inde yapılır.
+            token = self.get_token()
+            query = supplier_io.submit(self._query_products_async(term, token))
+        except Exception as e:
+            single_flight.finish("netflex", "urun_sorgula", key, future, error=e)
+            return future
+        def publish(done):
+            if done.cancelled():
+                single_flight.finish("netflex", "urun_sorgula", key, future, error=FlightCancelled())
+            elif done.exception() is not None:
+                single_flight.finish("netflex", "urun_sorgula", key, future, error=done.exception())
+            else:
+                single_flight.finish("netflex", "urun_sorgula", key, future, result=done.result(), ttl=self._lookup_ttl)
+        query.add_done_callback(publish)
+        return future
+
+    def lookup(self, search_term: str, cancel_event: threading.Event, incomplete: threading.Event = None) -> List[Dict[str, Any]]:
+        """search_products ile aynı sonucu önbellekli ve aynı terimin eşzamanlı sorgularını birleştirerek döndürür.
+        Sorgu başarısız olursa boş liste döner ve verilen incomplete olayı kurulur."""
+        term = (search_term or "").strip()
+        if not term or cancel_event.is_set():
+            return []
+        products = single_flight.wait(self._lookup_future(term), cancel_event)
+        if products is None:
+            if incomplete is not None and not cancel_event.is_set(): incomplete.set()
+            return []
+        return products
+
+    def lookup_many(self, search_terms: Iterable[str], cancel_event: threading.Event) -> Dict[str, List[Dict[str, Any]]]:
+        """Birden fazla terimi tedarikçi G/Ç döngüsü üzerinden aynı anda sorgular; terim -> ürünler döndürür.
+        Netflex tek sorguda birden fazla kod kabul etmediğinden toplu çözümleme eşzamanlı tekil sorgularla yapılır."""
+        futures = {term: self._lookup_future(term) for term in {(t or "").strip() for t in search_terms} if term}
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        for term, future in futures.items():
+            if cancel_event.is_set():
+                break
+            try:
+                products = single_flight.wait(future, cancel_event)
+            except AuthenticationError:
+                raise
+            except Exception as e:
+                logging.error(f"Netflex toplu sorgu HATA ('{term}'): {e}")
+                continue
+            if products is not None:
+                results[term] = products
+        return results
@@ -2,8 +2,17 @@
 """
 Obscura Process Manager
 ========================
-Obscura CDP sunucusunu yöneten yardımcı sınıf.
-Obscura'yı bir subprocess olarak başlatır, durdurur ve sağlık kontrolü yapar.
+Obscura CDP sunucularını denetleyen yardımcı sınıf.
+
+Bir veya daha fazla `obscura serve` süreci başlatılır; her birinin stdout/stderr
+çıktısı ayrı thread'lerde satır satır okunup loga aktarılır (boru tamponu dolup
+sunucu bloklanmaz). Denetçi thread'i süreçleri CDP seviyesinde (/json/version)
+düzenli olarak yoklar; çöken veya yanıt vermeyen süreç artan bekleme süreleriyle
+yeniden başlatılır.
+
+Süreç başına worker sayısı CPU çekirdeklerinden hesaplanır. Tarayıcı kullanan
+servisler her iş için acquire_endpoint()/release_endpoint() ile kiralama yapar;
+tüm süreçler dolduğunda yeni süreç açılır, boşta kalan ek süreçler kapatılır.
 """
 
 import subprocess
@@ -13,18 +22,185 @@ import os
 import signal
 import threading
 import socket
+from collections import deque
 from pathlib import Path
+from typing import List, Optional
 
+import requests
+
+
+MIN_WORKERS = 2
+MAX_WORKERS = 8
+MAX_INSTANCES = 3
+START_TIMEOUT_SECONDS = 10
+HEALTH_CHECK_INTERVAL_SECONDS = 5
+HEALTH_PROBE_TIMEOUT_SECONDS = 3
+# Art arda bu kadar başarısız yoklamadan sonra süreç yeniden başlatılır.
+HEALTH_FAILURE_LIMIT = 3
+RESTART_BACKOFF_SECONDS = 1
+MAX_RESTART_BACKOFF_SECONDS = 60
+# Bu süre sağlıklı çalışan sürecin bekleme süresi sıfırlanır.
+STABLE_UPTIME_SECONDS = 60
+SCALE_IN_IDLE_SECONDS = 300
+LOG_TAIL_LINES = 50
+
+
+def default_worker_count() -> int:
+    """Süreç başına worker sayısı: çekirdek sayısının yarısı, MIN_WORKERS ile MAX_WORKERS arasında."""
+    return max(MIN_WORKERS, min(MAX_WORKERS, (os.cpu_count() or MIN_WORKERS) // 2))
+
+
+def _is_port_in_use(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        return s.connect_ex(('127.0.0.1', port)) == 0
 
-class ObscuraManager:
-    """Obscura CDP sunucusunu subprocess olarak yönetir."""
 
-    def __init__(self, binary_path: str = None, port: int = 9222, workers: int = 4, stealth: bool = True):
+class _ObscuraInstance:
+    """Tek bir Obscura süreci; başlatma, çıktı boşaltma, yoklama ve durdurma."""
+
+    def __init__(self, binary_path: str, port: int, workers: int, stealth: bool):
+        self.binary_path = binary_path
         self.port = port
         self.workers = workers
         self.stealth = stealth
         self.process: subprocess.Popen = None
+        self.external = False
+        self.healthy = False
+        self.failures = 0
+        self.leases = 0
+        self.started_at = 0.0
+        self.idle_since = time.monotonic()
+        self.backoff = 0.0
+        self.restart_at: Optional[float] = None
+        self.tail = deque(maxlen=LOG_TAIL_LINES)
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def label(self) -> str:
+        return f"Obscura:{self.port}"
+
+    def probe(self) -> bool:
+        """CDP keşif uç noktasını sorgular; Playwright connect_over_cdp da aynı uç noktayı kullanır."""
+        try:
+            response = requests.get(f"{self.endpoint}/json/version", timeout=HEALTH_PROBE_TIMEOUT_SECONDS)
+            return response.status_code == 200 and isinstance(response.json(), dict)
+        except (requests.exceptions.RequestException, ValueError):
+            return False
+
+    def alive(self) -> bool:
+        return self.external or (self.process is not None and self.process.poll() is None)
+
+    def _drain(self, stream, level: int):
+        try:
+            for raw in iter(stream.readline, b''):
+                line = raw.decode('utf-8', errors='replace').rstrip()
+                if not line: continue
+                self.tail.append(line)
+                logging.log(level, f"[{self.label}] {line}")
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+    def launch(self) -> bool:
+        if _is_port_in_use(self.port):
+            if self.probe():
+                # Başka bir süreç (ör. elle başlatılmış Obscura) portu kullanıyor; denetlenir ama sahiplenilmez.
+                logging.warning(f"Port {self.port} zaten kullanımda. Mevcut Obscura instance'ı kullanılacak.")
+                self.external, self.healthy, self.failures, self.started_at = True, True, 0, time.monotonic()
+                return True
+            logging.error(f"Port {self.port} CDP yanıtı vermeyen başka bir süreç tarafından kullanılıyor.")
+            return False
+        self.external = False
+        cmd = [self.binary_path, "serve", "--port", str(self.port), "--workers", str(self.workers)]
+        if self.stealth:
+            cmd.append("--stealth")
+        logging.info(f"Obscura başlatılıyor: {' '.join(cmd)}")
+        try:
+            self.process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                preexec_fn=os.setsid if os.name != 'nt' else None,
+            )
+        except FileNotFoundError:
+            logging.error(f"Obscura binary bulunamadı: {self.binary_path}")
+            return False
+        except Exception as e:
+            logging.error(f"Obscura başlatılırken hata: {e}", exc_info=True)
+            return False
+        threading.Thread(target=self._drain, args=(self.process.stdout, logging.DEBUG), name=f"{self.label}-stdout", daemon=True).start()
+        threading.Thread(target=self._drain, args=(self.process.stderr, logging.INFO), name=f"{self.label}-stderr", daemon=True).start()
+
+        deadline = time.monotonic() + START_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                logging.error(f"Obscura başlatılamadı! Çıkış kodu: {self.process.returncode}, Son çıktı: {self.tail_text()}")
+                self.process = None
+                return False
+            if _is_port_in_use(self.port) and self.probe():
+                self.healthy, self.failures, self.started_at = True, 0, time.monotonic()
+                logging.info(f"Obscura başarıyla başlatıldı (PID: {self.process.pid}, Port: {self.port}, Workers: {self.workers})")
+                return True
+            time.sleep(0.1)
+        logging.error(f"Obscura {START_TIMEOUT_SECONDS} saniye içinde hazır olmadı (Port: {self.port})!")
+        self.terminate()
+        return False
+
+    def tail_text(self) -> str:
+        return " | ".join(list(self.tail)[-10:])[-1000:]
+
+    def terminate(self):
+        self.healthy = False
+        if self.external:
+            self.external = False
+            return
+        if not self.process: return
+        pid = self.process.pid
+        logging.info(f"Obscura durduruluyor (PID: {pid})...")
+        try:
+            if os.name != 'nt':
+                os.killpg(os.getpgid(pid), signal.SIGTERM)
+            else:
+                self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+                logging.info(f"Obscura düzgünce kapatıldı (PID: {pid})")
+            except subprocess.TimeoutExpired:
+                logging.warning(f"Obscura zorla sonlandırılıyor (PID: {pid})...")
+                if os.name != 'nt':
+                    os.killpg(os.getpgid(pid), signal.SIGKILL)
+                else:
+                    self.process.kill()
+                self.process.wait(timeout=3)
+        except ProcessLookupError:
+            logging.info(f"Obscura süreci zaten kapanmış (PID: {pid})")
+        except Exception as e:
+            logging.error(f"Obscura kapatılırken hata: {e}")
+        finally:
+            self.process = None
+
+
+class ObscuraManager:
+    """Obscura CDP sunucularını başlatır, yoklar, gerektiğinde yeniden başlatır ve talebe göre ölçekler."""
+
+    def __init__(self, binary_path: str = None, port: int = 9222, workers: int = None, stealth: bool = True, max_instances: int = MAX_INSTANCES):
+        self.port = port
+        self.workers = workers or default_worker_count()
+        self.stealth = stealth
+        self.max_instances = max(1, max_instances)
+        self.instances: List[_ObscuraInstance] = []
         self._lock = threading.Lock()
+        self._capacity_freed = threading.Condition(self._lock)
+        self._scaling = False
+        self._stopped = threading.Event()
+        self._supervisor: threading.Thread = None
 
         # Binary yolunu bul
         if binary_path:
@@ -47,110 +223,163 @@ class ObscuraManager:
             if not self.binary_path:
                 logging.warning("Obscura binary bulunamadı! Lütfen binary_path parametresi ile belirtin.")
 
-    def _is_port_in_use(self) -> bool:
-        """Portu kontrol et."""
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            return s.connect_ex(('127.0.0.1', self.port)) == 0
+    @property
+    def process(self) -> Optional[subprocess.Popen]:
+        return self.instances[0].process if self.instances else None
 
     def start(self) -> bool:
-        """Obscura CDP sunucusunu başlat."""
+        """Birincil Obscura sürecini ve denetçi thread'ini başlat."""
         with self._lock:
-            if self.process and self.process.poll() is None:
-                logging.info(f"Obscura zaten çalışıyor (PID: {self.process.pid})")
+            if self.instances and self.instances[0].alive():
+                logging.info(f"Obscura zaten çalışıyor (Port: {self.port})")
                 return True
-
             if not self.binary_path:
                 logging.error("Obscura binary yolu belirtilmemiş veya bulunamadı!")
                 return False
-
-            if self._is_port_in_use():
-                logging.warning(f"Port {self.port} zaten kullanımda. Mevcut Obscura instance'ı olabilir.")
-                return True
-
-            cmd = [
-                self.binary_path, "serve",
-                "--port", str(self.port),
-                "--workers", str(self.workers),
-            ]
-            if self.stealth:
-                cmd.append("--stealth")
-
-            logging.info(f"Obscura başlatılıyor: {' '.join(cmd)}")
-            try:
-                self.process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    preexec_fn=os.setsid if os.name != 'nt' else None,
-                )
-
-                # Sunucunun hazır olmasını bekle
-                max_wait = 10
-                for i in range(max_wait * 10):
-                    if self._is_port_in_use():
-                        logging.info(f"Obscura başarıyla başlatıldı (PID: {self.process.pid}, Port: {self.port})")
-                        return True
-                    if self.process.poll() is not None:
-                        stderr = self.process.stderr.read().decode('utf-8', errors='replace')
-                        logging.error(f"Obscura başlatılamadı! Çıkış kodu: {self.process.returncode}, Hata: {stderr[:500]}")
-                        return False
-                    time.sleep(0.1)
-
-                logging.error(f"Obscura {max_wait} saniye içinde hazır olmadı!")
-                self.stop()
-                return False
-
-            except FileNotFoundError:
-                logging.error(f"Obscura binary bulunamadı: {self.binary_path}")
-                return False
-            except Exception as e:
-                logging.error(f"Obscura başlatılırken hata: {e}", exc_info=True)
+            primary = _ObscuraInstance(self.binary_path, self.port, self.workers, self.stealth)
+            if not primary.launch():
                 return False
+            self.instances = [primary]
+            self._stopped.clear()
+            self._supervisor = threading.Thread(target=self._supervise, name="Obscura-Supervisor", daemon=True)
+            self._supervisor.start()
+            return True
 
     def stop(self):
-        """Obscura'yı durdur."""
+        """Denetçiyi ve tüm Obscura süreçlerini durdur."""
+        self._stopped.set()
+        if self._supervisor and self._supervisor is not threading.current_thread():
+            self._supervisor.join(timeout=HEALTH_CHECK_INTERVAL_SECONDS + HEALTH_PROBE_TIMEOUT_SECONDS)
         with self._lock:
-            if self.process:
-                pid = self.process.pid
-                logging.info(f"Obscura durduruluyor (PID: {pid})...")
-                try:
-                    if os.name != 'nt':
-                        os.killpg(os.getpgid(pid), signal.SIGTERM)
-                    else:
-                        self.process.terminate()
-                    try:
-                        self.process.wait(timeout=5)
-                        logging.info(f"Obscura düzgünce kapatıldı (PID: {pid})")
-                    except subprocess.TimeoutExpired:
-                        logging.warning(f"Obscura zorla sonlandırılıyor (PID: {pid})...")
-                        if os.name != 'nt':
-                            os.killpg(os.getpgid(pid), signal.SIGKILL)
-                        else:
-                            self.process.kill()
-                        self.process.wait(timeout=3)
-                except ProcessLookupError:
-                    logging.info(f"Obscura süreci zaten kapanmış (PID: {pid})")
-                except Exception as e:
-                    logging.error(f"Obscura kapatılırken hata: {e}")
-                finally:
-                    self.process = None
+            instances, self.instances = self.instances, []
+            self._capacity_freed.notify_all()
+        for instance in instances:
+            instance.terminate()
+
+    def restart(self) -> bool:
+        """Obscura'yı yeniden başlat."""
+        self.stop()
+        time.sleep(1)
+        return self.start()
 
     def is_running(self) -> bool:
-        """Obscura'nın çalışıp çalışmadığını kontrol et."""
-        if self.process and self.process.poll() is None:
-            return self._is_port_in_use()
-        return self._is_port_in_use()
+        """En az bir sağlıklı Obscura süreci var mı?"""
+        return any(instance.healthy and instance.alive() for instance in list(self.instances))
 
     def get_ws_endpoint(self) -> str:
         """WebSocket endpoint URL'sini döndür."""
         return f"ws://127.0.0.1:{self.port}"
 
     def get_cdp_endpoint(self) -> str:
-        """CDP endpoint URL'sini döndür."""
+        """Birincil sürecin CDP endpoint URL'si; yeniden başlatmalarda aynı port kullanılır."""
         return f"http://127.0.0.1:{self.port}"
 
-    def restart(self) -> bool:
-        """Obscura'yı yeniden başlat."""
-        self.stop()
-        time.sleep(1)
-        return self.start()
+    # --- Bağlantı kiralama ve ölçekleme ---
+
+    def acquire_endpoint(self, timeout: float = START_TIMEOUT_SECONDS * 2, preferred: str = None) -> str:
+        """En az yüklü sağlıklı süreci kiralar; hepsi doluysa yeni süreç açar. Sağlıklı süreç yoksa kısa süre bekler.
+        preferred, çağıranın hâlihazırda bağlı olduğu uç noktadır; yeri varsa yeniden bağlanmamak için o seçilir."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                # Süreç hiç başlatılmadıysa (veya durdurulduysa) beklenecek bir şey yoktur.
+                if not self.instances: return self.get_cdp_endpoint()
+                healthy = [i for i in self.instances if i.healthy]
+                current = next((i for i in healthy if i.endpoint == preferred and i.leases < i.workers), None)
+                if current is not None:
+                    current.leases += 1
+                    return current.endpoint
+                instance = min(healthy, key=lambda i: i.leases / i.workers) if healthy else None
+                must_scale = (instance is None or instance.leases >= instance.workers) and len(self.instances) < self.max_instances and not self._scaling and bool(self.instances)
+                if instance is not None and (instance.leases < instance.workers or not must_scale):
+                    instance.leases += 1
+                    return instance.endpoint
+                if must_scale: self._scaling = True
+                elif time.monotonic() >= deadline:
+                    # Yoklama bir sonraki turda düzelebilir; birincil uç nokta yine de denenir.
+                    return self.get_cdp_endpoint()
+                else:
+                    self._capacity_freed.wait(min(1.0, max(0.0, deadline - time.monotonic())))
+                    continue
+            self._scale_out()
+
+    def release_endpoint(self, endpoint: str):
+        with self._lock:
+            for instance in self.instances:
+                if instance.endpoint == endpoint and instance.leases > 0:
+                    instance.leases -= 1
+                    if instance.leases == 0: instance.idle_since = time.monotonic()
+                    self._capacity_freed.notify_all()
+                    return
+
+    def _next_free_port(self) -> int:
+        used = {instance.port for instance in self.instances}
+        port = self.port + 1
+        while port in used or _is_port_in_use(port): port += 1
+        return port
+
+    def _scale_out(self):
+        try:
+            with self._lock:
+                port = self._next_free_port()
+            instance = _ObscuraInstance(self.binary_path, port, self.workers, self.stealth)
+            logging.info(f"Tarayıcı talebi mevcut kapasiteyi aştı, ek Obscura süreci açılıyor (Port: {port}).")
+            if instance.launch():
+                with self._lock:
+                    if self._stopped.is_set():
+                        instance.terminate()
+                    else:
+                        self.instances.append(instance)
+        finally:
+            with self._lock:
+                self._scaling = False
+                self._capacity_freed.notify_all()
+
+    # --- Denetim ---
+
+    def _supervise(self):
+        while not self._stopped.wait(HEALTH_CHECK_INTERVAL_SECONDS):
+            for instance in list(self.instances):
+                if self._stopped.is_set(): return
+                self._check_instance(instance)
+            self._scale_in()
+
+    def _check_instance(self, instance: _ObscuraInstance):
+        now = time.monotonic()
+        if instance.restart_at is not None:
+            if now < instance.restart_at: return
+            if instance.launch():
+                instance.restart_at = None
+                with self._lock: self._capacity_freed.notify_all()
+            else:
+                self._schedule_restart(instance)
+            return
+        if instance.alive() and instance.probe():
+            instance.failures = 0
+            instance.healthy = True
+            if instance.backoff and now - instance.started_at > STABLE_UPTIME_SECONDS: instance.backoff = 0.0
+            return
+        if instance.alive():
+            instance.failures += 1
+            logging.warning(f"[{instance.label}] CDP yoklaması başarısız ({instance.failures}/{HEALTH_FAILURE_LIMIT}).")
+            if instance.failures < HEALTH_FAILURE_LIMIT: return
+        else:
+            code = instance.process.returncode if instance.process else None
+            logging.error(f"[{instance.label}] Obscura süreci beklenmedik şekilde kapandı (çıkış kodu: {code}). Son çıktı: {instance.tail_text()}")
+        instance.terminate()
+        self._schedule_restart(instance)
+
+    def _schedule_restart(self, instance: _ObscuraInstance):
+        instance.healthy = False
+        instance.backoff = min(MAX_RESTART_BACKOFF_SECONDS, instance.backoff * 2 if instance.backoff else RESTART_BACKOFF_SECONDS)
+        instance.restart_at = time.monotonic() + instance.backoff
+        logging.warning(f"[{instance.label}] {instance.backoff:.0f} saniye sonra yeniden başlatılacak.")
+
+    def _scale_in(self):
+        now = time.monotonic()
+        with self._lock:
+            idle = [i for i in self.instances[1:] if i.leases == 0 and now - i.idle_since > SCALE_IN_IDLE_SECONDS]
+            for instance in idle: self.instances.remove(instance)
+        for instance in idle:
+            logging.info(f"[{instance.label}] Boşta kalan ek Obscura süreci kapatılıyor.")
+            instance.terminate()
@@ -1,9 +1,9 @@
+import asyncio
+import copy
 import requests
-from bs4 import BeautifulSoup
-from PIL import Image
+from bs4 import BeautifulSoup, SoupStrainer
 import io
 import base64
-from openai import OpenAI
 import json
 import time
 import hashlib
@@ -12,11 +12,27 @@ import re
 from typing import List, Dict, Any, Optional
 from urllib.parse import urljoin, urlparse
 import threading
+import queue
+from contextlib import contextmanager
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 
+from .profiler import profiler
+from .single_flight import single_flight
+from .supplier_io import supplier_io
+
+HTML_ACCEPT = "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8"
+DEFAULT_MAX_CONCURRENCY = 4
+# Ayrıştırıcının önünde en fazla bu kadar sonuç sayfası indirilmiş olarak bekler.
+PAGE_PREFETCH_DEPTH = 2
+# Aynı ürünün fiyat/stok sorguları eşzamanlı aramalar arasında birleşir ve bu süre boyunca paylaşılır.
+DETAIL_MEMO_TTL_SECONDS = 60
+# Sunucu tarafı oturum çerezi (arama ve sayfalama durumu burada tutulur) havuz oturumlarına kopyalanmaz;
+# her havuz oturumu kendi sunucu oturumunu alır, yalnızca giriş çerezleri paylaşılır.
+SERVER_SESSION_COOKIES = frozenset({"ASP.NET_SessionId"})
+
 class OrkimScraper:
-    def __init__(self, username: str, password: str, openai_api_key: str):
+    def __init__(self, username: str, password: str, openai_api_key: str, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
         self.username = username
         self.password = password
         self.openai_api_key = openai_api_key
@@ -30,8 +46,60 @@ class OrkimScraper:
         self.session = self._create_session()
         self.is_logged_in = False
         self.session_manager_stop_event = threading.Event()
+        # Giriş ana oturumda yapılır; havuzdaki oturumlar CAPTCHA ile alınan giriş çerezlerini girişte alınan kopyadan yükler.
+        self._session_pool: queue.LifoQueue = queue.LifoQueue()
+        self._pool_lock = threading.Lock()
+        self._cookie_generation = 0
+        self._auth_cookies: List[Any] = []
+        # Sepet hesap bazında tek olduğu için stok kontrolünün sepet adımları sırayla yapılır.
+        self._cart_lock = threading.Lock()
+        self.max_concurrency = 1
+        self._detail_slots = threading.BoundedSemaphore(1)
+        self.set_max_concurrency(max_concurrency)
         logging.getLogger("urllib3").setLevel(logging.WARNING)
 
+    def set_max_concurrency(self, max_concurrency: int):
+        """Aynı anda çalışabilecek fiyat/stok detay isteklerinin sayısını ayarlar."""
+        try:
+            max_concurrency = max(1, int(max_concurrency))
+        except (TypeError, ValueError):
+            logging.warning(f"Orkim: Geçersiz eşzamanlılık limiti yok sayıldı: {max_concurrency}")
+            return
+        if max_concurrency != self.max_concurrency:
+            self.max_concurrency = max_concurrency
+            self._detail_slots = threading.BoundedSemaphore(max_concurrency)
+            supplier_io.set_host_limit(urlparse(self.base_url).hostname, max_concurrency)
+
+    @staticmethod
+    def _headers(accept: str = HTML_ACCEPT, referer: str = None, content_type: str = None, ajax: bool = False) -> Dict[str, Optional[str]]:
+        """İstek başına başlıklar; None değerler oturumun varsayılan başlığını bu istek için kaldırır."""
+        headers = {"Accept": accept, "Content-Type": content_type, "X-Requested-With": "XMLHttpRequest" if ajax else None}
+        if referer: headers["Referer"] = referer
+        return headers
+
+    def _borrow_session(self):
+        """Havuzdan bir oturum alır; giriş yenilendiyse giriş çerezlerini son girişin kopyasından tazeler."""
+        try:
+            session, generation = self._session_pool.get_nowait()
+        except queue.Empty:
+            session, generation = self._create_session(), -1
+        with self._pool_lock:
+            current_generation, auth_cookies = self._cookie_generation, self._auth_cookies
+        if generation != current_generation:
+            for cookie in auth_cookies: session.cookies.set_cookie(copy.copy(cookie))
+        return session, current_generation
+
+    def _release_session(self, session: requests.Session, generation: int):
+        self._session_pool.put((session, generation))
+
+    @contextmanager
+    def _pooled_session(self):
+        session, generation = self._borrow_session()
+        try:
+            yield session
+        finally:
+            self._release_session(session, generation)
+
     def _create_session(self):
         session = requests.Session()
         retry_strategy = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["HEAD", "GET", "POST"])
@@ -49,6 +117,7 @@ class OrkimScraper:
 
     def _process_captcha_image(self, image_bytes: bytes) -> bytes or None:
         try:
+            from PIL import Image
             image = Image.open(io.BytesIO(image_bytes))
             image = image.convert('L')
             threshold = 150
@@ -65,6 +134,7 @@ class OrkimScraper:
         if not self.openai_api_key:
             logging.error("Orkim - OpenAI API anahtarı bulunamadı.")
             return None
+        from openai import OpenAI  # Yalnızca CAPTCHA çözümünde gerekir; açılışta yüklenmez.
         client = OpenAI(api_key=self.openai_api_key)
         base64_image = base64.b64encode(image_bytes).decode('utf-8')
         logging.info("Orkim: Temizlenmiş resim GPT-4o-mini'ye gönderiliyor...")
@@ -90,10 +160,9 @@ class OrkimScraper:
 
     def _perform_two_step_login(self, captcha_text: str, re_security_code: str) -> bool:
         logging.info("Orkim: 1. Aşama: Giriş bilgileri gönderiliyor...")
-        self.session.headers.update({"Accept": "application/json, text/javascript, */*; q=0.01", "X-Requested-With": "XMLHttpRequest"})
         payload_step1 = {"Email": self.username, "Sifre": self.password, "SecurityCode": captcha_text, "ReSecurityCode": re_security_code}
         try:
-            response_step1 = self.session.post(self.first_login_step_url, data=payload_step1, timeout=20)
+            response_step1 = self.session.post(self.first_login_step_url, data=payload_step1, headers=self._headers(accept="application/json, text/javascript, */*; q=0.01", ajax=True), timeout=20)
             response_step1.raise_for_status()
             login_data = response_step1.json()
             if not login_data.get("IsSuccessful"):
@@ -118,11 +187,15 @@ class OrkimScraper:
         logging.info("Orkim: 2. Aşama: Firma seçimi ve giriş tamamlama...")
         payload_step2 = {"Kurum": kurum_kod, "Email": self.username, "Sifre": self.password, "SecurityCode": captcha_text, "ReSecurityCode": re_security_code, "KisiKod": kisi_kod}
         try:
-            self.session.headers.update({"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8", "X-Requested-With": None})
-            response_step2 = self.session.post(self.second_login_step_url, data=payload_step2, timeout=20)
+            response_step2 = self.session.post(self.second_login_step_url, data=payload_step2, headers=self._headers(), timeout=20)
             response_step2.raise_for_status()
             if "hesabim" in response_step2.url or "Merhaba" in response_step2.text:
                 logging.info("Orkim GİRİŞ BAŞARILI! Oturum çerezi alındı.")
+                # Ana oturumun çerezlerini yalnızca bu thread değiştirir; havuz, kilit altında yayımlanan kopyayı okur.
+                auth_cookies = [copy.copy(cookie) for cookie in self.session.cookies if cookie.name not in SERVER_SESSION_COOKIES]
+                with self._pool_lock:
+                    self._auth_cookies = auth_cookies
+                    self._cookie_generation += 1
                 self.is_logged_in = True
                 return True
             else:
@@ -146,8 +219,7 @@ class OrkimScraper:
                 return False
             logging.info(f"Orkim (Arka Plan): Giriş denemesi {i + 1}/{max_retries}...")
             try:
-                self.session.headers.update({"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8", "X-Requested-With": None})
-                response = self.session.get(self.login_page_url, timeout=15)
+                response = self.session.get(self.login_page_url, headers=self._headers(), timeout=15)
                 response.raise_for_status()
                 soup = BeautifulSoup(response.text, 'lxml')
                 captcha_img = soup.find('img', {'id': 'SecurityCode'})
@@ -167,8 +239,7 @@ class OrkimScraper:
                     time.sleep(2)
                     continue
                 captcha_url = urljoin(self.base_url, captcha_url_relative)
-                self.session.headers.update({"Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8"})
-                captcha_response = self.session.get(captcha_url, timeout=15)
+                captcha_response = self.session.get(captcha_url, headers=self._headers(accept="image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8"), timeout=15)
                 captcha_response.raise_for_status()
                 captcha_bytes = captcha_response.content
                 processed_bytes = self._process_captcha_image(captcha_bytes)
@@ -202,8 +273,7 @@ class OrkimScraper:
         if not self.is_logged_in:
             return False
         try:
-            self.session.headers.update({"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8", "X-Requested-With": None, "Referer": self.base_url})
-            response = self.session.get(self.account_check_url, timeout=10, allow_redirects=False)
+            response = self.session.get(self.account_check_url, headers=self._headers(referer=self.base_url), timeout=10, allow_redirects=False)
             if response.status_code == 200 and "Merhaba" in response.text:
                 return True
             else:
@@ -237,12 +307,18 @@ class OrkimScraper:
                 break
         logging.info("Orkim Arka Plan Oturum Yöneticisi durduruldu.")
 
-    def _get_product_price_ajax(self, urun_no: str) -> str:
+    def _get_product_price_ajax(self, urun_no: str, referer: str = None) -> str:
         if not urun_no: return "N/A"
+        fetch = lambda: self._fetch_product_price_ajax(urun_no, referer)
+        return single_flight.do("orkim", "price_ajax", (self.username, urun_no), fetch, ttl=lambda price: 0 if price == "Hata" else DETAIL_MEMO_TTL_SECONDS)
+
+    def _fetch_product_price_ajax(self, urun_no: str, referer: str = None) -> str:
         try:
             payload = {'UrunNo': urun_no}
-            self.session.headers.update({"Accept": "*/*", "X-Requested-With": "XMLHttpRequest", "Referer": self.session.headers.get("Referer", self.base_url)})
-            response = self.session.post(self.price_check_url, data=payload, timeout=15)
+            with self._detail_slots, self._pooled_session() as session:
+                with profiler.span("orkim.price_ajax", "orkim", product=urun_no) as span:
+                    response = supplier_io.run(supplier_io.request(session, "POST", self.price_check_url, data=payload, headers=self._headers(accept="*/*", referer=referer or self.base_url, ajax=True), timeout=15, retries=3))
+                    span.set(bytes=len(response.content), status=response.status_code)
             response.raise_for_status()
             price_text = response.text.strip()
             if price_text.startswith('"') and price_text.endswith('"'):
@@ -292,7 +368,7 @@ class OrkimScraper:
                         logging.info(f"Orkim: UrunNo bulundu: {urun_no}")
                         break
             if urun_no:
-                product_data['price_str'] = self._get_product_price_ajax(urun_no)
+                product_data['price_str'] = self._get_product_price_ajax(urun_no, referer=product_url)
             else:
                 logging.warning("Orkim: 'Fiyatı Göster' butonu var ama UrunNo bulunamadı.")
                 product_data['price_str'] = "N/A"
@@ -339,16 +415,107 @@ class OrkimScraper:
         logging.info(f"Orkim: Ürün sayfası ayrıştırma sonucu: {product_data}")
         return [product_data]
 
-    def search_products(self, search_term: str, cancellation_token, search_logic: str = "exact") -> List[Dict[str, Any]]:
+    def _parse_result_item(self, item) -> Dict[str, Any]:
+        product_data = {}
+        product_data['source'] = "Orkim"
+        product_name_tag = item.select_one('h3 a')
+        product_data['urun_adi'] = product_name_tag.get_text(strip=True) if product_name_tag else 'N/A'
+        product_url = urljoin(self.base_url, product_name_tag['href']) if product_name_tag and product_name_tag.get('href') else None
+        product_data['product_url'] = product_url
+        kkodu_td = item.find('td', string='K.Kodu')
+        kkodu_next_td = kkodu_td.find_next_sibling('td') if kkodu_td else None
+        product_data['k_kodu'] = kkodu_next_td.get_text(strip=True) if kkodu_next_td else 'N/A'
+        product_data['brand'] = "Orkim"
+        fiyat_td = item.find('td', string='Fiyat')
+        if fiyat_td and (fiyat_cell := fiyat_td.find_next_sibling('td')):
+            if birim_fiyat_tag := fiyat_cell.find('span', class_='birimfiyat'):
+                kdv_fiyat_tag = fiyat_cell.find('span', class_='kdvfiyat')
+                birim_fiyat = birim_fiyat_tag.get_text(strip=True)
+                kdv_fiyat = kdv_fiyat_tag.get_text(strip=True) if kdv_fiyat_tag else ''
+                product_data['price_str'] = f"{birim_fiyat} {kdv_fiyat}".strip()
+            elif "Teklif İsteyiniz" in fiyat_cell.get_text():
+                product_data['price_str'] = "Teklif İsteyiniz"
+            else:
+                product_data['price_str'] = fiyat_cell.get_text(strip=True) or "N/A"
+        else:
+            product_data['price_str'] = "N/A"
+        stock_status = "Bilinmiyor"
+        stock_quantity: Any = "N/A"
+        instock_img = item.find('img', src=lambda s: s and 'instock.png' in s)
+        outstock_img = item.find('img', src=lambda s: s and 'outstock.png' in s)
+        if instock_img:
+            stock_status = "Stokta Var"
+            stock_quantity = "Var"
+        elif outstock_img:
+            stock_status = "Stokta Yok"
+            stock_quantity = 0
+        product_data['stock_status'] = stock_status
+        product_data['stock_quantity'] = stock_quantity
+        return product_data
+
+    @staticmethod
+    def _find_next_page_url(html_content: str, current_url: str) -> Optional[str]:
+        soup = BeautifulSoup(html_content, 'lxml', parse_only=SoupStrainer('a'))
+        next_page_link = soup.find('a', class_='sonrakiSayfa')
+        if not next_page_link:
+            next_page_link = soup.find('a', string='»', href=True)
+            if next_page_link and 'disabled' in next_page_link.get('class', []):
+                next_page_link = None
+        if next_page_link and next_page_link.get('href'):
+            return urljoin(current_url, next_page_link['href'])
+        return None
+
+    async def _prefetch_result_pages(self, borrowed_session, response: requests.Response, page_queue: queue.Queue, stop_event: threading.Event, search_term: str = None):
+        """
+        Sonraki sayfa linklerini izleyerek sonuç sayfalarını ayrıştırıcının önünde indirir.
+        Arama durumu sunucu oturumunda tutulduğu için aramayı yapan havuz oturumunu devralır ve işi bitince havuza iade eder.
+        """
+        session = borrowed_session[0]
+        page_number = 1
+        async def put(item) -> bool:
+            while not stop_event.is_set():
+                try:
+                    page_queue.put_nowait(item)
+                    return True
+                except queue.Full:
+                    await asyncio.sleep(0.2)
+            return False
+        try:
+            while await put(response):
+                # HTML ayrıştırma G/Ç döngüsünü bloklamasın diye thread havuzunda yapılır.
+                next_page_url = await asyncio.to_thread(lambda: self._find_next_page_url(response.text, response.url))
+                if not next_page_url:
+                    logging.info("Orkim: Sonraki sayfa linki bulunamadı, tarama tamamlandı.")
+                    break
+                if stop_event.is_set():
+                    break
+                logging.info(f"Orkim: Sonraki sayfa önceden indiriliyor: {next_page_url}")
+                page_number += 1
+                with profiler.span("orkim.page", "orkim", term=search_term, page=page_number) as span:
+                    response = await supplier_io.request(session, "GET", next_page_url, headers=self._headers(referer=response.url), timeout=20, retries=3)
+                    span.set(bytes=len(response.content), status=response.status_code)
+                response.raise_for_status()
+        except Exception as e:
+            await put(e)
+        finally:
+            await put(None)
+            self._release_session(*borrowed_session)
+
+    def search_products(self, search_term: str, cancellation_token, search_logic: str = "exact", incomplete: threading.Event = None) -> List[Dict[str, Any]]:
+        """Aramayı yapar ve eşleşen ürünleri döndürür; hata yüzünden tarama yarıda kaldıysa incomplete olayı kurulur."""
         if cancellation_token.is_set(): return []
         if not self.is_logged_in:
             logging.warning("Orkim oturumu henüz aktif değil. Arama sonuçları eksik olabilir veya hata verebilir.")
         logging.info(f"Orkim: '{search_term}' aranıyor (Mantık: {search_logic})...")
         all_scraped_data = []
         term_lower = search_term.lower()
+        stop_fetching = threading.Event()
+        borrowed_session = self._borrow_session()
+        session = borrowed_session[0]
         try:
-            self.session.headers.update({"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8", "Content-Type": "application/x-www-form-urlencoded", "X-Requested-With": None})
-            response = self.session.post(self.search_url, data={'arama': search_term, 'search1': ''}, allow_redirects=True, timeout=30)
+            with profiler.span("orkim.search", "orkim", term=search_term) as span:
+                response = session.post(self.search_url, data={'arama': search_term, 'search1': ''}, headers=self._headers(content_type="application/x-www-form-urlencoded"), allow_redirects=True, timeout=30)
+                span.set(bytes=len(response.content), status=response.status_code)
             response.raise_for_status()
             if "/urun/" in response.url:
                 logging.info(f"Orkim: '{search_term}' araması doğrudan ürün sayfasına yönlendirdi: {response.url}")
@@ -365,67 +532,38 @@ class OrkimScraper:
                 else: match_found = True
                 return [product] if match_found else []
             logging.info(f"Orkim: '{search_term}' araması sonuç sayfasına yönlendirdi: {response.url}")
-            base_search_url = response.url
-            parsed_url = urlparse(base_search_url)
-            base_path_for_page = parsed_url.path if parsed_url.path.endswith('/') else parsed_url.path.rsplit('/', 1)[0] + '/'
-            pagination_base = urljoin(self.base_url, base_path_for_page)
-            page_number = 1
+            page_queue: queue.Queue = queue.Queue(maxsize=PAGE_PREFETCH_DEPTH)
+            prefetch_args, borrowed_session = (borrowed_session, response, page_queue, stop_fetching, search_term), None
+            supplier_io.submit(self._prefetch_result_pages(*prefetch_args))
+            page_number = 0
             last_page_content_hash = ""
             while not cancellation_token.is_set():
-                current_url = response.url
-                logging.info(f"Orkim: Sayfa {page_number} taranıyor ({current_url})...")
+                try:
+                    response = page_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if response is None: break
+                if isinstance(response, Exception): raise response
+                page_number += 1
+                logging.info(f"Orkim: Sayfa {page_number} taranıyor ({response.url})...")
                 logging.debug(f"Orkim Raw HTML for page {page_number}:\n{response.text[:2000]}...")
-                soup = BeautifulSoup(response.text, 'lxml')
-                product_items = soup.select('div.main_content div.products_box div.products_content div.row div.asinItem')
+                with profiler.span("orkim.parse", "orkim", term=search_term, page=page_number) as span:
+                    soup = BeautifulSoup(response.text, 'lxml')
+                    product_items = soup.select('div.main_content div.products_box div.products_content div.row div.asinItem')
+                    span.set(items=len(product_items))
                 logging.info(f"Orkim: Found {len(product_items)} product items using selector.")
                 current_content_hash = hashlib.md5(str(product_items).encode()).hexdigest()
                 if current_content_hash == last_page_content_hash and page_number > 1:
                     logging.warning(f"Orkim: Sayfa {page_number} içeriği öncekiyle aynı, döngüden çıkılıyor.")
                     break
+                last_page_content_hash = current_content_hash
                 if not product_items:
                     logging.info(f"Orkim: Sayfa {page_number} üzerinde ürün bulunamadı, tarama tamamlandı.")
                     break
                 for item_index, item in enumerate(product_items):
                     if cancellation_token.is_set(): break
-                    logging.debug(f"Processing Orkim item {item_index + 1}")
-                    product_data = {}
-                    product_data['source'] = "Orkim"
-                    product_name_tag = item.select_one('h3 a')
-                    product_data['urun_adi'] = product_name_tag.get_text(strip=True) if product_name_tag else 'N/A'
-                    product_url_tag = item.select_one('h3 a')
-                    product_url = urljoin(self.base_url, product_url_tag['href']) if product_url_tag and product_url_tag.get('href') else None
-                    product_data['product_url'] = product_url
-                    logging.debug(f"  Item {item_index + 1}: Name='{product_data['urun_adi']}', URL='{product_url}'")
-                    kkodu_td = item.find('td', string='K.Kodu')
-                    kkodu_next_td = kkodu_td.find_next_sibling('td') if kkodu_td else None
-                    product_data['k_kodu'] = kkodu_next_td.get_text(strip=True) if kkodu_next_td else 'N/A'
-                    logging.debug(f"  Item {item_index + 1}: K.Kodu TD found: {bool(kkodu_td)}, Next TD found: {bool(kkodu_next_td)}, Value: {product_data['k_kodu']}")
-                    product_data['brand'] = "Orkim"
-                    fiyat_td = item.find('td', string='Fiyat')
-                    if fiyat_td and (fiyat_cell := fiyat_td.find_next_sibling('td')):
-                        if birim_fiyat_tag := fiyat_cell.find('span', class_='birimfiyat'):
-                            kdv_fiyat_tag = fiyat_cell.find('span', class_='kdvfiyat')
-                            birim_fiyat = birim_fiyat_tag.get_text(strip=True)
-                            kdv_fiyat = kdv_fiyat_tag.get_text(strip=True) if kdv_fiyat_tag else ''
-                            product_data['price_str'] = f"{birim_fiyat} {kdv_fiyat}".strip()
-                        elif "Teklif İsteyiniz" in fiyat_cell.get_text():
-                            product_data['price_str'] = "Teklif İsteyiniz"
-                        else:
-                            product_data['price_str'] = fiyat_cell.get_text(strip=True) or "N/A"
-                    else:
-                        product_data['price_str'] = "N/A"
-                    stock_status = "Bilinmiyor"
-                    stock_quantity: Any = "N/A"
-                    instock_img = item.find('img', src=lambda s: s and 'instock.png' in s)
-                    outstock_img = item.find('img', src=lambda s: s and 'outstock.png' in s)
-                    if instock_img:
-                        stock_status = "Stokta Var"
-                        stock_quantity = "Var"
-                    elif outstock_img:
-                        stock_status = "Stokta Yok"
-                        stock_quantity = 0
-                    product_data['stock_status'] = stock_status
-                    product_data['stock_quantity'] = stock_quantity
+                    product_data = self._parse_result_item(item)
+                    logging.debug(f"  Item {item_index + 1}: Parsed data before match check: {product_data}")
                     match_found = False
                     if search_logic == "exact":
                         product_name_lower = product_data.get('urun_adi', '').lower()
@@ -435,90 +573,90 @@ class OrkimScraper:
                     else: match_found = True
                     if match_found:
                         all_scraped_data.append(product_data)
-                    logging.debug(f"  Item {item_index + 1}: Parsed data before match check: {product_data}")
-                next_page_link = soup.find('a', class_='sonrakiSayfa')
-                if not next_page_link:
-                    next_page_link = soup.find('a', string='»', href=True)
-                    if next_page_link and 'disabled' in next_page_link.get('class', []):
-                        next_page_link = None
-                if next_page_link and next_page_link.get('href'):
-                    next_page_url = urljoin(current_url, next_page_link['href'])
-                    logging.info(f"Orkim: Sonraki sayfaya geçiliyor: {next_page_url}")
-                    page_number += 1
-                    self.session.headers.update({"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8", "Content-Type": None, "X-Requested-With": None, "Referer": current_url})
-                    response = self.session.get(next_page_url, timeout=20)
-                    response.raise_for_status()
-                else:
-                    logging.info("Orkim: Sonraki sayfa linki bulunamadı, tarama tamamlandı.")
-                    break
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
                 logging.warning(f"Orkim: '{search_term}' araması 404 hatası verdi (Ürün bulunamadı veya sayfa yok).")
             else:
                 logging.error(f"Orkim: HTTP hatası: {e}", exc_info=True)
+                if incomplete is not None: incomplete.set()
         except Exception as e:
             logging.error(f"Orkim ürün arama/çekme sırasında hata: {e}", exc_info=True)
+            if incomplete is not None: incomplete.set()
+        finally:
+            stop_fetching.set()
+            if borrowed_session: self._release_session(*borrowed_session)
         logging.info(f"Orkim: '{search_term}' araması tamamlandı, {len(all_scraped_data)} ürün bulundu.")
         return all_scraped_data
 
     def _get_stock_from_page(self, product_url: str) -> int:
+        fetch = lambda: self._fetch_stock_from_page(product_url)
+        stock_quantity = single_flight.do("orkim", "stock", (self.username, product_url), fetch, ttl=lambda stock: 0 if stock is None else DETAIL_MEMO_TTL_SECONDS)
+        return stock_quantity if stock_quantity is not None else 0
+
+    def _fetch_stock_from_page(self, product_url: str) -> Optional[int]:
+        """Stok miktarını sepet üzerinden okur; ağ veya beklenmedik hata durumunda None döner."""
         try:
-            self.session.headers.update({"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8", "Content-Type": None, "X-Requested-With": None, "Referer": self.session.headers.get("Referer")})
-            detail_response = self.session.get(product_url, timeout=20)
-            detail_response.raise_for_status()
-            soup = BeautifulSoup(detail_response.text, 'lxml')
-            form = soup.find('form', {'id': 'SepeteEkle'})
-            if not form:
-                logging.warning(f"Orkim: Stok kontrolü için {product_url} sayfasında sepet formu bulunamadı.")
-                return 0
-            action_url = urljoin(self.base_url, form.get('action'))
-            urun_input = form.find('input', {'name': 'urun'})
-            if not urun_input or not urun_input.get('value'):
-                logging.warning(f"Orkim: Stok kontrolü için {product_url} sayfasında 'urun' inputu bulunamadı veya değeri yok.")
-                return 0
-            urun_value = urun_input.get('value')
-            payload = {'miktar': '999999,0', 'urun': urun_value}
-            self.session.headers.update({"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8", "Content-Type": "application/x-www-form-urlencoded", "X-Requested-With": None, "Referer": product_url})
-            cart_response = self.session.post(action_url, data=payload, allow_redirects=True, timeout=25)
-            cart_response.raise_for_status()
-            cart_soup = BeautifulSoup(cart_response.text, 'lxml')
-            cart_page_url = cart_response.url
-            stock_quantity = 0
-            qty_input = cart_soup.select_one(f'input[name*="SepetMiktar"][value]')
-            if qty_input:
-                try:
-                    stock_str = qty_input.get('value', '0').replace(',', '.')
-                    stock_quantity = int(float(stock_str))
-                    logging.info(f"Orkim: Stok miktarı bulundu ({product_url}): {stock_quantity}")
-                except (ValueError, TypeError):
-                    logging.warning(f"Orkim: Stok miktarı '{qty_input.get('value')}' parse edilemedi ({product_url}).")
-            else:
-                if "Sepetinizde ürün bulunmamaktadır" in cart_response.text:
-                    logging.warning(f"Orkim: Sepet boş, ürün eklenemedi (muhtemelen stok yok) ({product_url}).")
-                    stock_quantity = 0
-                else:
-                    logging.warning(f"Orkim: Sepet sayfasında miktar input'u bulunamadı ({product_url}). Sepet içeriği: {cart_soup.prettify()[:1000]}")
-            item_id_input = cart_soup.select_one(f'input[name*="UrunNo"][value]')
-            remove_link_tag = None
-            if item_id_input:
-                item_id = item_id_input.get('value')
-                remove_link_tag = cart_soup.find('a', {'href': lambda h: h and f'sepet-sil/{item_id}' in h})
-            if remove_link_tag and remove_link_tag.get('href'):
-                remove_url = urljoin(self.base_url, remove_link_tag['href'])
-                self.session.headers.update({"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8", "Content-Type": None, "X-Requested-With": None, "Referer": cart_page_url})
-                remove_response = self.session.get(remove_url, timeout=20)
-                if remove_response.ok:
-                    logging.info(f"Orkim: Stok kontrolü sonrası ürün sepetten temizlendi ({product_url}).")
-                else:
-                    logging.warning(f"Orkim: Sepet temizleme isteği başarısız oldu ({product_url}, Status: {remove_response.status_code}).")
-            else:
-                logging.warning(f"Orkim: Sepet temizleme linki bulunamadı ({product_url}).")
-            return stock_quantity
+            with self._detail_slots, self._pooled_session() as session:
+                with profiler.span("orkim.stock_detail", "orkim", url=product_url) as span:
+                    detail_response = session.get(product_url, headers=self._headers(referer=self.search_url), timeout=20)
+                    span.set(bytes=len(detail_response.content), status=detail_response.status_code)
+                detail_response.raise_for_status()
+                soup = BeautifulSoup(detail_response.text, 'lxml')
+                form = soup.find('form', {'id': 'SepeteEkle'})
+                if not form:
+                    logging.warning(f"Orkim: Stok kontrolü için {product_url} sayfasında sepet formu bulunamadı.")
+                    return 0
+                action_url = urljoin(self.base_url, form.get('action'))
+                urun_input = form.find('input', {'name': 'urun'})
+                if not urun_input or not urun_input.get('value'):
+                    logging.warning(f"Orkim: Stok kontrolü için {product_url} sayfasında 'urun' inputu bulunamadı veya değeri yok.")
+                    return 0
+                urun_value = urun_input.get('value')
+                payload = {'miktar': '999999,0', 'urun': urun_value}
+                # Sepet hesap bazında paylaşıldığından ekle-oku-sil adımları aynı anda tek ürün için yapılır.
+                with self._cart_lock, profiler.span("orkim.stock_cart", "orkim", url=product_url):
+                    return self._check_stock_via_cart(session, product_url, action_url, payload)
         except requests.exceptions.RequestException as e:
             logging.error(f"Orkim stok miktarı alınırken ağ hatası ({product_url}): {e}")
         except Exception as e:
             logging.error(f"Orkim stok miktarı alınırken genel hata ({product_url}): {e}", exc_info=False)
-        return 0
+        return None
+
+    def _check_stock_via_cart(self, session: requests.Session, product_url: str, action_url: str, payload: Dict[str, str]) -> int:
+        cart_response = session.post(action_url, data=payload, headers=self._headers(referer=product_url, content_type="application/x-www-form-urlencoded"), allow_redirects=True, timeout=25)
+        cart_response.raise_for_status()
+        cart_soup = BeautifulSoup(cart_response.text, 'lxml')
+        cart_page_url = cart_response.url
+        stock_quantity = 0
+        qty_input = cart_soup.select_one(f'input[name*="SepetMiktar"][value]')
+        if qty_input:
+            try:
+                stock_str = qty_input.get('value', '0').replace(',', '.')
+                stock_quantity = int(float(stock_str))
+                logging.info(f"Orkim: Stok miktarı bulundu ({product_url}): {stock_quantity}")
+            except (ValueError, TypeError):
+                logging.warning(f"Orkim: Stok miktarı '{qty_input.get('value')}' parse edilemedi ({product_url}).")
+        else:
+            if "Sepetinizde ürün bulunmamaktadır" in cart_response.text:
+                logging.warning(f"Orkim: Sepet boş, ürün eklenemedi (muhtemelen stok yok) ({product_url}).")
+                stock_quantity = 0
+            else:
+                logging.warning(f"Orkim: Sepet sayfasında miktar input'u bulunamadı ({product_url}). Sepet içeriği: {cart_soup.prettify()[:1000]}")
+        item_id_input = cart_soup.select_one(f'input[name*="UrunNo"][value]')
+        remove_link_tag = None
+        if item_id_input:
+            item_id = item_id_input.get('value')
+            remove_link_tag = cart_soup.find('a', {'href': lambda h: h and f'sepet-sil/{item_id}' in h})
+        if remove_link_tag and remove_link_tag.get('href'):
+            remove_url = urljoin(self.base_url, remove_link_tag['href'])
+            remove_response = session.get(remove_url, headers=self._headers(referer=cart_page_url), timeout=20)
+            if remove_response.ok:
+                logging.info(f"Orkim: Stok kontrolü sonrası ürün sepetten temizlendi ({product_url}).")
+            else:
+                logging.warning(f"Orkim: Sepet temizleme isteği başarısız oldu ({product_url}, Status: {remove_response.status_code}).")
+        else:
+            logging.warning(f"Orkim: Sepet temizleme linki bulunamadı ({product_url}).")
+        return stock_quantity
 
     def close_driver(self):
         logging.info("Orkim kapatılıyor...")
@@ -526,3 +664,9 @@ class OrkimScraper:
         if self.session:
             self.session.close()
             logging.info("Orkim oturumu kapatıldı.")
+        while True:
+            try:
+                pooled_session, _ = self._session_pool.get_nowait()
+            except queue.Empty:
+                break
+            pooled_session.close()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Fiyat Metni Ayrıştırıcı
+=======================
+Tedarikçilerden gelen fiyat metinlerini ("1.234,56 € + %20 KDV", "$1,234.56",
+"45,00 TL") tek bir yerde, modül yüklenirken derlenmiş düzenli ifadelerle
+(tutar, para birimi, KDV) kaydına çevirir. Ondalık ayırıcı TR/DE (1.234,56),
+US (1,234.56) ve boşluk/kesme işaretli binlik (1 234,56, 1'234.56) biçimlerinden
+çıkarılır: iki ayırıcı varsa sondaki ondalıktır; tek tür ayırıcı birden fazla kez
+geçiyorsa binliktir, bir kez geçiyorsa ondalıktır.
+
+Aynı metinler (ör. toplu aramada tekrar eden fiyatlar) önbellekten döner;
+parse_prices listeler için toplu API'dir. Para birimleri ISO koduna (EUR, USD,
+GBP, TRY) normalleştirilir ve to_eur tüm kaynaklarda aynı parite kurallarıyla
+EUR'a çevirir.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+
+PARSE_CACHE_SIZE = 8192
+CURRENCY_SYMBOLS = {"EUR": "€", "USD": "$", "GBP": "£", "TRY": "₺"}
+# Birden fazla işaret geçerse bu öncelik kullanılır.
+_CURRENCY_MARKERS = (
+    ("EUR", re.compile(r'€|\beur(?:o)?\b', re.IGNORECASE)),
+    ("USD", re.compile(r'\$|\busd\b', re.IGNORECASE)),
+    ("GBP", re.compile(r'£|\bgbp\b', re.IGNORECASE)),
+    ("TRY", re.compile(r'₺|\btry\b|\btl\b|\bytl\b', re.IGNORECASE)),
+)
+_CURRENCY_ALIASES = {"EURO": "EUR", "€": "EUR", "$": "USD", "£": "GBP", "₺": "TRY", "TL": "TRY", "YTL": "TRY"}
+_VAT_PATTERN = re.compile(r'\+\s*%\s*(\d+)\s*KDV', re.IGNORECASE)
+_VAT_SUFFIX_PATTERN = re.compile(r'\s*\+\s*%\s*(\d+)\s*KDV.*', re.IGNORECASE | re.DOTALL)
+# Boşluk/kesme işareti yalnızca ardından üç haneli bir grup geliyorsa binlik ayırıcı sayılır ("1 234,56").
+_AMOUNT_PATTERN = re.compile(r"\d(?:[\d.,]|['\s\u00a0\u202f](?=\d{3}))*")
+_GROUPING_PATTERN = re.compile(r"['\s\u00a0\u202f]")
+UNPRICED_TEXTS = frozenset({"", "N/A", "Teklif İsteyiniz", "Fiyat Yok", "Fiyat Bilgisi Yok", "Hata"})
+
+
+class PriceRecord(NamedTuple):
+    amount: Optional[float]
+    currency: Optional[str]
+    vat: Optional[int]
+
+    @property
+    def symbol(self) -> str:
+        return CURRENCY_SYMBOLS.get(self.currency, "")
+
+
+EMPTY_PRICE = PriceRecord(None, None, None)
+
+
+def normalize_currency(value: Optional[str], default: Optional[str] = None) -> Optional[str]:
+    """Para birimi kodu veya sembolünü ISO koduna çevirir (TL -> TRY, € -> EUR); bilinmiyorsa default."""
+    if not value: return default
+    code = value.strip().upper()
+    code = _CURRENCY_ALIASES.get(code, code)
+    return code if code in CURRENCY_SYMBOLS else default
+
+
+def detect_currency(text: str, default: Optional[str] = None) -> Optional[str]:
+    for code, pattern in _CURRENCY_MARKERS:
+        if pattern.search(text): return code
+    return default
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """Metindeki ilk sayıyı TR/DE/US biçimlerini ayırt ederek okur; sayı yoksa None."""
+    match = _AMOUNT_PATTERN.search(text)
+    if not match: return None
+    number = _GROUPING_PATTERN.sub('', match.group()).rstrip('.,')
+    last_comma, last_dot = number.rfind(','), number.rfind('.')
+    if last_comma != -1 and last_dot != -1:
+        decimal = ',' if last_comma > last_dot else '.'
+        grouping = '.' if decimal == ',' else ','
+        number = number.replace(grouping, '').replace(decimal, '.')
+    elif last_comma != -1:
+        number = number.replace(',', '') if number.count(',') > 1 else number.replace(',', '.')
+    elif last_dot != -1 and number.count('.') > 1:
+        number = number.replace('.', '')
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse(text: str, default_currency: Optional[str]) -> PriceRecord:
+    text = text.strip()
+    if text in UNPRICED_TEXTS:
+        return PriceRecord(None, detect_currency(text, default_currency) if text else default_currency, None)
+    vat = None
+    vat_match = _VAT_PATTERN.search(text)
+    if vat_match:
+        vat = int(vat_match.group(1))
+        text = _VAT_SUFFIX_PATTERN.sub('', text).strip()
+    return PriceRecord(parse_amount(text), detect_currency(text, default_currency), vat)
+
+
+def parse_price(text: Optional[str], default_currency: Optional[str] = None) -> PriceRecord:
+    """Fiyat metnini (tutar, ISO para birimi, KDV yüzdesi) kaydına çevirir; okunamayan alanlar None olur."""
+    if text is None: return PriceRecord(None, default_currency, None)
+    return _parse(str(text), default_currency)
+
+
+def parse_prices(texts: Iterable[Optional[str]], default_currency: Optional[str] = None) -> List[PriceRecord]:
+    """parse_price'ın liste sürümü; tekrar eden metinler bir kez ayrıştırılır."""
+    seen: Dict[Optional[str], PriceRecord] = {}
+    records = []
+    for text in texts:
+        record = seen.get(text)
+        if record is None:
+            record = seen[text] = parse_price(text, default_currency)
+        records.append(record)
+    return records
+
+
+def eur_rate(currency: Optional[str], parities: Dict) -> Optional[float]:
+    """1 birim paranın EUR karşılığı; parite yoksa None."""
+    if currency == "EUR": return 1.0
+    if not currency: return None
+    rate = parities.get(f"{currency.lower()}_eur")
+    return rate if isinstance(rate, (int, float)) and rate > 0 else None
+
+
+def to_eur(amount: Optional[float], currency: Optional[str], parities: Dict) -> Optional[float]:
+    if amount is None: return None
+    rate = eur_rate(currency, parities)
+    return amount * rate if rate is not None else None
+
+
+def format_eur(amount: float) -> str:
+    """1234.5 -> '1.234,50€' (arayüzün kullandığı TR biçimi)."""
+    return f"{amount:,.2f}€".replace(",", "X").replace(".", ",").replace("X", ".")
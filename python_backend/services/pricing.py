@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Toplu EUR Fiyatlama
+===================
+Bir sayfa veya terim için toplanan tüm fiyat seçenekleri (tutar, para birimi,
+katsayı, kod, kaynak) sütunlar halinde biriktirilir; EUR dönüşümü ve katsayı
+uygulaması NumPy ile tek adımda yapılır, her ürünün en ucuz seçeneği tek bir
+sıralama geçişiyle bulunur. Pariteler parti başına bir kez alınır.
+
+Satırlar `group` (genellikle partideki ürünün sırası) ile ürünlere bağlanır.
+Eşit fiyatlarda ilk eklenen seçenek seçilir; sıfır, negatif veya dönüştürülemeyen
+(paritesi olmayan) fiyatlar en ucuz seçimine katılmaz.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .price_parser import eur_rate
+
+
+class PriceBatch:
+    def __init__(self):
+        self._groups: List[int] = []
+        self._amounts: List[float] = []
+        self._currencies: List[Optional[str]] = []
+        self._coefficients: List[float] = []
+        self._codes: List[Any] = []
+        self._sources: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self._amounts)
+
+    def add(self, group: int, amount: Optional[float], currency: Optional[str], coefficient: float = 1.0, code: Any = None, source: Any = None) -> int:
+        """Bir fiyat seçeneği ekler ve satır numarasını döndürür."""
+        self._groups.append(group)
+        self._amounts.append(float(amount) if isinstance(amount, (int, float)) else np.nan)
+        self._currencies.append(currency)
+        self._coefficients.append(coefficient)
+        self._codes.append(code)
+        self._sources.append(source)
+        return len(self._amounts) - 1
+
+    def evaluate(self, parities: Dict) -> "PricedBatch":
+        if not self._amounts: return PricedBatch(np.empty(0), {}, self._codes, self._sources)
+        currency_index: Dict[Optional[str], int] = {}
+        rows_currency = np.fromiter((currency_index.setdefault(c, len(currency_index)) for c in self._currencies), dtype=np.intp, count=len(self._currencies))
+        rates = np.array([eur_rate(c, parities) or np.nan for c in currency_index], dtype=float)
+        eur = np.asarray(self._amounts, dtype=float) * rates[rows_currency] * np.asarray(self._coefficients, dtype=float)
+        groups = np.asarray(self._groups, dtype=np.intp)
+        rows = np.flatnonzero(eur > 0)
+        # Grup içinde fiyata göre sıralı; lexsort kararlı olduğundan eşitlikte ilk eklenen satır önde kalır.
+        order = rows[np.lexsort((eur[rows], groups[rows]))]
+        sorted_groups = groups[order]
+        first = np.flatnonzero(np.concatenate(([True], sorted_groups[1:] != sorted_groups[:-1]))) if len(order) else order
+        cheapest = dict(zip(sorted_groups[first].tolist(), order[first].tolist()))
+        return PricedBatch(eur, cheapest, self._codes, self._sources)
+
+
+class PricedBatch:
+    def __init__(self, eur: np.ndarray, cheapest_rows: Dict[int, int], codes: List[Any], sources: List[Any]):
+        self.eur = eur
+        self._cheapest_rows = cheapest_rows
+        self._codes = codes
+        self._sources = sources
+
+    def price(self, row: int) -> Optional[float]:
+        """Satırın katsayı uygulanmış EUR fiyatı; dönüştürülemediyse None."""
+        value = self.eur[row]
+        return None if np.isnan(value) else float(value)
+
+    def cheapest(self, group: int) -> Dict[str, Any]:
+        """Grubun en ucuz seçeneği ({'price', 'code', 'source'}); geçerli fiyat yoksa boş sözlük."""
+        row = self._cheapest_rows.get(group)
+        if row is None: return {}
+        return {'price': float(self.eur[row]), 'code': self._codes[row], 'source': self._sources[row]}
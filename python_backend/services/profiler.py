@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Arama Zaman Çizelgesi Profilleyicisi
+====================================
+Tedarikçi çağrıları için isteğe bağlı zaman aralıkları (span) kaydeder. Kapalıyken
+span() neredeyse maliyetsizdir. Kayıtlar Chrome trace-event JSON olarak dışa
+aktarılabilir (chrome://tracing veya Perfetto ile açılır) ve arama başına kaynak
+bazlı bir özet üretilebilir.
+
+Span'ler arama terimini "term" argümanıyla taşır. Terimi bilinmeyen ortak çağrılar
+(ör. döviz kuru, ülke bazlı fiyat istekleri) aynı zaman aralığındaki her aramanın
+özetine dahil edilir.
+
+Tedarikçi G/Ç döngüsündeki coroutine'ler aynı thread'i paylaştığından, asyncio
+görevi içinde açılan span'ler trace'te görev başına ayrı bir izde gösterilir.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+
+MAX_SPANS = 200000
+
+
+class _SpanHandle:
+    """Çalışan bir span'e sonradan argüman (ör. bayt sayısı) eklemek için kullanılır."""
+    __slots__ = ("args",)
+
+    def __init__(self, args: Dict[str, Any]):
+        self.args = args
+
+    def set(self, **kwargs):
+        self.args.update(kwargs)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **kwargs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _current_track() -> Dict[str, Any]:
+    """Span'in trace'teki izi: asyncio görevi içindeyse görev, değilse thread."""
+    thread = threading.current_thread()
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is None:
+        return {"tid": thread.ident, "thread": thread.name}
+    return {"tid": id(task), "thread": f"{thread.name} / {task.get_name()}"}
+
+
+class Profiler:
+    def __init__(self, max_spans: int = MAX_SPANS):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._spans: deque = deque(maxlen=max_spans)
+        self._origin_ns = time.perf_counter_ns()
+
+    def set_enabled(self, enabled: bool):
+        enabled = bool(enabled)
+        if enabled != self.enabled:
+            logging.info(f"Profilleyici {'açıldı' if enabled else 'kapatıldı'}.")
+        self.enabled = enabled
+
+    def now(self) -> int:
+        return time.perf_counter_ns()
+
+    @contextmanager
+    def span(self, name: str, category: str, **args):
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+        start_ns = time.perf_counter_ns()
+        handle = _SpanHandle({key: value for key, value in args.items() if value is not None})
+        try:
+            yield handle
+        except BaseException as e:
+            handle.args["error"] = type(e).__name__
+            raise
+        finally:
+            end_ns = time.perf_counter_ns()
+            record = {"name": name, "cat": category, "start_ns": start_ns, "end_ns": end_ns, **_current_track(), "args": handle.args}
+            with self._lock:
+                self._spans.append(record)
+
+    def record(self, name: str, category: str, start_ns: int, **args):
+        """Bağlam yöneticisiyle sarılamayan bir aralığı (ör. kuyrukta bekleme) başlangıcından şimdiye kadar kaydeder."""
+        if not self.enabled: return
+        record = {"name": name, "cat": category, "start_ns": start_ns, "end_ns": time.perf_counter_ns(), **_current_track(), "args": {key: value for key, value in args.items() if value is not None}}
+        with self._lock:
+            self._spans.append(record)
+
+    def spans_between(self, start_ns: int, end_ns: Optional[int] = None, terms: Iterable[str] = None) -> List[Dict[str, Any]]:
+        """Aralıkta başlayan span'leri döndürür; terms verilirse başka terimlere ait span'ler elenir."""
+        end_ns = end_ns if end_ns is not None else time.perf_counter_ns()
+        term_set = {t.lower() for t in terms} if terms is not None else None
+        with self._lock:
+            spans = [s for s in self._spans if start_ns <= s["start_ns"] <= end_ns]
+        if term_set is None:
+            return spans
+        return [s for s in spans if "term" not in s["args"] or str(s["args"]["term"]).lower() in term_set]
+
+    @staticmethod
+    def summarize(spans: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Kategori ve span adı bazında sayı, toplam/maksimum süre ve bayt toplamı."""
+        summary: Dict[str, Dict[str, Any]] = {}
+        for span in spans:
+            duration_ms = (span["end_ns"] - span["start_ns"]) / 1e6
+            entry = summary.setdefault(span["cat"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "bytes": 0, "errors": 0, "spans": {}})
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["bytes"] += int(span["args"].get("bytes") or 0)
+            if "error" in span["args"]: entry["errors"] += 1
+            by_name = entry["spans"].setdefault(span["name"], {"count": 0, "total_ms": 0.0})
+            by_name["count"] += 1
+            by_name["total_ms"] += duration_ms
+        for entry in summary.values():
+            entry["total_ms"] = round(entry["total_ms"], 1)
+            entry["max_ms"] = round(entry["max_ms"], 1)
+            for by_name in entry["spans"].values():
+                by_name["total_ms"] = round(by_name["total_ms"], 1)
+        return summary
+
+    def to_chrome_trace(self, spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        pid = os.getpid()
+        events = []
+        thread_names = {}
+        for span in spans:
+            thread_names[span["tid"]] = span["thread"]
+            events.append({
+                "name": span["name"], "cat": span["cat"], "ph": "X", "pid": pid, "tid": span["tid"],
+                "ts": (span["start_ns"] - self._origin_ns) / 1000, "dur": (span["end_ns"] - span["start_ns"]) / 1000,
+                "args": span["args"],
+            })
+        for tid, thread_name in thread_names.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, spans: List[Dict[str, Any]], path: Path) -> Optional[Path]:
+        path = Path(path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_chrome_trace(spans), f, ensure_ascii=False, default=str)
+            return path
+        except (OSError, TypeError) as e:
+            logging.warning(f"Profil izi kaydedilemedi ({path}): {e}")
+            return None
+
+
+profiler = Profiler()
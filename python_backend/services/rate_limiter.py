@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Host Bazlı Uyarlanabilir Hız Sınırlayıcı
+========================================
+Tedarikçi G/Ç çekirdeğinden geçen her istek, hedef host'un denetleyicisinden izin
+alır. Her host için iki sınır birlikte uygulanır:
+
+- Jeton kovası: saniyede `rate` istek, en fazla `burst` isteklik ani yük.
+- AIMD eşzamanlılık: başarılı yanıtlarda limit yavaşça artar (her tam pencerede
+  +1), 429/5xx, zaman aşımı ve bağlantı hatalarında yarıya iner. Art arda gelen
+  hatalar tek bir azaltma sayılır (bir gecikme penceresi içinde en fazla bir kez).
+  429/503 yanıtındaki Retry-After süresince host'a yeni istek gönderilmez.
+
+Denetleyici yalnızca tedarikçi G/Ç olay döngüsünden kullanılır; stats() başka
+thread'lerden çağrılabilir.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+
+OUTCOME_OK = "ok"
+OUTCOME_THROTTLED = "throttled"
+OUTCOME_ERROR = "error"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_CANCELLED = "cancelled"
+
+THROTTLE_STATUSES = (429, 503)
+DECREASE_FACTOR = 0.5
+MAX_RETRY_AFTER_SECONDS = 60
+LATENCY_EWMA_ALPHA = 0.2
+
+
+@dataclass(frozen=True)
+class HostPolicy:
+    rate: float = 10.0
+    burst: int = 10
+    min_concurrency: int = 1
+    max_concurrency: int = 8
+    initial_concurrency: int = 4
+
+
+DEFAULT_POLICY = HostPolicy()
+HOST_POLICIES = {
+    "www.sigmaaldrich.com": HostPolicy(rate=30.0, burst=30, max_concurrency=24, initial_concurrency=12),
+    "netflex-api.interlab.com.tr": HostPolicy(rate=15.0, burst=15, max_concurrency=8, initial_concurrency=8),
+    "www.orkimmarket.com": HostPolicy(rate=5.0, burst=4, max_concurrency=4, initial_concurrency=2),
+    "www.teknikkimya.com.tr": HostPolicy(rate=15.0, burst=10, max_concurrency=10, initial_concurrency=6),
+}
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """Retry-After başlığını (saniye veya HTTP tarihi) saniyeye çevirir; geçersizse 0."""
+    if not value: return 0.0
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return 0.0
+    return min(max(0.0, seconds), MAX_RETRY_AFTER_SECONDS)
+
+
+class _HostState:
+    def __init__(self, host: str, policy: HostPolicy):
+        self.host = host
+        self.policy = policy
+        self.limit = float(policy.initial_concurrency)
+        self.tokens = float(policy.burst)
+        self.refilled_at = time.monotonic()
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.latency = None
+        self.counts = {OUTCOME_OK: 0, OUTCOME_THROTTLED: 0, OUTCOME_ERROR: 0, OUTCOME_TIMEOUT: 0, OUTCOME_CANCELLED: 0}
+        self.wakeup: asyncio.Event = None
+        self.loop: asyncio.AbstractEventLoop = None
+
+    def event(self) -> asyncio.Event:
+        loop = asyncio.get_running_loop()
+        if self.wakeup is None or self.loop is not loop:
+            self.wakeup, self.loop = asyncio.Event(), loop
+        return self.wakeup
+
+    def try_acquire(self, now: float) -> float:
+        """İzin alınırsa 0, aksi halde yeniden denemeden önce beklenecek en uzun süreyi döndürür."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        self.tokens = min(float(self.policy.burst), self.tokens + (now - self.refilled_at) * self.policy.rate)
+        self.refilled_at = now
+        if self.in_flight >= int(self.limit):
+            return 1.0  # Bir istek bitince release() uyandırır.
+        if self.tokens < 1.0:
+            return (1.0 - self.tokens) / self.policy.rate
+        self.tokens -= 1.0
+        self.in_flight += 1
+        return 0.0
+
+    def release(self, outcome: str, latency: float, retry_after: float, now: float):
+        self.in_flight = max(0, self.in_flight - 1)
+        self.counts[outcome] += 1
+        if outcome == OUTCOME_CANCELLED:
+            pass  # Çağıranın iptali host hakkında bilgi taşımaz.
+        elif outcome == OUTCOME_OK:
+            self.latency = latency if self.latency is None else self.latency + LATENCY_EWMA_ALPHA * (latency - self.latency)
+            self.limit = min(float(self.policy.max_concurrency), self.limit + 1.0 / max(1.0, self.limit))
+        else:
+            window = self.latency or 1.0
+            if now - self.last_decrease >= window:
+                self.last_decrease = now
+                previous = int(self.limit)
+                self.limit = max(float(self.policy.min_concurrency), self.limit * DECREASE_FACTOR)
+                logging.info(f"Hız sınırlayıcı: {self.host} için '{outcome}' sonrası eşzamanlılık {previous} -> {int(self.limit)}.")
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+                logging.warning(f"Hız sınırlayıcı: {self.host} {retry_after:.1f} saniye bekletiliyor (Retry-After).")
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit), "max_concurrency": self.policy.max_concurrency, "in_flight": self.in_flight,
+            "rate": self.policy.rate, "paused_for": round(max(0.0, self.paused_until - now), 1),
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "requests": sum(self.counts.values()), **self.counts,
+        }
+
+
+class RateController:
+    def __init__(self, policies: Dict[str, HostPolicy] = None, default_policy: HostPolicy = DEFAULT_POLICY):
+        self.default_policy = default_policy
+        self._policies: Dict[str, HostPolicy] = dict(HOST_POLICIES if policies is None else policies)
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host: str) -> _HostState:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = _HostState(host, self._policies.get(host, self.default_policy))
+            return state
+
+    def configure(self, host: str, **changes):
+        """Host politikasını günceller (ör. max_concurrency=4). Mevcut limit yeni sınırlara kırpılır."""
+        with self._lock:
+            policy = replace(self._policies.get(host, self.default_policy), **changes)
+            if policy.max_concurrency < policy.min_concurrency or policy.rate <= 0 or policy.burst < 1:
+                raise ValueError(f"Geçersiz hız politikası ({host}): {policy}")
+            self._policies[host] = policy
+            state = self._hosts.get(host)
+            if state is not None:
+                state.policy = policy
+                state.limit = min(max(state.limit, float(policy.min_concurrency)), float(policy.max_concurrency))
+
+    def get_policy(self, host: str) -> HostPolicy:
+        with self._lock:
+            return self._policies.get(host, self.default_policy)
+
+    async def acquire(self, host: str):
+        state = self._state(host)
+        while True:
+            delay = state.try_acquire(time.monotonic())
+            if not delay: return
+            wakeup = state.event()
+            wakeup.clear()
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, host: str, outcome: str, latency: float = 0.0, retry_after: float = 0.0):
+        self._state(host).release(outcome, latency, retry_after, time.monotonic())
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return {host: state.snapshot(now) for host, state in self._hosts.items()}
+
+
+rate_controller = RateController()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Sigma Çerez Kavanozu
+====================
+Playwright ile toplanan Sigma çerezleri ve istek başlıkları ülke bazında diske
+yazılır. Uygulama açılışında oturumlar buradan kurulur ve ucuz bir doğrulama
+isteğiyle denenir; Playwright yalnızca kaydı olmayan, çok eski olan veya
+reddedilen ülkeler için çalıştırılır.
+
+Kayıtlar oturum kapanırken yeniden yazılır; böylece çalışma sırasında sunucunun
+yenilediği çerezler de bir sonraki açılışa taşınır. Kaydın yaşı ise ilk toplama
+anından sayılmaya devam eder.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import requests
+
+
+JAR_VERSION = 1
+# Çerezlerin süresi daha uzun olsa da bu yaştan eski kayıtlar doğrulanmadan yeniden toplanır.
+MAX_JAR_AGE_SECONDS = 12 * 3600
+
+
+def session_record(session: requests.Session, saved_at: str = None) -> Dict[str, Any]:
+    """Oturumun başlık ve çerezlerini JSON'a yazılabilir bir kayda çevirir."""
+    cookies = [{"name": c.name, "value": c.value, "domain": c.domain, "path": c.path, "expires": c.expires, "secure": c.secure} for c in session.cookies]
+    return {
+        "saved_at": saved_at or datetime.now().isoformat(timespec="seconds"),
+        "headers": dict(session.headers),
+        "cookies": cookies,
+    }
+
+
+def restore_cookies(session: requests.Session, record: Dict[str, Any]) -> int:
+    """Kayıttaki süresi dolmamış çerezleri oturuma yazar ve yazılan çerez sayısını döndürür."""
+    now, restored = time.time(), 0
+    for cookie in record.get("cookies", []):
+        if cookie.get("expires") and cookie["expires"] <= now: continue
+        try:
+            session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain") or "", path=cookie.get("path") or "/",
+                                expires=cookie.get("expires"), secure=bool(cookie.get("secure")))
+            restored += 1
+        except (KeyError, TypeError) as e:
+            logging.debug(f"Kayıtlı Sigma çerezi atlandı: {e}")
+    return restored
+
+
+class SigmaCookieJar:
+    """Ülke kodu -> kayıt eşlemesini JSON olarak saklar; yazma işlemi geçici dosya + os.replace ile atomiktir."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path.exists(): return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Sigma çerez kavanozu okunamadı, yok sayılıyor: {e}")
+            return {}
+        if data.get("version") != JAR_VERSION: return {}
+        return data.get("countries") or {}
+
+    def _write(self, countries: Dict[str, Dict[str, Any]]):
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": JAR_VERSION, "countries": countries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Sigma çerez kavanozu kaydedilemedi: {e}")
+
+    def load(self, country_code: str) -> Optional[Dict[str, Any]]:
+        """Ülkenin kaydını döndürür; kayıt yoksa veya çok eskiyse None döner.
+        Tek tek süresi dolan çerezler restore_cookies'te atlanır; oturumun geçerliliğine doğrulama isteği karar verir."""
+        with self._lock:
+            record = self._read().get(country_code.lower())
+        if not record or not record.get("cookies"): return None
+        try:
+            age = (datetime.now() - datetime.fromisoformat(record["saved_at"])).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            return None
+        if age > MAX_JAR_AGE_SECONDS:
+            logging.info(f"({country_code.upper()}) Kayıtlı Sigma çerezleri {age / 3600:.1f} saatlik, yeniden toplanacak.")
+            return None
+        return record
+
+    def save(self, sessions: Dict[str, requests.Session], keep_saved_at: bool = False):
+        """Verilen ülkelerin kayıtlarını günceller; diğer ülkelerin kayıtları korunur.
+        keep_saved_at ile mevcut kayıtların toplama zamanı korunur, yalnızca çerezler güncellenir."""
+        if not sessions: return
+        with self._lock:
+            countries = self._read()
+            for country_code, session in sessions.items():
+                if not session: continue
+                saved_at = (countries.get(country_code.lower()) or {}).get("saved_at") if keep_saved_at else None
+                countries[country_code.lower()] = session_record(session, saved_at)
+            self._write(countries)
+
+    def discard(self, country_code: str):
+        with self._lock:
+            countries = self._read()
+            if countries.pop(country_code.lower(), None) is not None: self._write(countries)
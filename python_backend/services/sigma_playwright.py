@@ -12,6 +12,8 @@ Değişiklikler:
 - webdriver.Chrome → playwright.chromium.connect_over_cdp()
 """
 
+import asyncio
+import copy
 import json
 import logging
 import signal
@@ -21,30 +23,104 @@ import queue
 import requests
 from requests.adapters import HTTPAdapter
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
-from typing import Dict, Any, List, Generator
+from concurrent.futures import CancelledError, TimeoutError as FuturesTimeoutError
+from typing import TYPE_CHECKING, Dict, Any, List, Generator
 import time
 import sys
 
-from playwright.sync_api import sync_playwright, Browser, Page, BrowserContext
+# Playwright yalnızca çerezleri kayıtlı olmayan ülkeler için gerekir; modül ilk tarayıcı açılışında yüklenir.
+if TYPE_CHECKING:
+    from playwright.sync_api import Browser
+
+from .profiler import profiler
+from .sigma_cookie_jar import SigmaCookieJar, restore_cookies
+from .single_flight import FlightCancelled, single_flight
+from .supplier_io import supplier_io
+
+
+GRAPHQL_URL = "https://www.sigmaaldrich.com/api/graphql"
+SESSION_COUNTRIES = ['US', 'DE', 'GB']
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/5.37.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36"
+COOKIE_PROBE_TIMEOUT_SECONDS = 10
+MATERIAL_PRICING_FIELDS = "materialPricing { listPrice currency materialNumber packageSize availabilities { date key messageType } }"
+# Tek bir GraphQL isteğinde alias ile fiyatlanan en fazla ürün sayısı.
+PRICING_BATCH_SIZE = 20
+PRICE_TIMEOUT_SECONDS = 60
+BATCH_PRICE_TIMEOUT_SECONDS = 90
+# Aynı ürünün fiyatları varyasyonlar ve toplu arama terimleri arasında bu süre boyunca paylaşılır.
+PRICE_MEMO_TTL_SECONDS = 120
+# Arama sayfaları: aynı anda en fazla SEARCH_PAGE_WINDOW sayfa çekilir, sayfalar ülke oturumlarına sırayla dağıtılır.
+SEARCH_COUNTRIES = ('us', 'de', 'gb')
+SEARCH_PAGE_WINDOW = 4
+# Sayfa sayısı biliniyorsa başarısız sayfa (kendi oturumu + US denemesinden sonra) bu kadar kez yeniden kuyruğa alınır.
+SEARCH_PAGE_RETRIES = 1
+SEARCH_QUEUE_PAGES = 8
+SEARCH_METADATA_FIELDS = "metadata { itemCount page perPage numPages }"
+SEARCH_QUERY = """
+query ProductSearch($searchTerm: String, $page: Int!, $sort: Sort, $group: ProductSearchGroup, $selectedFacets: [FacetInput!], $type: ProductSearchType) {
+    getProductSearchResults(input: {searchTerm: $searchTerm, pagination: {page: $page}, sort: $sort, group: $group, facets: $selectedFacets, type: $type}) {
+        {metadata}
+        items {
+            ... on Substance {
+                casNumber
+                products { name productNumber productKey brand { key } materialIds }
+            }
+            ... on Product { name productNumber productKey brand { key } materialIds }
+        }
+    }
+}
+"""
+# Kayıtlı çerezler gerçek bir ürün aramasıyla sınanır; bot korumasının reddettiği oturum sonuç döndürmez.
+COOKIE_PROBE_TERM = "7732-18-5"
+COOKIE_PROBE_PAYLOAD = {
+    "operationName": "ProductSearch",
+    "variables": {"searchTerm": COOKIE_PROBE_TERM, "page": 1, "group": "substance", "selectedFacets": [], "sort": "relevance", "type": "PRODUCT"},
+    "query": SEARCH_QUERY.replace("{metadata}", ""),
+}
+
+
+async def _gather_with_timeout(jobs: Dict[Any, Any], timeout: float) -> Dict[Any, Any]:
+    """Coroutine'leri aynı anda çalıştırır; süre dolarsa kalanları iptal eder. Anahtar -> sonuç veya istisna döndürür."""
+    tasks = {asyncio.ensure_future(coro): key for key, coro in jobs.items()}
+    if not tasks: return {}
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending: task.cancel()
+    if pending:
+        logging.warning(f"Price fetching timed out after {timeout} seconds. Remaining tasks: {[tasks[task] for task in pending]}")
+    return {tasks[task]: (task.exception() or task.result()) if not task.cancelled() else asyncio.CancelledError() for task in done}
 
 
 class SigmaAldrichAPI:
-    def __init__(self, cdp_endpoint: str = "http://127.0.0.1:9222"):
+    def __init__(self, cdp_endpoint: str = "http://127.0.0.1:9222", cookie_jar_path: str = None):
         logging.info("SigmaAldrichAPI instance created (Playwright+Obscura mode).")
         self.cdp_endpoint = cdp_endpoint
+        self.cookie_jar = SigmaCookieJar(cookie_jar_path) if cookie_jar_path else None
         self.sessions: Dict[str, requests.Session] = {}
         self.adapter = HTTPAdapter(pool_connections=10, pool_maxsize=100, pool_block=True)
         self._playwright = None
-        self._browser: Browser = None
+        self._browser: "Browser" = None
         logging.debug("HTTPAdapter initialized with pool_connections=10, pool_maxsize=100.")
 
     def start_drivers(self):
-        """Cookie'leri almak için Playwright ile Obscura CDP'ye bağlan."""
-        logging.info("Starting all country sessions via Playwright+Obscura...")
-        countries = ['US', 'DE', 'GB']
+        """Kayıtlı çerezleri doğrular; yalnızca eksik veya reddedilen ülkeler için Playwright ile Obscura CDP'ye bağlanır."""
+        countries = SESSION_COUNTRIES
+        restored = self._restore_sessions(countries)
+        missing = [c for c in countries if c not in restored]
+        if missing:
+            self._harvest_sessions(missing)
+        else:
+            logging.info("All Sigma sessions restored from the cookie jar; Playwright bootstrap skipped.")
 
-        # Playwright instance başlat
+        successful = [c.lower() for c in countries if self.sessions.get(c.lower())]
+        if successful:
+            logging.info(f"Successfully initialized sessions for: {', '.join(d.upper() for d in successful)}")
+        failed = [c for c in countries if c.lower() not in successful]
+        if failed:
+            logging.error(f"Failed to initialize sessions for: {', '.join(failed)}")
+
+    def _harvest_sessions(self, countries: List[str]):
+        logging.info(f"Starting country sessions via Playwright+Obscura: {', '.join(countries)}")
+        from playwright.sync_api import sync_playwright
         self._playwright = sync_playwright().start()
 
         # Sync Playwright thread-safe değil; ülkeleri sıralı başlatıyoruz.
@@ -53,13 +129,8 @@ class SigmaAldrichAPI:
                 self._get_cookies_for_country(country)
             except Exception as exc:
                 logging.error(f"({country}) Cookie/session initialization failed: {exc}", exc_info=True)
-
-        successful = [c.lower() for c in countries if self.sessions.get(c.lower())]
-        if successful:
-            logging.info(f"Successfully initialized sessions for: {', '.join(d.upper() for d in successful)}")
-        failed = [c for c in countries if c.lower() not in successful]
-        if failed:
-            logging.error(f"Failed to initialize sessions for: {', '.join(failed)}")
+        if self.cookie_jar:
+            self.cookie_jar.save({c.lower(): self.sessions[c.lower()] for c in countries if self.sessions.get(c.lower())})
 
         # Bu aşamadan sonra sadece requests.Session kullanılıyor; Playwright açık tutulmamalı.
         if self._playwright:
@@ -70,6 +141,49 @@ class SigmaAldrichAPI:
                 logging.warning(f"Playwright stop error after bootstrap: {e}")
             self._playwright = None
 
+    def _restore_sessions(self, countries: List[str]) -> List[str]:
+        """Kavanozdaki kayıtlardan oturum kurar ve doğrulama isteğini geçen ülkeleri döndürür."""
+        if not self.cookie_jar: return []
+        candidates = {}
+        for country in countries:
+            record = self.cookie_jar.load(country)
+            if not record: continue
+            session = self._new_session(record.get("headers") or {})
+            if restore_cookies(session, record): candidates[country] = session
+            else: session.close()
+        if not candidates: return []
+        started = time.monotonic()
+        jobs = {country: self._probe_session(country, session) for country, session in candidates.items()}
+        results = supplier_io.run(_gather_with_timeout(jobs, COOKIE_PROBE_TIMEOUT_SECONDS + 5), default={})
+        restored = []
+        for country, session in candidates.items():
+            if results.get(country) is True:
+                self.sessions[country.lower()] = session
+                restored.append(country)
+            else:
+                logging.info(f"({country}) Saved Sigma cookies were rejected, falling back to Playwright.")
+                session.close()
+                self.cookie_jar.discard(country)
+        if restored:
+            logging.info(f"Sigma sessions restored from cookie jar for {', '.join(restored)} in {time.monotonic() - started:.2f}s.")
+        return restored
+
+    async def _probe_session(self, country_code: str, session: requests.Session) -> bool:
+        try:
+            response = await supplier_io.request(session, "POST", GRAPHQL_URL, json=COOKIE_PROBE_PAYLOAD, timeout=COOKIE_PROBE_TIMEOUT_SECONDS)
+            if response.status_code != 200: return False
+            result = response.json()
+            return isinstance(result, dict) and not result.get("errors") and bool(self._search_items(result))
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logging.info(f"({country_code}) Sigma cookie probe failed: {e}")
+            return False
+
+    def _new_session(self, headers: Dict[str, str]) -> requests.Session:
+        session = requests.Session()
+        session.mount('https://', self.adapter)
+        session.headers.update(headers)
+        return session
+
     def _get_cookies_for_country(self, country_code: str):
         """Tek bir ülke için Obscura CDP üzerinden cookie'leri al ve requests session oluştur."""
         logging.info(f"({country_code}) Getting cookies via Playwright+Obscura CDP...")
@@ -81,7 +195,7 @@ class SigmaAldrichAPI:
             # CDP üzerinden Obscura'ya bağlan
             browser = self._playwright.chromium.connect_over_cdp(self.cdp_endpoint)
             context = browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/5.37.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
+                user_agent=USER_AGENT,
                 extra_http_headers={
                     "Accept-Language": "en-US,en;q=0.5",
                 }
@@ -105,15 +219,12 @@ class SigmaAldrichAPI:
                 logging.warning(f"({country_code}) Cookie consent JS failed (continuing): {cookie_err}")
 
             # Cookie'leri al
-            ua = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/5.37.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36"
             playwright_cookies = context.cookies()
             logging.info(f"({country_code}) Transferring {len(playwright_cookies)} cookies to requests session.")
 
             # requests session oluştur
-            session = requests.Session()
-            session.mount('https://', self.adapter)
-            session.headers.update({
-                "User-Agent": ua,
+            session = self._new_session({
+                "User-Agent": USER_AGENT,
                 "Accept": "*/*",
                 "Accept-Language": "en-US,en;q=0.5",
                 "Content-Type": "application/json",
@@ -128,7 +239,10 @@ class SigmaAldrichAPI:
                 domain = cookie.get('domain', '')
                 if domain:
                     try:
-                        session.cookies.set(cookie['name'], cookie['value'], domain=domain)
+                        # Süre bilgisi kavanozda saklanır; Playwright oturum çerezleri için -1 döndürür.
+                        expires = cookie.get('expires')
+                        session.cookies.set(cookie['name'], cookie['value'], domain=domain, path=cookie.get('path') or '/',
+                                            expires=int(expires) if expires and expires > 0 else None)
                     except Exception as cookie_set_err:
                         logging.warning(f"({country_code}) Could not set cookie {cookie.get('name')}: {cookie_set_err}")
                 else:
@@ -161,6 +275,9 @@ class SigmaAldrichAPI:
     def stop_drivers(self):
         """Session'ları ve Playwright'ı kapat."""
         logging.info("Shutting down all sessions (Playwright+Obscura mode).")
+        if self.cookie_jar:
+            # Çalışma sırasında yenilenen çerezler bir sonraki açılışta kullanılır; kaydın yaşı toplama anından sayılır.
+            self.cookie_jar.save(self.sessions, keep_saved_at=True)
         for code, session in self.sessions.items():
             if session:
                 try:
@@ -191,135 +308,195 @@ class SigmaAldrichAPI:
     # ====================================================================
 
     def search_products(self, search_term: str, cancellation_token: threading.Event) -> Generator[Dict[str, Any], None, None]:
+        for page_products in self.search_product_pages(search_term, cancellation_token):
+            for product in page_products:
+                if cancellation_token.is_set(): return
+                yield product
+
+    def search_product_pages(self, search_term: str, cancellation_token: threading.Event, incomplete: threading.Event = None) -> Generator[List[Dict[str, Any]], None, None]:
+        """Arama sonuçlarını sayfa sayfa (ürün listesi olarak) döndürür; toplu fiyatlama bu gruplamayı kullanır.
+        Sayfalar paralel çekildiğinden geliş sırasıyla (sayfa numarası sırasıyla değil) döner.
+        Çekilemeyen sayfalar yüzünden sonuçlar eksik kaldıysa verilen incomplete olayı kurulur."""
         logging.info(f"Starting product search for term: '{search_term}'")
-        page_queue = queue.Queue(maxsize=5)
-        producer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Sigma-Page-Producer")
-        producer_future = None
+        page_queue = queue.Queue(maxsize=SEARCH_QUEUE_PAGES)
+        consumer_done = threading.Event()
         product_count = 0
-        first_page_fetch_successful = False
-        def page_producer():
-            nonlocal first_page_fetch_successful
-            current_page = 1
-            has_more_pages = True
-            while has_more_pages and not cancellation_token.is_set():
-                logging.debug(f"Producer is fetching page {current_page} for '{search_term}'.")
-                result_json = self._search_page(search_term, current_page, cancellation_token)
-                if result_json is None or cancellation_token.is_set():
-                    if current_page == 1 and not cancellation_token.is_set():
-                        logging.error(f"Failed to fetch the first page for '{search_term}'. Stopping producer.")
-                    has_more_pages = False
-                else:
-                    items = result_json.get('data', {}).get('getProductSearchResults', {}).get('items', [])
-                    if not items:
-                        if current_page == 1:
-                            logging.warning(f"No items found on the first page for '{search_term}'. Check search term or site status.")
-                            has_more_pages = False
-                        else:
-                            logging.info(f"No more items found for '{search_term}' at page {current_page}. Stopping producer.")
-                            has_more_pages = False
-                    else:
-                        logging.debug(f"Producer found {len(items)} items on page {current_page}. Adding to queue.")
-                        if cancellation_token.is_set():
-                            has_more_pages = False
-                            break
-                        try:
-                            while not cancellation_token.is_set():
-                                try:
-                                    page_queue.put(items, timeout=1)
-                                    break
-                                except queue.Full:
-                                    continue
-                        except Exception:
-                            has_more_pages = False
-                            break
-                        if current_page == 1:
-                            first_page_fetch_successful = True
-                        current_page += 1
-                        if not cancellation_token.is_set():
-                            time.sleep(0.1)
-            if not cancellation_token.is_set():
+        async def put_page(items) -> bool:
+            # Olay döngüsü bloklanmasın diye kuyruk dolu iken beklemek yerine kısa aralıklarla yeniden denenir.
+            while not cancellation_token.is_set() and not consumer_done.is_set():
                 try:
-                    page_queue.put(None, timeout=5)
+                    page_queue.put_nowait(items)
+                    return True
                 except queue.Full:
-                    logging.error("Could not put None signal into the queue.")
-            logging.debug("Page producer thread finished.")
-        producer_future = producer_executor.submit(page_producer)
+                    await asyncio.sleep(0.05)
+            return False
+        async def page_producer():
+            complete = False
+            try:
+                complete = await self._paginate_search(search_term, cancellation_token, put_page)
+            finally:
+                if not complete and incomplete is not None: incomplete.set()
+                # Bitiş sinyali tüketicinin beklemeden çıkmasını sağlar.
+                if not cancellation_token.is_set() and not await put_page(None):
+                    logging.debug("Could not put None signal into the queue.")
+                logging.debug("Page producer finished.")
+        producer_future = supplier_io.submit(page_producer())
         try:
-            while True:
+            while not cancellation_token.is_set():
                 try:
-                    if cancellation_token.is_set():
-                        logging.warning("Consumer breaking loop due to cancellation signal.")
-                        break
-                    items = page_queue.get(timeout=1)
+                    items = page_queue.get(timeout=0.25)
                 except queue.Empty:
-                    if producer_future is None or producer_future.done():
-                        if not first_page_fetch_successful and product_count == 0:
-                            logging.error("Producer finished but first page was never successful and no products yielded.")
-                        else:
-                            logging.info("Consumer finished as producer is done and queue is empty.")
+                    if producer_future.done() and page_queue.empty():
+                        logging.info("Consumer finished as producer is done and queue is empty.")
                         break
-                    else:
-                        continue
+                    continue
                 if items is None:
                     logging.info("Consumer received 'None' signal. Breaking loop.")
                     break
                 logging.debug(f"Consumer is processing a batch of {len(items)} items.")
+                page_products = []
                 for item in items:
-                    if cancellation_token.is_set(): break
                     cas = item.get('casNumber', 'N/A')
                     for p in item.get('products', []):
-                        if cancellation_token.is_set(): break
                         if p.get('productNumber'):
-                            product_count += 1
-                            yield {"product_name_sigma": p.get('name', 'N/A'), "product_number": p.get('productNumber'), "product_key": p.get('productKey', 'N/A'), "brand": p.get('brand', {}).get('key', 'N/A'), "cas_number": cas, "material_ids": p.get('materialIds', [])}
-                    if cancellation_token.is_set(): break
+                            page_products.append({"product_name_sigma": p.get('name', 'N/A'), "product_number": p.get('productNumber'), "product_key": p.get('productKey', 'N/A'), "brand": p.get('brand', {}).get('key', 'N/A'), "cas_number": cas, "material_ids": p.get('materialIds', [])})
                 if cancellation_token.is_set(): break
-                page_queue.task_done()
+                if page_products:
+                    product_count += len(page_products)
+                    yield page_products
         finally:
+            consumer_done.set()
             logging.info(f"Search loop finished or cancelled. Total products yielded: {product_count}.")
-            if producer_future and not producer_future.done():
-                logging.debug("Waiting for producer thread to finish...")
+            if not producer_future.done():
+                # Tüketici erken çıktıysa (iptal veya çağıranın döngüyü bırakması) kalan sayfaların çekilmesine gerek yok.
+                producer_future.cancel()
+                logging.debug("Waiting for producer to finish...")
                 try:
                     producer_future.result(timeout=10)
-                    logging.debug("Producer thread finished.")
+                    logging.debug("Producer finished.")
                 except FuturesTimeoutError:
-                    logging.warning("Producer thread did not finish within 10 seconds after consumer.")
+                    logging.warning("Producer did not finish within 10 seconds after consumer.")
+                except CancelledError:
+                    logging.debug("Producer cancelled.")
                 except Exception as prod_ex:
-                    logging.error(f"Producer thread finished with an error: {prod_ex}")
-            producer_executor.shutdown(wait=False, cancel_futures=True)
+                    logging.error(f"Producer finished with an error: {prod_ex}")
             if cancellation_token.is_set():
                 logging.warning("Sigma product search task was cancelled.")
 
-    def _search_page(self, search_term: str, page: int, cancellation_token: threading.Event) -> Dict[str, Any] or None:
+    def _search_countries(self) -> List[str]:
+        """Aramada kullanılabilecek ülke oturumları; sayfa sayısının kaynağı olan ilk sayfa için US önce gelir."""
+        return [code for code in SEARCH_COUNTRIES if self.sessions.get(code)] or [code for code, session in self.sessions.items() if session]
+
+    @staticmethod
+    def _search_items(result_json: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return result_json.get('data', {}).get('getProductSearchResults', {}).get('items', [])
+
+    @staticmethod
+    def _search_page_count(result_json: Dict[str, Any]) -> int or None:
+        """İlk sayfanın metadata alanından toplam sayfa sayısı; alan yoksa None (boş sayfaya kadar taranır)."""
+        metadata = result_json.get('data', {}).get('getProductSearchResults', {}).get('metadata') or {}
+        num_pages = metadata.get('numPages')
+        if isinstance(num_pages, int) and num_pages > 0: return num_pages
+        item_count, per_page = metadata.get('itemCount'), metadata.get('perPage')
+        if isinstance(item_count, int) and isinstance(per_page, int) and per_page > 0:
+            return max(1, -(-item_count // per_page))
+        return None
+
+    async def _paginate_search(self, search_term: str, cancellation_token: threading.Event, put_page) -> bool:
+        """İlk sayfadan sonuç sayısını okur, kalan sayfaları SEARCH_PAGE_WINDOW genişliğinde bir pencerede ülke
+        oturumlarına dağıtarak aynı anda çeker ve her sayfayı geldiği anda put_page ile teslim eder.
+        Tüm sayfalar teslim edildiyse True, sayfa kaybı veya iptal durumunda False döner."""
+        countries = self._search_countries()
+        if not countries:
+            logging.error("No Sigma session found for searching. Cannot proceed.")
+            return False
+        first_page = await self._search_page(search_term, 1, cancellation_token, countries[0], with_metadata=True)
+        if first_page is None or cancellation_token.is_set():
+            if not cancellation_token.is_set():
+                logging.error(f"Failed to fetch the first page for '{search_term}'. Stopping producer.")
+            return False
+        items = self._search_items(first_page)
+        if not items:
+            logging.warning(f"No items found on the first page for '{search_term}'. Check search term or site status.")
+            return True
+        if not await put_page(items): return False
+        last_page = self._search_page_count(first_page)
+        logging.info(f"Sigma search '{search_term}': {last_page or 'bilinmeyen sayıda'} sayfa, {len(countries)} ülke oturumu.")
+        # Sayfa sayısı bilinmiyorsa ilk boş veya başarısız sayfaya kadar pencere genişliğinde ileriye doğru çekilir.
+        end_page = None
+        next_page = 2
+        retry_pages: List[int] = []
+        attempts: Dict[int, int] = {}
+        dropped_pages: List[int] = []
+        failed_pages: List[int] = []
+        pending: Dict[asyncio.Future, int] = {}
+        try:
+            while not cancellation_token.is_set():
+                bound = last_page if last_page is not None else (end_page - 1 if end_page is not None else None)
+                while len(pending) < SEARCH_PAGE_WINDOW and (retry_pages or bound is None or next_page <= bound):
+                    if retry_pages:
+                        page = retry_pages.pop(0)
+                    else:
+                        page, next_page = next_page, next_page + 1
+                    attempts[page] = attempts.get(page, 0) + 1
+                    country = countries[(page + attempts[page] - 2) % len(countries)]
+                    pending[asyncio.ensure_future(self._search_page_items(search_term, page, country, countries[0], cancellation_token))] = page
+                if not pending:
+                    # Sayfa sayısı bilinmezken sonu belirleyen sayfa başarısızsa arkasında sonuç kalmış olabilir.
+                    return not dropped_pages and not any(page <= end_page for page in failed_pages if end_page is not None)
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page = pending.pop(task)
+                    page_items = task.result()
+                    if page_items is None and last_page is not None:
+                        if attempts[page] <= SEARCH_PAGE_RETRIES: retry_pages.append(page)
+                        else: dropped_pages.append(page)
+                        continue
+                    if not page_items:
+                        if page_items is None: failed_pages.append(page)
+                        if end_page is None or page < end_page:
+                            reason = "failed" if page_items is None else "returned no items"
+                            logging.info(f"Sigma search '{search_term}' page {page} {reason}; treating it as the end of results.")
+                            end_page = page
+                        continue
+                    if not await put_page(page_items): return False
+            return False
+        finally:
+            for task in pending: task.cancel()
+            if dropped_pages:
+                logging.warning(f"Sigma search '{search_term}': pages {sorted(dropped_pages)} of {last_page} could not be fetched after {SEARCH_PAGE_RETRIES + 1} attempts and were skipped.")
+
+    async def _search_page_items(self, search_term: str, page: int, country_code: str, fallback_country: str, cancellation_token: threading.Event) -> List[Dict[str, Any]] or None:
+        result_json = await self._search_page(search_term, page, cancellation_token, country_code)
+        if result_json is None and country_code != fallback_country and not cancellation_token.is_set():
+            logging.info(f"Sigma search page {page} failed on {country_code.upper()} session, retrying on {fallback_country.upper()}.")
+            result_json = await self._search_page(search_term, page, cancellation_token, fallback_country)
+        return self._search_items(result_json) if result_json is not None else None
+
+    async def _search_page(self, search_term: str, page: int, cancellation_token: threading.Event, country_code: str = 'us', with_metadata: bool = False) -> Dict[str, Any] or None:
         if cancellation_token.is_set(): return None
-        session = self.sessions.get('us')
+        session = self.sessions.get(country_code)
         if not session:
-            logging.error("US session not found for searching. Cannot proceed.")
+            logging.error(f"{country_code.upper()} session not found for searching. Cannot proceed.")
             return None
-        query = """
-        query ProductSearch($searchTerm: String, $page: Int!, $sort: Sort, $group: ProductSearchGroup, $selectedFacets: [FacetInput!], $type: ProductSearchType) {
-            getProductSearchResults(input: {searchTerm: $searchTerm, pagination: {page: $page}, sort: $sort, group: $group, facets: $selectedFacets, type: $type}) {
-                items {
-                    ... on Substance {
-                        casNumber
-                        products { name productNumber productKey brand { key } materialIds }
-                    }
-                    ... on Product { name productNumber productKey brand { key } materialIds }
-                }
-            }
-        }
-        """
+        query = SEARCH_QUERY.replace("{metadata}", SEARCH_METADATA_FIELDS if with_metadata else "")
         variables = {"searchTerm": search_term, "page": page, "group": "substance", "selectedFacets": [], "sort": "relevance", "type": "PRODUCT"}
         payload = {"operationName": "ProductSearch", "variables": variables, "query": query}
-        logging.debug(f"Search API request for page {page}: Payload -> {json.dumps(payload, indent=2)}")
+        logging.debug(f"Search API request for page {page} ({country_code.upper()}): Payload -> {json.dumps(payload, indent=2)}")
         try:
             if cancellation_token.is_set(): return None
-            response = session.post("https://www.sigmaaldrich.com/api/graphql", json=payload, timeout=30)
+            with profiler.span("sigma.search_page", "sigma", term=search_term, page=page, country=country_code) as span:
+                response = await supplier_io.request(session, "POST", GRAPHQL_URL, json=payload, timeout=30)
+                span.set(bytes=len(response.content), status=response.status_code)
             if cancellation_token.is_set(): return None
             logging.debug(f"Search API response for page {page}: Status Code {response.status_code}")
             response.raise_for_status()
             result = response.json()
             if "errors" in result and result["errors"]:
+                if with_metadata:
+                    # Sayfa sayısı alanları reddedilirse sayfalama boş sayfaya kadar taramaya geri döner.
+                    logging.warning(f"GraphQL search metadata rejected, retrying page {page} without it: {result['errors']}")
+                    return await self._search_page(search_term, page, cancellation_token, country_code)
                 logging.error(f"GraphQL API returned errors on page {page}: {result['errors']}")
                 return None
             if not isinstance(result.get('data', {}).get('getProductSearchResults', {}).get('items'), list):
@@ -339,66 +516,173 @@ class SigmaAldrichAPI:
                 logging.error(f"Error during Sigma search (Page {page}): {e}", exc_info=True)
             return None
 
+    def _price_flight_key(self, product_number: str):
+        return product_number, tuple(sorted(self.sessions.keys()))
+
+    @staticmethod
+    def _price_memo_ttl(results: Dict[str, List[Dict[str, Any]]]) -> float:
+        # Hiçbir ülkeden varyasyon gelmediyse (ör. geçici hata) sonuç paylaşılır ama saklanmaz.
+        return PRICE_MEMO_TTL_SECONDS if any(results.values()) else 0
+
     def get_all_product_prices(self, product_number: str, brand: str, product_key: str, material_ids: List[str], cancellation_token: threading.Event) -> Dict[str, Any]:
+        """Aynı ürün için eşzamanlı istekler tek fiyat sorgusunda birleşir; sonuç kısa süre saklanır."""
+        fetch = lambda: self._fetch_all_product_prices(product_number, brand, product_key, material_ids, cancellation_token)
+        return single_flight.do("sigma", "product_prices", self._price_flight_key(product_number), fetch, ttl=self._price_memo_ttl, cancel_event=cancellation_token, default={})
+
+    def _fetch_all_product_prices(self, product_number: str, brand: str, product_key: str, material_ids: List[str], cancellation_token: threading.Event) -> Dict[str, Any]:
         logging.info(f"Fetching all prices for Product: {product_number} (Key: {product_key}) using {len(material_ids) if material_ids else 0} material IDs.")
-        results = {}
         available_countries = list(self.sessions.keys())
         if not available_countries:
             logging.warning("No active sessions available to fetch prices.")
             return {}
         logging.debug(f"Fetching prices for available countries: {available_countries}")
-        price_executor = ThreadPoolExecutor(max_workers=len(available_countries), thread_name_prefix='Price-Fetcher')
-        future_to_country = {}
+        jobs = {country: self._get_price_for_country(country, product_number, product_key, brand, material_ids, cancellation_token) for country in available_countries}
+        outcomes = supplier_io.run(_gather_with_timeout(jobs, PRICE_TIMEOUT_SECONDS), cancellation_token, default=None)
+        if outcomes is None:
+            logging.warning("Price fetching cancelled during execution.")
+            return {}
+        results = {}
+        for country_code, price_data in outcomes.items():
+            if isinstance(price_data, asyncio.CancelledError):
+                logging.warning(f"({country_code.upper()}) Price fetch task was cancelled.")
+                results[country_code] = []
+            elif isinstance(price_data, BaseException):
+                if not cancellation_token.is_set():
+                    logging.error(f"Exception fetching price for {country_code.upper()}: {price_data}", exc_info=False)
+                results[country_code] = []
+            elif price_data is None:
+                logging.warning(f"({country_code.upper()}) Price fetch task returned None (likely cancelled).")
+                results[country_code] = []
+            elif isinstance(price_data, list):
+                logging.info(f"({country_code.upper()}) Successfully processed price request (found {len(price_data)} variations).")
+                results[country_code] = price_data
+            else:
+                logging.error(f"({country_code.upper()}) Expected list from _get_price_for_country, but got {type(price_data)}.")
+                results[country_code] = []
+        logging.info(f"Finished price fetching process for {product_number}. Got results for {len(results)} countries.")
+        return results
+
+    def get_prices_for_products(self, products: List[Dict[str, Any]], cancellation_token: threading.Event) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        """Bir arama sayfasındaki ürünleri ülke başına birkaç alias'lı GraphQL isteğiyle fiyatlar.
+
+        Dönüş {product_number: {country_code: [variation, ...]}} şeklindedir; iç yapı get_all_product_prices ile aynıdır.
+        Başka bir aramanın o anda fiyatladığı veya yakın zamanda fiyatladığı ürünler yeniden sorgulanmaz, o sonuç beklenir.
+        Ortak sorgusu iptal edilen, süresi dolan veya bir ülkede başarısız olan ürünler dönüşe konmaz; çağıran bunları tek tek fiyatlar.
+        """
+        unique_products: Dict[str, Dict[str, Any]] = {}
+        for product in products:
+            if product.get('product_number'):
+                unique_products.setdefault(product['product_number'], product)
+        led, followed = {}, {}
+        for number, product in unique_products.items():
+            future, is_leader = single_flight.begin("sigma", "product_prices", self._price_flight_key(number))
+            (led if is_leader else followed)[number] = future
         try:
-            future_to_country = {price_executor.submit(self._get_price_for_country, country, product_number, product_key, brand, material_ids, cancellation_token): country for country in available_countries}
-            if cancellation_token.is_set():
-                logging.warning("Price fetching cancelled before starting tasks.")
-                return {}
-            logging.debug(f"Price fetch tasks created for countries: {list(future_to_country.values())}")
-            timeout_seconds = 60
-            end_time = time.time() + timeout_seconds
-            while future_to_country and time.time() < end_time:
-                if cancellation_token.is_set():
-                    logging.warning("Price fetching cancelled during execution.")
-                    break
-                try:
-                    done_iterator = as_completed(future_to_country, timeout=0.5)
-                    for future in done_iterator:
-                        country_code = future_to_country.pop(future)
-                        try:
-                            if future.cancelled():
-                                logging.warning(f"({country_code.upper()}) Price fetch task was cancelled.")
-                                results[country_code] = []
-                                continue
-                            price_data = future.result()
-                            if price_data is None:
-                                logging.warning(f"({country_code.upper()}) Price fetch task returned None (likely cancelled).")
-                                results[country_code] = []
-                            elif isinstance(price_data, list):
-                                logging.info(f"({country_code.upper()}) Successfully processed price request (found {len(price_data)} variations).")
-                                results[country_code] = price_data
-                            else:
-                                logging.error(f"({country_code.upper()}) Expected list from _get_price_for_country, but got {type(price_data)}.")
-                                results[country_code] = []
-                        except Exception as exc:
-                            if not cancellation_token.is_set():
-                                logging.error(f"Exception fetching price for {country_code.upper()}: {exc}", exc_info=False)
-                            results[country_code] = []
-                except FuturesTimeoutError:
-                    continue
-            if future_to_country:
-                remaining_countries = [future_to_country[f] for f in future_to_country]
-                if time.time() >= end_time:
-                    logging.warning(f"Price fetching timed out after {timeout_seconds} seconds. Remaining tasks for countries: {remaining_countries}")
-        finally:
-            logging.debug("Shutting down Price-Fetcher executor.")
-            if 'future_to_country' in locals() and future_to_country:
-                for f in future_to_country: f.cancel()
-            price_executor.shutdown(wait=False, cancel_futures=True)
-            logging.info(f"Finished price fetching process for {product_number}. Got results for {len(results)} countries.")
+            fetched = self._fetch_prices_for_products([unique_products[number] for number in led], cancellation_token) if led else {}
+        except BaseException as e:
+            for number, future in led.items():
+                single_flight.finish("sigma", "product_prices", self._price_flight_key(number), future, error=e)
+            raise
+        results: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for number, future in led.items():
+            product_result = fetched.get(number)
+            if product_result is not None: results[number] = copy.deepcopy(product_result)
+            error = FlightCancelled() if cancellation_token.is_set() else None
+            single_flight.finish("sigma", "product_prices", self._price_flight_key(number), future, result=product_result, error=error, ttl=self._price_memo_ttl if product_result is not None else 0)
+        for number, future in followed.items():
+            try:
+                product_result = single_flight.wait(future, cancellation_token)
+            except FlightCancelled:
+                continue
+            except Exception as exc:
+                logging.warning(f"Shared price request for {number} failed: {exc}")
+                continue
+            if product_result is not None:
+                results[number] = product_result
+        return results
+
+    def _fetch_prices_for_products(self, products: List[Dict[str, Any]], cancellation_token: threading.Event) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        unique_products: Dict[str, Dict[str, Any]] = {}
+        for product in products:
+            if product.get('product_number'):
+                unique_products.setdefault(product['product_number'], product)
+        available_countries = list(self.sessions.keys())
+        if not available_countries or not unique_products or cancellation_token.is_set():
+            return {}
+        product_list = list(unique_products.values())
+        chunks = [product_list[i:i + PRICING_BATCH_SIZE] for i in range(0, len(product_list), PRICING_BATCH_SIZE)]
+        logging.info(f"Batch pricing {len(product_list)} products in {len(chunks)} chunk(s) for countries: {available_countries}")
+        jobs = {(country, index): self._get_batch_prices_for_country(country, chunk, cancellation_token) for country in available_countries for index, chunk in enumerate(chunks)}
+        outcomes = supplier_io.run(_gather_with_timeout(jobs, BATCH_PRICE_TIMEOUT_SECONDS), cancellation_token, default=None)
+        if outcomes is None:
+            logging.warning("Batch price fetching cancelled during execution.")
+            return {}
+        country_prices: Dict[str, Dict[str, List[Dict[str, Any]]]] = {number: {} for number in unique_products}
+        for (country_code, index), batch_result in outcomes.items():
+            if isinstance(batch_result, BaseException):
+                if not cancellation_token.is_set() and not isinstance(batch_result, asyncio.CancelledError):
+                    logging.error(f"({country_code.upper()}) Exception during batch pricing: {batch_result}", exc_info=False)
+                continue
+            for product in chunks[index]:
+                if product['product_number'] in (batch_result or {}):
+                    country_prices[product['product_number']][country_code] = batch_result[product['product_number']]
+        # Süresi dolan parçalar outcomes'ta yer almaz; her ülkeden cevabı gelmeyen ürünler fiyatlanmış sayılmaz.
+        results = {number: prices for number, prices in country_prices.items() if len(prices) == len(available_countries)}
+        if len(results) < len(unique_products) and not cancellation_token.is_set():
+            logging.warning(f"Batch pricing incomplete for {len(unique_products) - len(results)} of {len(unique_products)} products; they will be priced individually.")
         return results
 
-    def _get_price_for_country(self, country_code: str, product_number: str, product_key: str, brand: str, material_ids: List[str], cancellation_token: threading.Event) -> List[Dict[str, Any]] or None:
+    async def _get_batch_prices_for_country(self, country_code: str, products: List[Dict[str, Any]], cancellation_token: threading.Event) -> Dict[str, List[Dict[str, Any]]] or None:
+        if cancellation_token.is_set(): return None
+        session = self.sessions.get(country_code.lower())
+        if not session:
+            logging.warning(f"({country_code.upper()}) Session not found for batch pricing. Skipping.")
+            return {}
+        variable_definitions, fields, variables = [], [], {}
+        for index, product in enumerate(products):
+            brand = product.get('brand')
+            variable_definitions.append(f"$pn{index}: String!, $br{index}: String, $pk{index}: String, $mi{index}: [String!]")
+            fields.append(f"p{index}: getPricingForProduct(input: {{productNumber: $pn{index}, brand: $br{index}, quantity: 1, productKey: $pk{index}, materialIds: $mi{index}}}) {{ {MATERIAL_PRICING_FIELDS} }}")
+            variables[f"pn{index}"] = product['product_number']
+            variables[f"br{index}"] = brand.upper() if brand else None
+            variables[f"pk{index}"] = (product.get('product_key') or 'N/A').replace('.', '')
+            variables[f"mi{index}"] = list(set(filter(None, product.get('material_ids') or [])))
+        query = f"query PricingAndAvailabilityBatch({', '.join(variable_definitions)}) {{ {' '.join(fields)} }}"
+        payload = {"operationName": "PricingAndAvailabilityBatch", "variables": variables, "query": query}
+        try:
+            with profiler.span("sigma.pricing_batch", "sigma", country=country_code.upper(), products=len(products)) as span:
+                response = await supplier_io.request(session, "POST", GRAPHQL_URL, json=payload, timeout=60)
+                span.set(bytes=len(response.content), status=response.status_code)
+            if cancellation_token.is_set(): return None
+            response.raise_for_status()
+            result = response.json()
+            data = result.get('data')
+            if not isinstance(data, dict):
+                logging.warning(f"({country_code.upper()}) Batch pricing returned no data (errors: {result.get('errors')}). Falling back to per-product requests.")
+                return await self._get_prices_one_by_one(country_code, products, cancellation_token)
+            if result.get('errors'):
+                logging.debug(f"({country_code.upper()}) Batch pricing returned partial errors: {result['errors']}")
+            batch_result = {}
+            for index, product in enumerate(products):
+                pricing_data = data.get(f"p{index}")
+                # Boş dönen alias hata mı fiyatsızlık mı ayırt edilemez; ürün tekil sorguya bırakılır.
+                if pricing_data is None: continue
+                variations = self._parse_material_pricing(country_code, variables[f"pk{index}"], pricing_data.get('materialPricing', []), cancellation_token)
+                if variations is None: return None
+                batch_result[product['product_number']] = variations
+            logging.info(f"({country_code.upper()}) Batch pricing completed for {len(products)} products in one request.")
+            return batch_result
+        except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+            if cancellation_token.is_set(): return None
+            logging.warning(f"({country_code.upper()}) Batch pricing request failed ({e}). Falling back to per-product requests.")
+            return await self._get_prices_one_by_one(country_code, products, cancellation_token)
+
+    async def _get_prices_one_by_one(self, country_code: str, products: List[Dict[str, Any]], cancellation_token: threading.Event) -> Dict[str, List[Dict[str, Any]]]:
+        if cancellation_token.is_set(): return {}
+        price_lists = await asyncio.gather(*(self._get_price_for_country(country_code, product['product_number'], (product.get('product_key') or 'N/A').replace('.', ''), product.get('brand'), product.get('material_ids'), cancellation_token) for product in products), return_exceptions=True)
+        return {product['product_number']: variations for product, variations in zip(products, price_lists) if isinstance(variations, list)}
+
+    async def _get_price_for_country(self, country_code: str, product_number: str, product_key: str, brand: str, material_ids: List[str], cancellation_token: threading.Event) -> List[Dict[str, Any]] or None:
         if cancellation_token.is_set(): return None
         session = self.sessions.get(country_code.lower())
         if not session:
@@ -406,20 +690,22 @@ class SigmaAldrichAPI:
             return []
         if material_ids is None: material_ids = []
         unique_material_ids = list(set(filter(None, material_ids)))
-        query = """
-        query PricingAndAvailability($productNumber: String!, $brand: String, $quantity: Int!, $productKey: String, $materialIds: [String!]) {
-            getPricingForProduct(input: {productNumber: $productNumber, brand: $brand, quantity: $quantity, productKey: $productKey, materialIds: $materialIds}) {
-                materialPricing { listPrice currency materialNumber packageSize availabilities { date key messageType } }
-            }
-        }
+        query = f"""
+        query PricingAndAvailability($productNumber: String!, $brand: String, $quantity: Int!, $productKey: String, $materialIds: [String!]) {{
+            getPricingForProduct(input: {{productNumber: $productNumber, brand: $brand, quantity: $quantity, productKey: $productKey, materialIds: $materialIds}}) {{
+                {MATERIAL_PRICING_FIELDS}
+            }}
+        }}
         """
         variables = {"productNumber": product_number, "brand": brand.upper() if brand else None, "productKey": product_key, "quantity": 1, "materialIds": unique_material_ids}
         payload = {"operationName": "PricingAndAvailability", "variables": variables, "query": query}
-        url = "https://www.sigmaaldrich.com/api/graphql"
+        url = GRAPHQL_URL
         logging.debug(f"({country_code.upper()}) Pricing request for {product_key}. Payload: {json.dumps(variables)}")
         try:
             if cancellation_token.is_set(): return None
-            response = session.post(url, json=payload, timeout=45)
+            with profiler.span("sigma.pricing", "sigma", country=country_code.upper(), product=product_number) as span:
+                response = await supplier_io.request(session, "POST", url, json=payload, timeout=45)
+                span.set(bytes=len(response.content), status=response.status_code)
             if cancellation_token.is_set(): return None
             logging.debug(f"({country_code.upper()}) Pricing response status: {response.status_code}")
             response.raise_for_status()
@@ -431,37 +717,7 @@ class SigmaAldrichAPI:
             if pricing_data is None:
                 logging.info(f"({country_code.upper()}) No pricing data found (API returned null) for {product_key}.")
                 return []
-            material_pricing = pricing_data.get('materialPricing', [])
-            if not isinstance(material_pricing, list):
-                logging.error(f"({country_code.upper()}) Unexpected structure for materialPricing (not a list) for {product_key}. Data: {material_pricing}")
-                return []
-            variations = []
-            for price_info in material_pricing:
-                if cancellation_token.is_set(): return None
-                if not isinstance(price_info, dict):
-                    logging.warning(f"({country_code.upper()}) Skipping invalid price_info item (not a dict): {price_info}")
-                    continue
-                availability_date = None
-                avails = price_info.get('availabilities')
-                if isinstance(avails, list) and avails:
-                    avail = next((a for a in avails if isinstance(a, dict) and a.get('messageType') == 'primary'), avails[0] if avails and isinstance(avails[0], dict) else None)
-                    if isinstance(avail, dict) and (avail_date := avail.get('date')):
-                        try:
-                            availability_date = datetime.fromtimestamp(int(avail_date) / 1000).strftime('%Y-%m-%d')
-                        except (ValueError, TypeError, OSError):
-                            logging.warning(f"({country_code.upper()}) Invalid availability date format: {avail_date}")
-                            availability_date = str(avail_date)
-                list_price = price_info.get('listPrice')
-                numeric_price = None
-                try:
-                    if list_price is not None:
-                        numeric_price = float(list_price)
-                except (ValueError, TypeError):
-                    logging.warning(f"({country_code.upper()}) Invalid listPrice format: {list_price}")
-                variations.append({"material_number": price_info.get('materialNumber', 'N/A'), "price": numeric_price, "currency": price_info.get('currency', 'N/A'), "package_size": price_info.get('packageSize', 'N/A'), "availability_date": availability_date})
-            if cancellation_token.is_set(): return None
-            logging.debug(f"({country_code.upper()}) Parsed {len(variations)} price variations for {product_key}.")
-            return variations
+            return self._parse_material_pricing(country_code, product_key, pricing_data.get('materialPricing', []), cancellation_token)
         except requests.exceptions.HTTPError as e:
             if not cancellation_token.is_set():
                 logging.error(f"HTTP Error during pricing request ({country_code.upper()}) for {product_key}: {e.response.status_code}. Response: {e.response.text[:500]}")
@@ -478,3 +734,35 @@ class SigmaAldrichAPI:
             if not cancellation_token.is_set():
                 logging.error(f"Unexpected error during pricing processing ({country_code.upper()}) for {product_key}: {e}", exc_info=True)
             return []
+
+    def _parse_material_pricing(self, country_code: str, product_key: str, material_pricing: Any, cancellation_token: threading.Event) -> List[Dict[str, Any]] or None:
+        if not isinstance(material_pricing, list):
+            logging.error(f"({country_code.upper()}) Unexpected structure for materialPricing (not a list) for {product_key}. Data: {material_pricing}")
+            return []
+        variations = []
+        for price_info in material_pricing:
+            if cancellation_token.is_set(): return None
+            if not isinstance(price_info, dict):
+                logging.warning(f"({country_code.upper()}) Skipping invalid price_info item (not a dict): {price_info}")
+                continue
+            availability_date = None
+            avails = price_info.get('availabilities')
+            if isinstance(avails, list) and avails:
+                avail = next((a for a in avails if isinstance(a, dict) and a.get('messageType') == 'primary'), avails[0] if avails and isinstance(avails[0], dict) else None)
+                if isinstance(avail, dict) and (avail_date := avail.get('date')):
+                    try:
+                        availability_date = datetime.fromtimestamp(int(avail_date) / 1000).strftime('%Y-%m-%d')
+                    except (ValueError, TypeError, OSError):
+                        logging.warning(f"({country_code.upper()}) Invalid availability date format: {avail_date}")
+                        availability_date = str(avail_date)
+            list_price = price_info.get('listPrice')
+            numeric_price = None
+            try:
+                if list_price is not None:
+                    numeric_price = float(list_price)
+            except (ValueError, TypeError):
+                logging.warning(f"({country_code.upper()}) Invalid listPrice format: {list_price}")
+            variations.append({"material_number": price_info.get('materialNumber', 'N/A'), "price": numeric_price, "currency": price_info.get('currency', 'N/A'), "package_size": price_info.get('packageSize', 'N/A'), "availability_date": availability_date})
+        if cancellation_token.is_set(): return None
+        logging.debug(f"({country_code.upper()}) Parsed {len(variations)} price variations for {product_key}.")
+        return variations
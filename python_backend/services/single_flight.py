@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Tekil Uçuş (Single-Flight) İstek Birleştirme
+============================================
+Aynı (tedarikçi, işlem, anahtar) için aynı anda gelen istekleri tek bir ağ
+çağrısında birleştirir: ilk çağıran isteği yürütür, diğerleri aynı Future'ı
+bekler. Sonuç kısa süreli bir bellek önbelleğinde (memo) tutulur; böylece Merck
+kod varyasyonları veya çakışan toplu arama terimleri aynı ürünü art arda
+sorguladığında istek tekrar gönderilmez.
+
+Sonuçlar paylaşıldığı için her çağırana derin kopyası verilir. Hata veren veya
+ttl'i 0 olan sonuçlar önbelleğe alınmaz. Bekleyenlerden birinin iptali ortak
+isteği iptal etmez; yalnızca o çağıranın beklemesini sonlandırır. Liderin kendi
+iptaliyle yarıda kalan sonuç kimseye verilmez; bekleyenler isteği yeniden başlatır.
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, Hashable, Tuple, Union
+
+
+DEFAULT_MEMO_TTL_SECONDS = 60
+MEMO_MAX_ENTRIES = 10000
+
+Ttl = Union[float, Callable[[Any], float]]
+
+
+class FlightCancelled(Exception):
+    """Lider istek iptal edildiği için sonuç yayınlanmadı."""
+
+
+class SingleFlight:
+    def __init__(self, max_entries: int = MEMO_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memo: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Tuple, Future] = {}
+        self.stats = {"memo_hits": 0, "coalesced": 0, "calls": 0}
+
+    def begin(self, supplier: str, operation: str, key: Hashable) -> Tuple[Future, bool]:
+        """(future, lider_mi) döndürür. Lider isteği kendisi yürütüp finish() ile sonucu yayınlamak zorundadır."""
+        flight_key = (supplier, operation, key)
+        with self._lock:
+            memo = self._memo.get(flight_key)
+            if memo is not None:
+                if memo[0] > time.monotonic():
+                    self.stats["memo_hits"] += 1
+                    future = Future()
+                    future.set_result(memo[1])
+                    return future, False
+                del self._memo[flight_key]
+            future = self._in_flight.get(flight_key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future, False
+            self.stats["calls"] += 1
+            future = self._in_flight[flight_key] = Future()
+            return future, True
+
+    def finish(self, supplier: str, operation: str, key: Hashable, future: Future, result: Any = None, error: BaseException = None, ttl: Ttl = DEFAULT_MEMO_TTL_SECONDS):
+        flight_key = (supplier, operation, key)
+        with self._lock:
+            if self._in_flight.get(flight_key) is future:
+                del self._in_flight[flight_key]
+            seconds = 0
+            if error is None:
+                try:
+                    seconds = ttl(result) if callable(ttl) else ttl
+                except Exception as e:
+                    logging.warning(f"Single-flight ttl hesaplanamadı ({supplier}.{operation}): {e}")
+            if seconds and seconds > 0:
+                self._memo[flight_key] = (time.monotonic() + seconds, result)
+                self._memo.move_to_end(flight_key)
+                while len(self._memo) > self.max_entries:
+                    self._memo.popitem(last=False)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _execute(self, supplier: str, operation: str, key: Hashable, future: Future, func: Callable[[], Any], ttl: Ttl, cancel_event: threading.Event = None):
+        try:
+            result = func()
+        except BaseException as e:
+            self.finish(supplier, operation, key, future, error=e)
+            return
+        if cancel_event is not None and cancel_event.is_set():
+            self.finish(supplier, operation, key, future, error=FlightCancelled())
+            return
+        self.finish(supplier, operation, key, future, result=result, ttl=ttl)
+
+    def future(self, supplier: str, operation: str, key: Hashable, func: Callable[[], Any], ttl: Ttl = DEFAULT_MEMO_TTL_SECONDS, executor: Executor = None, cancel_event: threading.Event = None) -> Future:
+        """Lider ise func'ı executor'da (verilmezse çağıran thread'de hemen) çalıştırır; paylaşılan Future'ı döndürür.
+        cancel_event, func'ın kendi iptal sinyalidir; func bittiğinde kuruluysa sonuç yayınlanmaz."""
+        future, is_leader = self.begin(supplier, operation, key)
+        if not is_leader:
+            return future
+        if executor is None:
+            self._execute(supplier, operation, key, future, func, ttl, cancel_event)
+            return future
+        try:
+            executor.submit(self._execute, supplier, operation, key, future, func, ttl, cancel_event)
+        except RuntimeError as e:
+            self.finish(supplier, operation, key, future, error=e)
+        return future
+
+    @staticmethod
+    def wait(future: Future, cancel_event: threading.Event = None, default: Any = None) -> Any:
+        """Sonucun kopyasını döndürür; cancel_event kurulursa beklemeyi bırakıp default döner."""
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return default
+            try:
+                return copy.deepcopy(future.result(timeout=0.5))
+            except FuturesTimeoutError:
+                continue
+
+    def do(self, supplier: str, operation: str, key: Hashable, func: Callable[[], Any], ttl: Ttl = DEFAULT_MEMO_TTL_SECONDS, cancel_event: threading.Event = None, default: Any = None) -> Any:
+        """func'ı çağıranın thread'inde tekil uçuş olarak çalıştırır; func, cancel_event'i kendisi de dinlemelidir."""
+        while True:
+            try:
+                return self.wait(self.future(supplier, operation, key, func, ttl, cancel_event=cancel_event), cancel_event, default)
+            except FlightCancelled:
+                if cancel_event is not None and cancel_event.is_set():
+                    return default
+
+    def invalidate(self, supplier: str = None, operation: str = None):
+        """Önbelleği (isteğe bağlı olarak tedarikçi/işlem bazında) temizler; uçuştaki istekler etkilenmez."""
+        with self._lock:
+            for flight_key in [k for k in self._memo if (supplier is None or k[0] == supplier) and (operation is None or k[1] == operation)]:
+                del self._memo[flight_key]
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Kaynak Bazlı Zamanlayıcı
+========================
+Birden fazla arama terimi aynı anda çalışırken her tedarikçiye giden eşzamanlı
+görev sayısını ayrı ayrı sınırlar. TCI küçük bir Playwright sayfa havuzunu, Orkim
+aynı girişi paylaşan küçük bir oturum havuzunu kullandığı için az sayıda terime;
+Sigma ve Netflex HTTP üzerinden çalıştığı için daha fazla terime aynı anda hizmet
+verebilir.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+
+DEFAULT_SOURCE_LIMITS = {
+    "sigma": 4,
+    "tci": 2,
+    "orkim": 2,
+    "itk": 4,
+    "netflex": 4,
+}
+
+
+class SourceScheduler:
+    """Her kaynak için ayrı bir semafor tutar; limiti olmayan kaynaklar serbestçe çalışır."""
+
+    def __init__(self, limits: Dict[str, int] = None):
+        self._lock = threading.Lock()
+        self._limits: Dict[str, int] = {}
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self.update_limits(limits or DEFAULT_SOURCE_LIMITS)
+
+    def update_limits(self, limits: Dict[str, int]):
+        """Limitleri günceller. Çalışan görevler eski semaforu serbest bırakmaya devam eder."""
+        with self._lock:
+            for source, limit in limits.items():
+                try:
+                    limit = max(1, int(limit))
+                except (TypeError, ValueError):
+                    logging.warning(f"Zamanlayıcı: '{source}' için geçersiz limit yok sayıldı: {limit}")
+                    continue
+                if self._limits.get(source) != limit:
+                    self._limits[source] = limit
+                    self._semaphores[source] = threading.BoundedSemaphore(limit)
+            logging.info(f"Zamanlayıcı kaynak limitleri: {self._limits}")
+
+    def get_limits(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._limits)
+
+    @contextmanager
+    def slot(self, source: str, cancel_event: threading.Event = None, wait: bool = True):
+        """Kaynak için bir yer bekler; beklerken iptal edilirse False verir.
+        wait=False ile yalnızca boş yer varsa alınır; arka plan işleri etkileşimli aramaların önüne geçmez."""
+        with self._lock:
+            semaphore = self._semaphores.get(source)
+        if semaphore is None:
+            yield True
+            return
+        acquired = False if wait else semaphore.acquire(blocking=False)
+        while not acquired and wait:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            acquired = semaphore.acquire(timeout=0.2)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                semaphore.release()
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Tedarikçi G/Ç Çekirdeği (asyncio)
+=================================
+Sigma, Netflex, Orkim ve ITK istekleri tek bir arka plan thread'inde çalışan tek
+bir asyncio olay döngüsünde, paylaşılan bir aiohttp istemcisiyle yürütülür. Her
+istek host'un uyarlanabilir hız sınırlayıcısından (rate_limiter) izin alır; böylece
+iç içe thread havuzları yerine sabit ve küçük bir thread sayısıyla çok daha fazla
+istek aynı anda beklenebilir ve tedarikçiler kısıtlama yaptığında hız otomatik düşer.
+
+Servisler yapılandırma kaynağı olarak mevcut requests.Session nesnelerini kullanmaya
+devam eder: başlıklar ve çerezler session.prepare_request ile hazırlanır, yanıtla
+gelen çerezler aynı oturuma geri yazılır. Yönlendirmeler elle izlenir; her adımın
+çerezleri oturuma yazıldıktan sonra sonraki istek oturumdan yeniden hazırlanır,
+böylece ara adımlarda kurulan çerezler de gönderilir. Vekil sunucu da requests'teki
+gibi seçilir: oturumun proxies ayarı, HTTP(S)_PROXY/NO_PROXY ortam değişkenleri ve
+işletim sisteminin vekil ayarları (session.trust_env açıkken). Yanıtlar requests.Response olarak, ağ
+hataları requests istisnaları olarak döner; servislerin ayrıştırma ve hata yakalama
+kodu değişmeden çalışır.
+
+Senkron kod coroutine'leri run() (iptal sinyaliyle bekler) veya submit()
+(concurrent.futures.Future döndürür) ile çalıştırır. run() olay döngüsünün
+kendisinden çağrılmamalıdır.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+from typing import Any, Awaitable, Dict, Optional
+from urllib.parse import urljoin, urlsplit
+
+import aiohttp
+import requests
+import yarl
+
+from .rate_limiter import OUTCOME_CANCELLED, OUTCOME_ERROR, OUTCOME_OK, OUTCOME_THROTTLED, OUTCOME_TIMEOUT, THROTTLE_STATUSES, parse_retry_after, rate_controller
+
+
+MAX_CONNECTIONS = 100
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_BACKOFF_SECONDS = 1.0
+# requests'in hazırladığı bu başlıklar aiohttp tarafından gövdeye göre yeniden hesaplanır.
+_DROPPED_REQUEST_HEADERS = {"content-length", "transfer-encoding", "connection"}
+
+
+def _build_response(prepared: requests.PreparedRequest, status: int, reason: str, content: bytes, url: str, headers: Dict[str, str]) -> requests.Response:
+    """aiohttp yanıtını requests.Response'a çevirir; .text, .json() ve raise_for_status requests ile aynı davranır."""
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response._content = content
+    response._content_consumed = True
+    response.headers = requests.structures.CaseInsensitiveDict(headers)
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.url = url
+    response.request = prepared
+    return response
+
+
+class SupplierIO:
+    def __init__(self, max_connections: int = MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop = None
+        self._thread: threading.Thread = None
+        self._client: aiohttp.ClientSession = None
+        self.rate_controller = rate_controller
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                def run_loop():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+                self._thread = threading.Thread(target=run_loop, name="Supplier-IO", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+                logging.info("Tedarikçi G/Ç olay döngüsü başlatıldı.")
+            return self._loop
+
+    def set_host_limit(self, host: str, limit: int):
+        """Host için eşzamanlı istek üst sınırını değiştirir; uyarlanabilir limit bu değeri aşmaz."""
+        limit = max(1, int(limit))
+        if self.rate_controller.get_policy(host).max_concurrency == limit: return
+        self.rate_controller.configure(host, max_concurrency=limit, min_concurrency=1, initial_concurrency=min(limit, self.rate_controller.get_policy(host).initial_concurrency))
+
+    def get_host_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.rate_controller.stats()
+
+    def _get_client(self) -> aiohttp.ClientSession:
+        if self._client is None or self._client.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            # Çerezler servislerin requests oturumlarında tutulur; istemcinin kendi çerez kavanozu kullanılmaz.
+            self._client = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar(), auto_decompress=True, trust_env=True)
+        return self._client
+
+    async def request(self, session: requests.Session, method: str, url: str, *, headers: Dict[str, Optional[str]] = None, json: Any = None, data: Any = None,
+                      timeout: float = 30, verify: bool = True, allow_redirects: bool = True, retries: int = 0) -> requests.Response:
+        """session'ın başlık ve çerezleriyle isteği gönderir; 429/5xx ve bağlantı hatalarında retries kadar yeniden dener."""
+        prepared = session.prepare_request(requests.Request(method, url, headers=headers, json=json, data=data))
+        host = urlsplit(prepared.url).hostname or ""
+        attempt = 0
+        while True:
+            await self.rate_controller.acquire(host)
+            started, outcome, retry_after, result = time.monotonic(), OUTCOME_CANCELLED, 0.0, None
+            try:
+                result = await self._send_following_redirects(session, prepared, timeout, verify, allow_redirects)
+                if result.status_code in THROTTLE_STATUSES:
+                    outcome, retry_after = OUTCOME_THROTTLED, parse_retry_after(result.headers.get("Retry-After"))
+                else:
+                    outcome = OUTCOME_ERROR if result.status_code >= 500 else OUTCOME_OK
+            except asyncio.TimeoutError as e:
+                outcome = OUTCOME_TIMEOUT
+                if attempt >= retries: raise requests.exceptions.Timeout(f"{method} {url} zaman aşımı ({timeout}s)") from e
+            except aiohttp.ClientError as e:
+                outcome = OUTCOME_ERROR
+                if attempt >= retries: raise requests.exceptions.ConnectionError(f"{method} {url}: {e}") from e
+            finally:
+                self.rate_controller.release(host, outcome, time.monotonic() - started, retry_after)
+            if result is not None and (result.status_code not in RETRY_STATUSES or attempt >= retries):
+                return result
+            attempt += 1
+            # Retry-After varsa ek bekleme bir sonraki acquire() adımında hız sınırlayıcı tarafından uygulanır.
+            await asyncio.sleep(RETRY_BACKOFF_SECONDS * attempt)
+
+    async def _send_following_redirects(self, session: requests.Session, prepared: requests.PreparedRequest, timeout: float, verify: bool, allow_redirects: bool) -> requests.Response:
+        response = await self._send(session, prepared, timeout, verify, False)
+        history = []
+        while allow_redirects and response.is_redirect:
+            if len(history) >= session.max_redirects:
+                raise requests.exceptions.TooManyRedirects(f"{session.max_redirects} yönlendirme aşıldı: {prepared.url}", response=response)
+            history.append(response)
+            prepared = self._redirect_request(session, prepared, response)
+            response = await self._send(session, prepared, timeout, verify, False)
+        response.history = history
+        return response
+
+    @staticmethod
+    def _redirect_request(session: requests.Session, prepared: requests.PreparedRequest, response: requests.Response) -> requests.PreparedRequest:
+        """requests'in yönlendirme kurallarıyla sonraki isteği hazırlar; Cookie başlığı güncel oturum çerezlerinden yeniden kurulur."""
+        next_request = prepared.copy()
+        next_request.url = requests.utils.requote_uri(urljoin(response.url, session.get_redirect_target(response)))
+        session.rebuild_method(next_request, response)
+        if response.status_code not in (307, 308):
+            for header in ("Content-Length", "Content-Type", "Transfer-Encoding"): next_request.headers.pop(header, None)
+            next_request.body = None
+        next_request.headers.pop("Cookie", None)
+        next_request.prepare_cookies(session.cookies)
+        session.rebuild_auth(next_request, response)
+        return next_request
+
+    @staticmethod
+    def _select_proxy(session: requests.Session, url: str) -> Optional[str]:
+        """requests'in kuralıyla (ortam/işletim sistemi ayarları ve session.proxies) URL için vekil sunucuyu seçer."""
+        proxies = session.merge_environment_settings(url, {}, None, None, None)["proxies"]
+        proxy = requests.utils.select_proxy(url, proxies)
+        if proxy and urlsplit(proxy).scheme not in ("http", "https"):
+            logging.debug(f"Desteklenmeyen vekil sunucu türü yok sayıldı: {urlsplit(proxy).scheme}")
+            return None
+        return proxy
+
+    async def _send(self, session: requests.Session, prepared: requests.PreparedRequest, timeout: float, verify: bool, allow_redirects: bool) -> requests.Response:
+        """Tek bir ağ isteği; benchmark kayıt/geri oynatma katmanı bu metodu sarar."""
+        request_headers = {name: value for name, value in prepared.headers.items() if name.lower() not in _DROPPED_REQUEST_HEADERS}
+        proxy = self._select_proxy(session, prepared.url)
+        # requests URL'yi zaten kodladı; aiohttp'nin yeniden kodlaması engellenir.
+        async with self._get_client().request(prepared.method, yarl.URL(prepared.url, encoded=True), headers=request_headers, data=prepared.body, ssl=None if verify else False,
+                                              allow_redirects=allow_redirects, timeout=aiohttp.ClientTimeout(total=timeout), proxy=proxy) as response:
+            content = await response.read()
+            self._store_cookies(session, response)
+            return _build_response(prepared, response.status, response.reason, content, str(response.url), dict(response.headers))
+
+    @staticmethod
+    def _store_cookies(session: requests.Session, response: aiohttp.ClientResponse):
+        responses = list(response.history) + [response]
+        for hop in responses:
+            hop_host = hop.url.host or ""
+            for morsel in hop.cookies.values():
+                try:
+                    session.cookies.set(morsel.key, morsel.value, domain=morsel["domain"] or hop_host, path=morsel["path"] or "/")
+                except Exception as cookie_err:
+                    logging.debug(f"Çerez oturuma yazılamadı ({morsel.key}): {cookie_err}")
+
+    def submit(self, coro: Awaitable) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro: Awaitable, cancel_event: threading.Event = None, timeout: float = None, default: Any = None) -> Any:
+        """Coroutine'i olay döngüsünde çalıştırıp sonucu bekler. İptal sinyali kurulursa coroutine iptal edilir ve default döner."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("SupplierIO.run olay döngüsü thread'inden çağrılamaz.")
+        future = self.submit(coro)
+        waited = 0.0
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                future.cancel()
+                return default
+            try:
+                return future.result(timeout=0.25)
+            except FuturesTimeoutError:
+                waited += 0.25
+                if timeout is not None and waited >= timeout:
+                    future.cancel()
+                    raise
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None: return
+        async def shutdown():
+            if self._client is not None and not self._client.closed:
+                await self._client.close()
+            self._client = None
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=5)
+        except Exception as e:
+            logging.warning(f"Tedarikçi G/Ç istemcisi kapatılırken hata: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+
+
+supplier_io = SupplierIO()
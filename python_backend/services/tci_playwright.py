@@ -11,6 +11,11 @@ Değişiklikler:
 - WebDriverWait → page.wait_for_selector
 - get_attribute → element.get_attribute
 - execute_script → page.evaluate
+- Tek paylaşılan sayfa yerine her biri kendi thread'inde çalışan bir sayfa havuzu;
+  sonraki sonuç sayfaları ve terim varyasyonları aynı anda yüklenir
+- Kart verileri tek bir page.evaluate çağrısıyla JSON olarak okunur
+- Sonuç sayfaları önce tarayıcıdan alınan cookie'lerle doğrudan HTTP + lxml ile
+  çekilir; bot doğrulaması veya boş sonuç görülürse tarayıcıya geri dönülür
 """
 
 import json
@@ -22,13 +27,18 @@ import queue
 import requests
 from requests.adapters import HTTPAdapter
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
-from typing import Dict, Any, List, Generator
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from typing import TYPE_CHECKING, Dict, Any, List, Generator
 import time
 import sys
 import hashlib
 
-from playwright.sync_api import sync_playwright, Browser, Page, BrowserContext
+from lxml import html as lxml_html
+# Playwright ağır bir modüldür; arka uç açılışını geciktirmemesi için ilk sayfa thread'i başlarken yüklenir.
+if TYPE_CHECKING:
+    from playwright.sync_api import Browser, Page, BrowserContext
+
+from .profiler import profiler
 from urllib.parse import quote, urlparse, urlunparse, parse_qs, urlencode
 
 
@@ -44,70 +54,349 @@ class Product:
         return f"Product(Name='{self.name}', Code='{self.code}', CAS='{self.cas_number}', Variations={len(self.variations)}, Brand='{self.brand}')"
 
 
-class TciScraper:
-    def __init__(self, cdp_endpoint: str = "http://127.0.0.1:9222"):
+PAGE_POOL_SIZE = 4
+MAX_CARDS_PER_PAGE = 60
+PAGE_LOAD_TIMEOUT_MS = 90000
+RESULT_WAIT_TIMEOUT_MS = 60000
+PRODUCT_LIST_SELECTOR = "#product-list-wrap .prductlist[data-product-code1]"
+COOKIE_ACCEPT_SELECTOR = "button:has-text('Alle akzeptieren'), button:has-text('OK'), button:has-text('Accept All')"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/5.37.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36"
+TCI_HOME_URL = "https://www.tcichemicals.com/DE/de/"
+HTTP_FETCHER_WORKERS = 8
+HTTP_TIMEOUT_SECONDS = 20
+# Bu işaretlerden biri yanıtta varsa sayfa bir bot doğrulamasıdır; tarayıcı yoluna geçilir.
+CHALLENGE_MARKERS = ("cf-chl", "challenge-platform", "_Incapsula_Resource", "Just a moment...", "<title>Access Denied</title>")
+NO_RESULTS_MARKERS = ("keine Suchergebnisse", "no results")
+_CARD_XPATH = "//*[@id='product-list-wrap']//*[contains(concat(' ', normalize-space(@class), ' '), ' prductlist ') and @data-product-code1]"
+_HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+_CARD_NAME_XPATH = ".//a[contains(concat(' ', normalize-space(@class), ' '), ' name ') and contains(concat(' ', normalize-space(@class), ' '), ' product-title ')]"
+
+# Tüm kartlar tek bir CDP çağrısıyla okunur; kart/hücre başına query_selector + inner_text gidiş-dönüşleri yapılmaz.
+EXTRACT_CARDS_JS = """(args) => {
+    const text = (el) => (el ? (el.innerText || '').trim() : '');
+    const cards = Array.from(document.querySelectorAll(args.selector)).slice(0, args.limit).map((card) => {
+        const table = card.querySelector('#PricingTable');
+        const rows = table ? Array.from(table.querySelectorAll('tr')) : [];
+        return {
+            name: text(card.querySelector('a.name.product-title')),
+            code: card.getAttribute('data-product-code1') || '',
+            cas: card.getAttribute('data-casNo') || '',
+            rows: rows.map((row) => Array.from(row.querySelectorAll('td')).map((td) => [td.getAttribute('data-attr') || '', text(td)])),
+        };
+    });
+    const bodyText = cards.length ? '' : (document.body ? document.body.innerText : '');
+    return {url: location.href, cards: cards, noResults: /keine Suchergebnisse|no results/.test(bodyText)};
+}"""
+
+
+def _products_from_cards(cards: List[Dict[str, Any]]) -> List[Product]:
+    """Sayfadan çıkarılan ham kart verisini Product nesnelerine dönüştürür."""
+    products = []
+    for card_index, card in enumerate(cards):
+        try:
+            name = (card.get("name") or "").strip() or "N/A"
+            code = (card.get("code") or "").strip() or "N/A"
+            cas_number = (card.get("cas") or "").strip() or "N/A"
+            variations = []
+            for cols in card.get("rows") or []:
+                unit = ''
+                price = ''
+                stock_info = []
+                for data_attr, text in cols:
+                    data_attr = (data_attr or "").strip().strip(':')
+                    text = (text or "").strip()
+                    if not data_attr or not text:
+                        continue
+                    if data_attr == "Einheit":
+                        unit = text
+                    elif data_attr == "Stückpreis":
+                        price = text.replace('\n', ' ')
+                    else:
+                        stock_info.append({'country': data_attr, 'stock': text})
+                if unit and price:
+                    variations.append({'unit': unit, 'price': price, 'stock_info': stock_info})
+                elif unit or price:
+                    logging.debug(f"Missing data: {code}, U:{unit}, P:{price}")
+            products.append(Product(name, code, variations, brand="TCI", cas_number=cas_number))
+        except Exception as e:
+            logging.error(f"Card err ({card_index + 1}): {e}", exc_info=False)
+    return products
+
+
+def _element_text(element) -> str:
+    # innerText'e yakın bir sonuç için kaynak HTML'deki girinti/satır boşlukları tek boşluğa indirilir.
+    return " ".join(element.text_content().split()) if element is not None else ""
+
+
+def _parse_cards_html(content: bytes) -> Dict[str, Any]:
+    """Sunucunun ürettiği sonuç sayfasından EXTRACT_CARDS_JS ile aynı yapıda kart verisi çıkarır."""
+    document = lxml_html.fromstring(content, parser=_HTML_PARSER)
+    cards = []
+    for card in document.xpath(_CARD_XPATH)[:MAX_CARDS_PER_PAGE]:
+        names = card.xpath(_CARD_NAME_XPATH)
+        tables = card.xpath(".//*[@id='PricingTable']")
+        rows = tables[0].xpath(".//tr") if tables else []
+        cards.append({
+            "name": _element_text(names[0]) if names else "",
+            "code": card.get("data-product-code1") or "",
+            "cas": card.get("data-casNo") or card.get("data-casno") or "",
+            "rows": [[[td.get("data-attr") or "", _element_text(td)] for td in row.xpath("./td")] for row in rows],
+        })
+    body_text = "" if cards else document.text_content()
+    return {"cards": cards, "noResults": any(marker in body_text for marker in NO_RESULTS_MARKERS)}
+
+
+def _cards_hash(cards: List[Dict[str, Any]]) -> str:
+    return hashlib.md5(json.dumps(cards, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+class _TciPageWorker(threading.Thread):
+    """
+    Kendi Playwright bağlantısı, context'i ve sayfası olan işçi thread'i.
+    Sync Playwright nesneleri yalnızca oluşturuldukları thread'de kullanılabildiği
+    için her sayfa kendi thread'inde yaşar; işler ortak kuyruktan alınır.
+    Havuz varsa Obscura süreci iş başına kiralanır; boşta bekleyen işçi süreç tutmaz.
+    """
+
+    def __init__(self, index: int, cdp_endpoint: str, jobs: queue.Queue, endpoint_pool=None):
+        super().__init__(name=f"TCI-Page-{index}", daemon=True)
         self.cdp_endpoint = cdp_endpoint
+        self.endpoint_pool = endpoint_pool
+        self.endpoint: str = None
+        self.jobs = jobs
+        self.ready = threading.Event()
+        self.page: "Page" = None
+        self.cookies_accepted = False
         self._playwright = None
-        self._browser: Browser = None
-        self._context: BrowserContext = None
-        self._page: Page = None
+        self._browser: "Browser" = None
+        self._context: "BrowserContext" = None
 
-    def reinit_driver(self):
-        """Playwright bağlantısını başlat veya yeniden başlat."""
-        if self._page:
-            self.close_driver()
+    def _connect(self, endpoint: str):
+        self._cleanup()
         try:
-            logging.info("TCI Playwright+Obscura bağlantısı başlatılıyor...")
+            from playwright.sync_api import sync_playwright
             self._playwright = sync_playwright().start()
-            self._browser = self._playwright.chromium.connect_over_cdp(self.cdp_endpoint)
-            self._context = self._browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/5.37.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
-                extra_http_headers={
-                    "Accept-Language": "de-DE,de;q=0.9,en;q=0.5",
-                }
-            )
+            self._browser = self._playwright.chromium.connect_over_cdp(endpoint)
+            self.endpoint = endpoint
+            self._context = self._browser.new_context(user_agent=USER_AGENT, extra_http_headers={"Accept-Language": "de-DE,de;q=0.9,en;q=0.5"})
             # Görselleri engelle (RAM tasarrufu)
             self._context.route("**/*.{png,jpg,jpeg,gif,svg,ico,webp,woff,woff2}", lambda route: route.abort())
+            self.page = self._context.new_page()
+            self.page.set_default_timeout(PAGE_LOAD_TIMEOUT_MS)
+            self.cookies_accepted = False
+        except Exception as e:
+            logging.error(f"{self.name}: Playwright bağlantısı kurulamadı: {e}")
+            self._cleanup()
+
+    def _cleanup(self):
+        for closer in (lambda: self.page and self.page.close(), lambda: self._context and self._context.close(),
+                       lambda: self._browser and self._browser.close(), lambda: self._playwright and self._playwright.stop()):
+            try:
+                closer()
+            except Exception:
+                pass
+        self.page = self._context = self._browser = self._playwright = self.endpoint = None
+
+    def _acquire(self) -> str:
+        # Bağlı olunan süreçte yer varsa o tercih edilir; aksi halde en az yüklü sağlıklı sürece geçilir.
+        return self.endpoint_pool.acquire_endpoint(preferred=self.endpoint) if self.endpoint_pool else self.cdp_endpoint
+
+    def _release(self, endpoint: str):
+        if self.endpoint_pool: self.endpoint_pool.release_endpoint(endpoint)
+
+    def connected(self) -> bool:
+        return bool(self.page) and not self.page.is_closed() and self._browser is not None and self._browser.is_connected()
+
+    def cookies(self) -> List[Dict[str, Any]]:
+        return self._context.cookies() if self._context else []
+
+    def run(self):
+        endpoint = self._acquire()
+        try:
+            self._connect(endpoint)
+        finally:
+            self._release(endpoint)
+        self.ready.set()
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            func, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            endpoint = self._acquire()
+            try:
+                if endpoint != self.endpoint or not self.connected():
+                    # Obscura yeniden başlatıldıysa veya iş başka bir sürece düştüyse iş yeni bağlantıyla yapılır.
+                    self._connect(endpoint)
+                if not self.page:
+                    future.set_exception(RuntimeError(f"{self.name}: Playwright sayfası kullanılamıyor."))
+                    continue
+                try:
+                    future.set_result(func(self))
+                except BaseException as e:
+                    future.set_exception(e)
+            finally:
+                self._release(endpoint)
+        self._cleanup()
 
-            self._page = self._context.new_page()
-            self._page.set_default_timeout(90000)
-            logging.info("TCI Playwright+Obscura bağlantısı başarıyla kuruldu.")
+
+class TciScraper:
+    def __init__(self, cdp_endpoint: str = "http://127.0.0.1:9222", pool_size: int = PAGE_POOL_SIZE, endpoint_pool=None):
+        self.cdp_endpoint = cdp_endpoint
+        self.endpoint_pool = endpoint_pool
+        self.pool_size = max(1, pool_size)
+        self._jobs: queue.Queue = None
+        self._workers: List[_TciPageWorker] = []
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_FETCHER_WORKERS * 2, pool_block=True)
+        self._http_session: requests.Session = None
+        self._http_executor: ThreadPoolExecutor = None
+        self._http_lock = threading.Lock()
+
+    def reinit_driver(self):
+        """Playwright sayfa havuzunu başlat veya yeniden başlat."""
+        if self._workers:
+            self.close_driver()
+        logging.info(f"TCI Playwright+Obscura sayfa havuzu başlatılıyor ({self.pool_size} sayfa)...")
+        self._jobs = queue.Queue()
+        workers = [_TciPageWorker(i + 1, self.cdp_endpoint, self._jobs, self.endpoint_pool) for i in range(self.pool_size)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.ready.wait(timeout=120)
+        ready_count = sum(1 for worker in workers if worker.page)
+        if not ready_count:
+            logging.critical("TCI Playwright bağlantısı kurulurken kritik hata: hiçbir sayfa açılamadı.")
+            self._stop_workers(workers, wait=True)
+            return
+        self._workers = workers
+        logging.info(f"TCI Playwright+Obscura sayfa havuzu hazır ({ready_count}/{self.pool_size} sayfa).")
+        with self._http_lock:
+            if self._http_executor is None:
+                self._http_executor = ThreadPoolExecutor(max_workers=HTTP_FETCHER_WORKERS, thread_name_prefix="TCI-HTTP")
+        try:
+            self._submit(self._harvest_cookies).result(timeout=120)
         except Exception as e:
-            logging.critical(f"TCI Playwright bağlantısı kurulurken kritik hata: {e}", exc_info=True)
-            self._page = None
-            self._cleanup_playwright()
+            logging.warning(f"TCI: Başlangıçta cookie alınamadı, ilk arama tarayıcıdan yapılacak: {e}")
+
+    def start_http_only(self, cookies: List[Dict[str, Any]] = None):
+        """Tarayıcı havuzu olmadan yalnızca HTTP yolunu açar (ör. çevrimdışı kıyaslama); tarayıcıya geri dönüş yapılamaz."""
+        with self._http_lock:
+            if self._http_executor is None:
+                self._http_executor = ThreadPoolExecutor(max_workers=HTTP_FETCHER_WORKERS, thread_name_prefix="TCI-HTTP")
+        self._update_http_session(cookies or [], TCI_HOME_URL)
 
     def kill_driver(self):
         """Bağlantıyı temizle — Obscura manager tarafından yönetilir."""
         logging.warning("TCI Playwright bağlantısı zorla temizleniyor...")
-        self._cleanup_playwright()
+        self._stop_workers(self._workers, wait=False)
 
-    def _cleanup_playwright(self):
-        """Playwright kaynaklarını temizle."""
-        if self._page:
-            try:
-                self._page.close()
-            except Exception:
-                pass
-            self._page = None
-        if self._context:
-            try:
-                self._context.close()
-            except Exception:
-                pass
-            self._context = None
-        if self._browser:
-            try:
-                self._browser.close()
-            except Exception:
-                pass
-            self._browser = None
-        if self._playwright:
+    def _stop_workers(self, workers: List[_TciPageWorker], wait: bool):
+        if self._jobs is not None:
+            # Bekleyen işleri iptal et, ardından her işçiye bir durdurma işareti gönder.
+            while True:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    job[1].cancel()
+            for _ in workers:
+                self._jobs.put(None)
+        if wait:
+            for worker in workers:
+                worker.join(timeout=15)
+        if workers is self._workers:
+            self._workers = []
+
+    def _harvest_cookies(self, worker: _TciPageWorker):
+        """Tarayıcıda ana sayfayı açar, cookie onayını verir ve cookie'leri HTTP oturumuna aktarır."""
+        worker.page.goto(TCI_HOME_URL, wait_until="domcontentloaded", timeout=PAGE_LOAD_TIMEOUT_MS)
+        if not worker.cookies_accepted:
+            self._accept_cookies(worker)
+        self._update_http_session(worker.cookies(), worker.page.url)
+
+    def _update_http_session(self, playwright_cookies: List[Dict[str, Any]], referer: str):
+        """Sigma'daki gibi Playwright cookie'lerini requests oturumuna taşır."""
+        session = requests.Session()
+        session.mount('https://', self.adapter)
+        session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "de-DE,de;q=0.9,en;q=0.5",
+            "Referer": referer,
+        })
+        for cookie in playwright_cookies:
+            if not cookie.get('domain'):
+                continue
             try:
-                self._playwright.stop()
-            except Exception:
-                pass
-            self._playwright = None
+                session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie.get('path', '/'))
+            except Exception as cookie_set_err:
+                logging.warning(f"TCI: Cookie aktarılamadı {cookie.get('name')}: {cookie_set_err}")
+        with self._http_lock:
+            previous, self._http_session = self._http_session, session
+        if previous:
+            previous.close()
+        logging.info(f"TCI: {len(playwright_cookies)} cookie HTTP oturumuna aktarıldı.")
+
+    def _fetch_results_page_http(self, url: str, term: str = None, page: int = None) -> Dict[str, Any]:
+        """Sonuç sayfasını doğrudan HTTP ile çeker; tarayıcı gerektiğinde None döner."""
+        with self._http_lock:
+            session = self._http_session
+        if session is None:
+            return None
+        try:
+            with profiler.span("tci.http_page", "tci", term=term, page=page) as span:
+                response = session.get(url, timeout=HTTP_TIMEOUT_SECONDS)
+                span.set(bytes=len(response.content), status=response.status_code)
+        except requests.exceptions.RequestException as e:
+            logging.info(f"TCI HTTP isteği başarısız, tarayıcıya geçiliyor: {e}")
+            return None
+        if response.status_code != 200:
+            logging.info(f"TCI HTTP yanıtı başarısız (Status: {response.status_code}), tarayıcıya geçiliyor.")
+            return None
+        with profiler.span("tci.parse", "tci", term=term, page=page) as span:
+            page_data = _parse_cards_html(response.content)
+            span.set(cards=len(page_data["cards"]))
+        if not page_data["cards"]:
+            if any(marker in response.text for marker in CHALLENGE_MARKERS):
+                logging.info("TCI HTTP yanıtı bot doğrulaması içeriyor, tarayıcıya geçiliyor.")
+                return None
+            if not page_data["noResults"]:
+                logging.info("TCI HTTP yanıtında ürün kartı bulunamadı, tarayıcıya geçiliyor.")
+                return None
+        page_data["url"] = response.url
+        return page_data
+
+    def _load_with_browser(self, worker: _TciPageWorker, url: str, term: str = None, page: int = None) -> Dict[str, Any]:
+        with profiler.span("tci.browser_page", "tci", term=term, page=page, worker=worker.name) as span:
+            page_data = self._load_results_page(worker, url)
+            span.set(cards=len(page_data.get("cards") or []))
+        # Tarayıcı yolu doğrulamayı geçtiyse güncel cookie'ler sonraki HTTP istekleri için alınır.
+        if page_data.get("cards") or page_data.get("noResults"):
+            self._update_http_session(worker.cookies(), page_data.get("url") or url)
+        return page_data
+
+    def _fetch_results_page(self, url: str, term: str = None, page: int = None) -> Dict[str, Any]:
+        page_data = self._fetch_results_page_http(url, term, page)
+        if page_data is not None:
+            return page_data
+        if not self._workers:
+            raise RuntimeError("TCI HTTP yanıtı kullanılamadı ve tarayıcı havuzu yok.")
+        return self._submit(lambda worker: self._load_with_browser(worker, url, term, page)).result()
+
+    def _submit_results_page(self, url: str, term: str = None, page: int = None) -> Future:
+        """Sayfayı HTTP yoluyla ister; HTTP çalışmıyorsa doğrudan tarayıcı havuzuna gönderir."""
+        with self._http_lock:
+            executor = self._http_executor
+        if executor is None:
+            return self._submit(lambda worker: self._load_with_browser(worker, url, term, page))
+        return executor.submit(self._fetch_results_page, url, term, page)
+
+    def _submit(self, func) -> Future:
+        future = Future()
+        self._jobs.put((func, future))
+        return future
 
     def _get_subsequent_page_url(self, base_url: str, search_term: str, page: int) -> str:
         parsed_url = urlparse(base_url)
@@ -120,176 +409,144 @@ class TciScraper:
         new_url = urlunparse((parsed_url.scheme or "https", parsed_url.netloc or "www.tcichemicals.com", "/DE/de/search", parsed_url.params, new_query, parsed_url.fragment))
         return new_url
 
-    def get_products(self, search_query: str, cancellation_token: threading.Event) -> Generator[List[Product], None, None]:
-        if not self._page:
+    @staticmethod
+    def _accept_cookies(worker: _TciPageWorker):
+        try:
+            accept_button = worker.page.wait_for_selector(COOKIE_ACCEPT_SELECTOR, timeout=15000, state="visible")
+            if accept_button:
+                accept_button.click()
+                logging.info("Cookie onay banner'ı kabul edildi.")
+                try:
+                    worker.page.wait_for_selector(COOKIE_ACCEPT_SELECTOR, state="hidden", timeout=5000)
+                except Exception:
+                    logging.warning("Cookie banner'ı tıklandı ama kaybolmadı.")
+        except Exception:
+            logging.info("Cookie onay banner'ı bulunamadı veya zaman aşımına uğradı.")
+        worker.cookies_accepted = True
+
+    @classmethod
+    def _load_results_page(cls, worker: _TciPageWorker, url: str) -> Dict[str, Any]:
+        """Sonuç sayfasını işçinin sayfasında açar ve tüm kartları tek evaluate çağrısıyla okur."""
+        worker.page.goto(url, wait_until="domcontentloaded", timeout=PAGE_LOAD_TIMEOUT_MS)
+        if not worker.cookies_accepted:
+            cls._accept_cookies(worker)
+        try:
+            worker.page.wait_for_selector(f"{PRODUCT_LIST_SELECTOR}, :text('keine Suchergebnisse'), :text('no results')", timeout=RESULT_WAIT_TIMEOUT_MS, state="attached")
+        except Exception:
+            pass
+        return worker.page.evaluate(EXTRACT_CARDS_JS, {"selector": PRODUCT_LIST_SELECTOR, "limit": MAX_CARDS_PER_PAGE})
+
+    def _wait_result(self, future: Future, cancellation_token: threading.Event):
+        while True:
+            if cancellation_token.is_set():
+                future.cancel()
+                return None
+            try:
+                return future.result(timeout=0.5)
+            except FuturesTimeoutError:
+                continue
+
+    def get_products(self, search_query: str, cancellation_token: threading.Event, incomplete: threading.Event = None) -> Generator[List[Product], None, None]:
+        """Sonuçları sayfa sırasıyla döndürür; yüklenemeyen sayfalar yüzünden tarama yarıda kaldıysa incomplete olayı kurulur."""
+        def mark_incomplete():
+            if incomplete is not None: incomplete.set()
+        if not self._workers and self._http_session is None:
             logging.error("TCI Playwright bağlantısı kurulmamış. Arama yapılamıyor.")
+            mark_incomplete()
             return
         if cancellation_token.is_set():
             logging.info("TCI araması başlangıçta iptal edildi.")
             return
 
         first_page_url = f"https://www.tcichemicals.com/DE/de/search?text={quote(search_query)}"
-        base_search_url_for_params = first_page_url
-
+        logging.info(f"'{search_query}' için TCI ilk sayfa açılıyor: {first_page_url}")
         try:
-            logging.info(f"'{search_query}' için TCI ilk sayfa açılıyor: {first_page_url}")
-            self._page.goto(first_page_url, wait_until="domcontentloaded", timeout=90000)
-
-            # Cookie consent
-            try:
-                accept_selector = "button:has-text('Alle akzeptieren'), button:has-text('OK'), button:has-text('Accept All')"
-                accept_button = self._page.wait_for_selector(accept_selector, timeout=15000, state="visible")
-                if accept_button:
-                    accept_button.click()
-                    logging.info("Cookie onay banner'ı kabul edildi.")
-                    try:
-                        self._page.wait_for_selector(accept_selector, state="hidden", timeout=5000)
-                        logging.info("Cookie banner'ı kayboldu.")
-                    except Exception:
-                        logging.warning("Cookie banner'ı tıklandı ama kaybolmadı.")
-            except Exception:
-                logging.info("Cookie onay banner'ı bulunamadı veya zaman aşımına uğradı.")
-
-            base_search_url_for_params = self._page.url
-
+            first_page = self._wait_result(self._submit_results_page(first_page_url, search_query, 1), cancellation_token)
         except Exception as e:
             logging.error(f"TCI ana arama sayfası yüklenirken hata oluştu: {e}")
+            mark_incomplete()
             return
+        if first_page is None:
+            return
+        base_search_url_for_params = first_page.get("url") or first_page_url
+
+        # Sonraki sayfalar havuz boyutu kadar önden yüklenir, sonuçlar yine sayfa sırasıyla işlenir.
+        pending: Dict[int, Future] = {}
+        next_page_to_submit = 2
+
+        def fill_window(current_page: int):
+            nonlocal next_page_to_submit
+            while next_page_to_submit < current_page + self.pool_size:
+                url = self._get_subsequent_page_url(base_search_url_for_params, search_query, next_page_to_submit)
+                pending[next_page_to_submit] = self._submit_results_page(url, search_query, next_page_to_submit)
+                next_page_to_submit += 1
 
         page_count = 1
         last_page_content_hash = ""
         max_empty_pages = 2
+        try:
+            while not cancellation_token.is_set():
+                if page_count == 1:
+                    page_data = first_page
+                else:
+                    fill_window(page_count)
+                    logging.info(f"TCI: Sayfa {page_count} bekleniyor...")
+                    try:
+                        page_data = self._wait_result(pending.pop(page_count), cancellation_token)
+                    except Exception as page_load_error:
+                        logging.error(f"TCI: Sayfa {page_count} yüklenirken hata oluştu: {page_load_error}")
+                        mark_incomplete()
+                        break
+                    if page_data is None:
+                        break
 
-        while not cancellation_token.is_set():
-            if page_count > 1:
-                next_page_url = self._get_subsequent_page_url(base_search_url_for_params, search_query, page_count)
-                logging.info(f"TCI: Sonraki sayfaya gidiliyor: {next_page_url}")
-                try:
-                    self._page.goto(next_page_url, wait_until="domcontentloaded", timeout=90000)
-                except Exception as page_load_error:
-                    logging.error(f"TCI: Sayfa {page_count} yüklenirken hata oluştu: {page_load_error}")
+                logging.info(f"TCI Sayfa {page_count} taranıyor (URL: {page_data.get('url')})...")
+                cards = page_data.get("cards") or []
+                if cards:
+                    logging.info(f"{len(cards)} adet ürün kartı bulundu.")
+                    max_empty_pages = 2
+                    if page_count == 1:
+                        fill_window(page_count)
+                elif page_data.get("noResults"):
+                    logging.info("TCI: 'Ürün bulunamadı' mesajı algılandı. Tarama tamamlanıyor.")
                     break
-
-            logging.info(f"TCI Sayfa {page_count} taranıyor (URL: {self._page.url})...")
-
-            # product-basic-wrap içinde tam liste/duble içerik olabiliyor; görünür listeyi hedefle.
-            product_list_selector = "#product-list-wrap .prductlist[data-product-code1]"
-            no_results_selector = "//*[contains(text(), 'keine Suchergebnisse') or contains(text(), 'no results')]"
-            product_cards = []
-
-            try:
-                # Ürün listesi veya "sonuç yok" mesajını bekle
-                try:
-                    self._page.wait_for_selector(
-                        f"{product_list_selector}, :text('keine Suchergebnisse'), :text('no results')",
-                        timeout=60000,
-                        state="attached"
-                    )
-                except Exception:
-                    pass
-
-                product_cards = self._page.query_selector_all(product_list_selector)
-                if len(product_cards) > 60:
-                    product_cards = product_cards[:60]
-                if product_cards:
-                    logging.info(f"{len(product_cards)} adet ürün kartı bulundu.")
-
-                if not product_cards:
-                    no_results = self._page.query_selector("text=keine Suchergebnisse") or self._page.query_selector("text=no results")
-                    if no_results:
-                        logging.info("TCI: 'Ürün bulunamadı' mesajı algılandı. Tarama tamamlanıyor.")
+                else:
+                    logging.warning(f"TCI Sayfa {page_count}: Ürün kartı yok ve 'sonuç yok' mesajı da yok.")
+                    max_empty_pages -= 1
+                    if max_empty_pages <= 0:
+                        logging.error("Arka arkaya çok fazla boş/hatalı sayfa algılandı. Tarama durduruluyor.")
+                        mark_incomplete()
                         break
-                    else:
-                        logging.warning(f"TCI Sayfa {page_count}: Ürün kartı yok ve 'sonuç yok' mesajı da yok.")
-                        max_empty_pages -= 1
-                        if max_empty_pages <= 0:
-                            logging.error("Arka arkaya çok fazla boş/hatalı sayfa algılandı. Tarama durduruluyor.")
-                            break
-
-                # İçerik hash kontrolü
-                try:
-                    product_wrap = self._page.query_selector("#product-basic-wrap")
-                    if product_wrap:
-                        content_html = product_wrap.evaluate("el => el.outerHTML")
-                        current_content_hash = hashlib.md5(content_html.encode()).hexdigest()
-                    else:
-                        current_content_hash = hashlib.md5(self._page.content().encode()).hexdigest()
-                except Exception:
-                    current_content_hash = ""
 
+                current_content_hash = _cards_hash(cards)
                 if current_content_hash == last_page_content_hash and page_count > 1:
                     logging.warning(f"TCI: Sayfa {page_count} içeriği öncekiyle aynı. Tarama durduruluyor.")
                     break
                 last_page_content_hash = current_content_hash
 
-            except Exception as e:
-                logging.warning(f"TCI Sayfa {page_count}: Ürün listesi yüklenemedi: {e}")
-                break
-
-            page_products = []
-            if product_cards:
-                max_empty_pages = 2
-                for card_index, card in enumerate(product_cards):
-                    if cancellation_token.is_set():
-                        break
-                    try:
-                        name_element = card.query_selector("a.name.product-title")
-                        name = name_element.inner_text().strip() if name_element else "N/A"
-                        code = (card.get_attribute("data-product-code1") or "").strip() or "N/A"
-                        cas_number = (card.get_attribute("data-casNo") or "").strip() or "N/A"
-
-                        variations = []
-                        try:
-                            pricing_table = card.query_selector("#PricingTable")
-                            rows = pricing_table.query_selector_all("tr") if pricing_table else []
-                        except Exception:
-                            rows = []
-
-                        for row_index, row in enumerate(rows):
-                            cols = row.query_selector_all("td")
-                            if not cols:
-                                continue
-                            unit = ''
-                            price = ''
-                            stock_info = []
-                            for col in cols:
-                                try:
-                                    data_attr = col.get_attribute("data-attr")
-                                    if not data_attr:
-                                        continue
-                                    data_attr = data_attr.strip().strip(':')
-                                    text = col.inner_text().strip()
-                                    if not text:
-                                        continue
-                                    if data_attr == "Einheit":
-                                        unit = text
-                                    elif data_attr == "Stückpreis":
-                                        price = text.replace('\n', ' ')
-                                    else:
-                                        stock_info.append({'country': data_attr, 'stock': text})
-                                except Exception as col_ex:
-                                    logging.debug(f"Col err: {col_ex}")
-                            if unit and price:
-                                variations.append({'unit': unit, 'price': price, 'stock_info': stock_info})
-                            elif unit or price:
-                                logging.debug(f"Missing data: {code}, U:{unit}, P:{price}")
-
-                        page_products.append(Product(name, code, variations, brand="TCI", cas_number=cas_number))
-                    except Exception as e:
-                        logging.error(f"Card err ({card_index + 1}): {e}", exc_info=False)
-
-            if page_products:
-                yield page_products
-            elif page_count > 1 and not product_cards and max_empty_pages > 0:
-                logging.info(f"TCI Sayfa {page_count}: Ürün bulunamadı. Sonraki sayfa deneniyor ({max_empty_pages} deneme kaldı).")
-            elif page_count == 1 and not product_cards:
-                logging.warning("TCI ilk sayfada ürün kartı bulunamadı. Tarama sonlandırılıyor.")
-                break
+                page_products = _products_from_cards(cards)
+                if page_products:
+                    yield page_products
+                elif page_count > 1 and not cards and max_empty_pages > 0:
+                    logging.info(f"TCI Sayfa {page_count}: Ürün bulunamadı. Sonraki sayfa deneniyor ({max_empty_pages} deneme kaldı).")
+                elif page_count == 1 and not cards:
+                    logging.warning("TCI ilk sayfada ürün kartı bulunamadı. Tarama sonlandırılıyor.")
+                    break
 
-            page_count += 1
+                page_count += 1
+        finally:
+            for future in pending.values():
+                future.cancel()
 
     def close_driver(self):
-        """Playwright bağlantısını temizle."""
+        """Playwright sayfa havuzunu kapat."""
         logging.info("TCI Playwright bağlantısı kapatılıyor...")
-        self._cleanup_playwright()
+        self._stop_workers(self._workers, wait=True)
+        with self._http_lock:
+            if self._http_executor:
+                self._http_executor.shutdown(wait=False, cancel_futures=True)
+                self._http_executor = None
+            if self._http_session:
+                self._http_session.close()
+                self._http_session = None
         logging.info("TCI Playwright bağlantısı kapatıldı.")
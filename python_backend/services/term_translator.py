@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Arama Terimi Çevirisi
+=====================
+Dosyadan okunan Türkçe arama terimleri toplu olarak İngilizceye çevrilir:
+
+1. Daha önce görülen terimler diskteki önbellekten gelir (Türkçe olmadığı
+   anlaşılan terimler de kendi değerleriyle saklanır, dil tespiti tekrarlanmaz).
+2. Tüm kelimeleri yerel kimya sözlüğünde bulunan terimler ağ kullanılmadan çevrilir.
+3. Kalan terimlerin dili tek geçişte tespit edilir; Türkçe olanlar parçalar halinde
+   ve eşzamanlı isteklerle çevirmene gönderilir.
+
+Çeviri başarısız olursa terim olduğu gibi aranır ve önbelleğe yazılmaz; bir sonraki
+dosyada yeniden denenir.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .supplier_io import supplier_io
+
+
+# Sürüm 2: ö/ü/ç tek başına Türkçe sayılmıyor; eski sınıflandırmayla yazılan kayıtlar yok sayılır.
+CACHE_VERSION = 2
+MAX_CACHE_ENTRIES = 20000
+TRANSLATE_CHUNK_SIZE = 20
+MAX_CONCURRENT_CHUNKS = 4
+TRANSLATE_TIMEOUT_SECONDS = 60
+# Yalnızca Türkçeye özgü harfler; ö/ü/ç Almanca ve Fransızca terimlerde de geçtiğinden yalnızca ipucu sayılır.
+_UNIQUE_TURKISH_CHARS = frozenset("ığşİĞŞ")
+_HINT_TURKISH_CHARS = frozenset("çöüÇÖÜ")
+_TOKEN_PATTERN = re.compile(r"[^\W\d_]+|\S+")
+
+# Yaygın kimyasal ve laboratuvar terimleri; Türkçe sıfat-isim sırası İngilizceyle aynı olduğundan kelime kelime çevrilir.
+GLOSSARY: Dict[str, str] = {
+    "asit": "acid", "asidi": "acid", "sülfürik": "sulfuric", "hidroklorik": "hydrochloric", "nitrik": "nitric",
+    "asetik": "acetic", "fosforik": "phosphoric", "sitrik": "citric", "borik": "boric", "formik": "formic",
+    "oksalik": "oxalic", "laktik": "lactic", "askorbik": "ascorbic", "salisilik": "salicylic", "tartarik": "tartaric",
+    "perklorik": "perchloric", "hidroflorik": "hydrofluoric", "benzoik": "benzoic", "stearik": "stearic",
+    "sodyum": "sodium", "potasyum": "potassium", "kalsiyum": "calcium", "magnezyum": "magnesium", "amonyum": "ammonium",
+    "lityum": "lithium", "baryum": "barium", "stronsiyum": "strontium", "sezyum": "cesium", "demir": "iron",
+    "bakır": "copper", "çinko": "zinc", "gümüş": "silver", "altın": "gold", "kurşun": "lead", "cıva": "mercury",
+    "alüminyum": "aluminium", "kalay": "tin", "nikel": "nickel", "kobalt": "cobalt", "krom": "chromium",
+    "mangan": "manganese", "platin": "platinum", "titanyum": "titanium", "kadmiyum": "cadmium", "bizmut": "bismuth",
+    "klorür": "chloride", "sülfat": "sulfate", "sülfit": "sulfite", "sülfür": "sulfide", "nitrat": "nitrate",
+    "nitrit": "nitrite", "fosfat": "phosphate", "karbonat": "carbonate", "bikarbonat": "bicarbonate",
+    "hidroksit": "hydroxide", "oksit": "oxide", "asetat": "acetate", "sitrat": "citrate", "iyodür": "iodide",
+    "iyodat": "iodate", "bromür": "bromide", "florür": "fluoride", "peroksit": "peroxide", "permanganat": "permanganate",
+    "dikromat": "dichromate", "kromat": "chromate", "tiyosülfat": "thiosulfate", "siyanür": "cyanide", "borat": "borate",
+    "silikat": "silicate", "oksalat": "oxalate", "tartarat": "tartrate", "laktat": "lactate", "klorat": "chlorate",
+    "hipoklorit": "hypochlorite", "hidrojen": "hydrogen", "dihidrojen": "dihydrogen", "oksijen": "oxygen",
+    "azot": "nitrogen", "karbon": "carbon", "kükürt": "sulfur", "fosfor": "phosphorus", "iyot": "iodine",
+    "brom": "bromine", "klor": "chlorine", "silisyum": "silicon", "helyum": "helium", "argon": "argon",
+    "etil": "ethyl", "metil": "methyl", "propil": "propyl", "bütil": "butyl", "fenil": "phenyl", "benzil": "benzyl",
+    "alkol": "alcohol", "etanol": "ethanol", "metanol": "methanol", "izopropanol": "isopropanol", "aseton": "acetone",
+    "gliserin": "glycerol", "gliserol": "glycerol", "glikoz": "glucose", "sakaroz": "sucrose", "laktoz": "lactose",
+    "nişasta": "starch", "üre": "urea", "fenol": "phenol", "toluen": "toluene", "ksilen": "xylene", "benzen": "benzene",
+    "heksan": "hexane", "kloroform": "chloroform", "eter": "ether", "formaldehit": "formaldehyde", "asetonitril": "acetonitrile",
+    "amonyak": "ammonia", "jelatin": "gelatin", "agar": "agar", "pepton": "peptone", "maya": "yeast", "özütü": "extract",
+    "ekstraktı": "extract", "su": "water", "suyu": "water", "saf": "pure", "distile": "distilled", "deiyonize": "deionized",
+    "çözelti": "solution", "çözeltisi": "solution", "tampon": "buffer", "tamponu": "buffer", "tuz": "salt", "tuzu": "salt",
+    "toz": "powder", "tozu": "powder", "susuz": "anhydrous", "sulu": "hydrate", "standart": "standard", "standardı": "standard",
+    "ayıraç": "reagent", "ayıracı": "reagent", "indikatör": "indicator", "indikatörü": "indicator", "turnusol": "litmus",
+    "kağıdı": "paper", "kağıt": "paper", "filtre": "filter", "kolon": "column", "jel": "gel", "boya": "dye", "boyası": "dye",
+    "analitik": "analytical", "saflıkta": "grade", "derişik": "concentrated", "seyreltik": "dilute", "sıvı": "liquid",
+    "katı": "solid", "kristal": "crystal", "kristalize": "crystalline", "mavi": "blue", "kırmızı": "red", "yeşil": "green",
+    "sarı": "yellow", "siyah": "black", "beyaz": "white", "mor": "violet", "turuncu": "orange", "tablet": "tablet",
+}
+
+
+def _fold(text: str) -> str:
+    """Türkçe büyük/küçük harf kurallarıyla (I->ı, İ->i) küçük harfe çevirir."""
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+
+def glossary_translation(term: str) -> Optional[str]:
+    """Terimin tüm kelimeleri sözlükteyse yerel çeviriyi döndürür; rakam içeren parçalar (500g, %37) olduğu gibi kalır."""
+    tokens = _TOKEN_PATTERN.findall(term)
+    if not tokens: return None
+    translated, found = [], False
+    for token in tokens:
+        if not token.isalpha():
+            translated.append(token)
+            continue
+        english = GLOSSARY.get(_fold(token))
+        if english is None: return None
+        translated.append(english)
+        found = True
+    return " ".join(translated) if found else None
+
+
+class TermTranslator:
+    def __init__(self, cache_path: Path = None):
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._cache: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+        self._translator = None
+        self._translator_lock = threading.Lock()
+
+    def _load_cache(self) -> Dict[str, str]:
+        if self._cache is not None: return self._cache
+        self._cache = {}
+        if self.cache_path is None or not self.cache_path.exists(): return self._cache
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION: self._cache = dict(data.get("terms") or {})
+        except (OSError, ValueError, AttributeError) as e:
+            logging.warning(f"Çeviri önbelleği okunamadı, yok sayılıyor: {e}")
+        return self._cache
+
+    def _save_cache(self):
+        if self.cache_path is None: return
+        # En eski kayıtlar atılır; sözlük ekleme sırasını koruduğundan baştaki kayıtlar en eskileridir.
+        overflow = len(self._cache) - MAX_CACHE_ENTRIES
+        for key in list(self._cache)[:max(0, overflow)]: del self._cache[key]
+        tmp_path = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": CACHE_VERSION, "terms": self._cache}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logging.warning(f"Çeviri önbelleği kaydedilemedi: {e}")
+
+    def _get_translator(self):
+        with self._translator_lock:
+            if self._translator is None:
+                from googletrans import Translator
+                self._translator = Translator()
+            return self._translator
+
+    @staticmethod
+    def _turkish_terms(terms: List[str]) -> List[str]:
+        """Dil tespiti tek geçişte yapılır; yalnızca Türkçeye özgü harf (ı, ğ, ş) içeren terimler langdetect'e gönderilmez.
+        ö/ü/ç veya sözlük kelimesi içeren terimlerde langdetect'in adayları arasında Türkçe olması yeterlidir."""
+        from langdetect import DetectorFactory, LangDetectException, detect_langs
+        DetectorFactory.seed = 0
+        turkish = []
+        for term in terms:
+            if any(ch in _UNIQUE_TURKISH_CHARS for ch in term):
+                turkish.append(term)
+                continue
+            if not any(ch.isalpha() for ch in term): continue
+            hinted = any(ch in _HINT_TURKISH_CHARS for ch in term) or any(_fold(word) in GLOSSARY for word in _TOKEN_PATTERN.findall(term) if word.isalpha())
+            try:
+                candidates = detect_langs(term)
+            except LangDetectException:
+                # Tespit edilemeyen terimlerde yalnızca ipucu varsa Türkçe kabul edilir.
+                if hinted: turkish.append(term)
+                continue
+            if (candidates and candidates[0].lang == 'tr') or (hinted and any(c.lang == 'tr' for c in candidates)): turkish.append(term)
+        return turkish
+
+    async def _translate_remote(self, terms: List[str]) -> Dict[str, str]:
+        translator = self._get_translator()
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHUNKS)
+        is_async = inspect.iscoroutinefunction(translator.translate)
+
+        async def translate_chunk(chunk: List[str]) -> Dict[str, str]:
+            async with semaphore:
+                try:
+                    if is_async: results = await translator.translate(chunk, src='tr', dest='en')
+                    else: results = await asyncio.to_thread(translator.translate, chunk, src='tr', dest='en')
+                except Exception as e:
+                    logging.warning(f"{len(chunk)} terimlik çeviri isteği başarısız oldu, terimler çevrilmeden aranacak: {e}")
+                    return {}
+                if not isinstance(results, list): results = [results]
+                return {term: result.text for term, result in zip(chunk, results) if result is not None and getattr(result, 'text', None)}
+
+        chunks = [terms[i:i + TRANSLATE_CHUNK_SIZE] for i in range(0, len(terms), TRANSLATE_CHUNK_SIZE)]
+        translated: Dict[str, str] = {}
+        for part in await asyncio.gather(*(translate_chunk(chunk) for chunk in chunks)):
+            translated.update(part)
+        return translated
+
+    def translate_terms(self, terms: Iterable[str]) -> Dict[str, str]:
+        """Her terim için aranacak metni döndürür (Türkçe değilse veya çevrilemezse terimin kendisi)."""
+        start_time = time.monotonic()
+        unique = {term for term in terms if term}
+        result: Dict[str, str] = {}
+        with self._lock:
+            cache = self._load_cache()
+            pending = []
+            for term in unique:
+                cached = cache.get(_fold(term))
+                if cached is not None: result[term] = cached
+                else: pending.append(term)
+        if not pending: return result
+
+        updates: Dict[str, str] = {}
+        remote: List[str] = []
+        for term in pending:
+            local = glossary_translation(term)
+            if local is not None: updates[term] = local
+            else: remote.append(term)
+        try:
+            turkish = self._turkish_terms(remote) if remote else []
+        except ImportError as e:
+            logging.warning(f"Dil tespiti kullanılamıyor, terimler çevrilmeden aranacak: {e}")
+            turkish = []
+        turkish_set = set(turkish)
+        for term in remote:
+            if term not in turkish_set: updates[term] = term
+        if turkish:
+            try:
+                updates.update(supplier_io.run(self._translate_remote(turkish), timeout=TRANSLATE_TIMEOUT_SECONDS) or {})
+            except Exception as e:
+                logging.warning(f"Terim çevirisi tamamlanamadı, {len(turkish)} terim çevrilmeden aranacak: {e}")
+
+        with self._lock:
+            cache = self._load_cache()
+            for term, translated in updates.items(): cache[_fold(term)] = translated
+            if updates: self._save_cache()
+        result.update(updates)
+        for term in pending: result.setdefault(term, term)
+        changed = sum(1 for term in pending if result[term] != term)
+        logging.info(f"Otomatik Çeviri: {len(unique)} terim, {len(unique) - len(pending)} önbellekten, {len(pending) - len(remote)} sözlükten, "
+                     f"{len(turkish)} çevirmene gönderildi; {changed} yeni çeviri ({time.monotonic() - start_time:.2f}s).")
+        return result